@@ -0,0 +1,31 @@
+from database import engine
+from sqlalchemy import text
+
+LINE_KEY = "user_id, jersey_id, size, COALESCE(custom_name, ''), COALESCE(custom_number, ''), patches"
+SAME_LINE = " AND ".join(
+    f"d.{column} = cart_items.{column}" for column in ("user_id", "jersey_id", "size", "patches")
+) + " AND COALESCE(d.custom_name, '') = COALESCE(cart_items.custom_name, '') AND COALESCE(d.custom_number, '') = COALESCE(cart_items.custom_number, '')"
+KEYED = "user_id IS NOT NULL AND jersey_id IS NOT NULL AND size IS NOT NULL AND patches IS NOT NULL"
+
+def add_cart_line_index():
+    with engine.connect() as connection:
+        try:
+            # Lines duplicated by concurrent adds are merged into the oldest row first
+            merged = connection.execute(text(
+                f"UPDATE cart_items SET quantity = (SELECT SUM(d.quantity) FROM cart_items d WHERE {SAME_LINE}) "
+                f"WHERE id IN (SELECT MIN(id) FROM cart_items WHERE {KEYED} GROUP BY {LINE_KEY} HAVING COUNT(*) > 1)"
+            )).rowcount
+            connection.execute(text(
+                f"DELETE FROM cart_items WHERE {KEYED} AND id NOT IN (SELECT MIN(id) FROM cart_items WHERE {KEYED} GROUP BY {LINE_KEY})"
+            ))
+            # One row per cart line, so add-to-cart can upsert (see CART_LINE in src/Models/Cart.py)
+            connection.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS uq_cart_items_line ON cart_items ({LINE_KEY})"))
+            # Purging expired idempotency keys (see main.py)
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at ON idempotency_keys (created_at)"))
+            connection.commit()
+            print(f"Successfully added the cart line index ({merged} duplicated lines merged).")
+        except Exception as e:
+            print(f"Error adding the cart line index: {e}")
+
+if __name__ == "__main__":
+    add_cart_line_index()
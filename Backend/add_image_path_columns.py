@@ -0,0 +1,17 @@
+from database import engine
+from sqlalchemy import text
+
+def add_image_path_columns():
+    # Multipart uploads store a path under MEDIA_DIR instead of base64 data
+    with engine.connect() as connection:
+        for table in ["leagues", "teams", "jersey_images"]:
+            try:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN image_path VARCHAR"))
+                connection.commit()
+                print(f"Successfully added 'image_path' column to {table}.")
+            except Exception as e:
+                connection.rollback()
+                print(f"Error on {table} (column might already exist): {e}")
+
+if __name__ == "__main__":
+    add_image_path_columns()
@@ -0,0 +1,44 @@
+from database import engine, SessionLocal
+from sqlalchemy import text, select, update
+from src.Models.Catalog import JerseyImage
+from src.Controllers.DuplicateImageController import compute_image_hashes
+
+def add_image_phash_columns(batch_size: int = 100):
+    with engine.connect() as connection:
+        for column in ["phash", "dhash"]:
+            try:
+                connection.execute(text(f"ALTER TABLE jersey_images ADD COLUMN {column} BIGINT"))
+                connection.commit()
+                print(f"Successfully added '{column}' column.")
+            except Exception as e:
+                connection.rollback()
+                print(f"Error (column might already exist): {e}")
+
+    # Backfill in batches; images that cannot be decoded keep NULL and are skipped next time
+    db = SessionLocal()
+    try:
+        hashed, last_id = 0, 0
+        while True:
+            rows = db.execute(
+                select(JerseyImage.id, JerseyImage.image_base64, JerseyImage.image_path)
+                .where(JerseyImage.id > last_id, JerseyImage.phash.is_(None))
+                .order_by(JerseyImage.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            values = []
+            for row in rows:
+                image_phash, image_dhash = compute_image_hashes(row.image_base64, row.image_path)
+                if image_phash is not None:
+                    values.append({"id": row.id, "phash": image_phash, "dhash": image_dhash})
+            if values:
+                db.execute(update(JerseyImage), values)
+            db.commit()
+            hashed += len(values)
+        print(f"Computed perceptual hashes for {hashed} images.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    add_image_phash_columns()
@@ -0,0 +1,27 @@
+from database import engine
+from sqlalchemy import text
+
+def add_inventory_columns():
+    # The jersey_stock table itself is created by Base.metadata.create_all on startup
+    with engine.connect() as connection:
+        columns = [("orders", "stock_reserved", "BOOLEAN DEFAULT FALSE"), ("orders", "payment_due_at", "TIMESTAMP"),
+                   ("order_items", "stock_reserved", "BOOLEAN DEFAULT FALSE")]
+        for table, column, definition in columns:
+            try:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+                connection.commit()
+                print(f"Successfully added '{table}.{column}' column.")
+            except Exception as e:
+                connection.rollback()
+                print(f"Error on {table}.{column} (column might already exist): {e}")
+                continue
+            if table == "order_items":
+                # Orders still holding stock from before per-line flags: best guess is every line with a stock row
+                connection.execute(text(
+                    "UPDATE order_items SET stock_reserved = TRUE WHERE order_id IN (SELECT id FROM orders WHERE stock_reserved) "
+                    "AND EXISTS (SELECT 1 FROM jersey_stock s WHERE s.jersey_id = order_items.jersey_id AND s.size = order_items.size)"
+                ))
+                connection.commit()
+
+if __name__ == "__main__":
+    add_inventory_columns()
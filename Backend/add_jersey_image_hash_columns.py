@@ -0,0 +1,48 @@
+from database import engine
+from sqlalchemy import text
+from src.Utils.Images import image_content_hash
+
+def add_jersey_image_hash_columns(batch_size: int = 200):
+    with engine.connect() as connection:
+        for statement in [
+            "ALTER TABLE jersey_images ADD COLUMN content_hash VARCHAR(64)",
+            "ALTER TABLE jersey_images ADD COLUMN position INTEGER NOT NULL DEFAULT 0",
+            "CREATE INDEX IF NOT EXISTS ix_jersey_images_jersey_position ON jersey_images (jersey_id, position)"
+        ]:
+            try:
+                connection.execute(text(statement))
+                connection.commit()
+                print(f"OK: {statement}")
+            except Exception as e:
+                connection.rollback()
+                print(f"Error (might already exist): {e}")
+
+        # Positions follow the old insertion order (id) within each jersey
+        rows = connection.execute(text("SELECT id, jersey_id FROM jersey_images ORDER BY jersey_id, id")).all()
+        positions, last_jersey, position = [], None, 0
+        for image_id, jersey_id in rows:
+            position = position + 1 if jersey_id == last_jersey else 0
+            last_jersey = jersey_id
+            positions.append({"id": image_id, "position": position})
+        if positions:
+            connection.execute(text("UPDATE jersey_images SET position = :position WHERE id = :id"), positions)
+            connection.commit()
+
+        # Hashes are computed in batches so large base64 columns are not all loaded at once
+        hashed = 0
+        while True:
+            batch = connection.execute(text(
+                "SELECT id, image_base64, image_path FROM jersey_images WHERE content_hash IS NULL LIMIT :limit"
+            ), {"limit": batch_size}).all()
+            if not batch:
+                break
+            connection.execute(
+                text("UPDATE jersey_images SET content_hash = :hash WHERE id = :id"),
+                [{"id": row.id, "hash": image_content_hash(row.image_base64, row.image_path)} for row in batch]
+            )
+            connection.commit()
+            hashed += len(batch)
+        print(f"Set positions for {len(positions)} and content hashes for {hashed} images.")
+
+if __name__ == "__main__":
+    add_jersey_image_hash_columns()
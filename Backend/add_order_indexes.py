@@ -0,0 +1,19 @@
+from database import engine
+from sqlalchemy import text
+
+def add_order_indexes():
+    with engine.connect() as connection:
+        try:
+            # Keyset pagination of a user's order history (newest first)
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_user_created ON orders (user_id, created_at, id)"))
+            # Loading the items of a page of orders
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)"))
+            # Archived orders by date (exports and rollup rebuilds)
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_archived_orders_created ON archived_orders (created_at, id)"))
+            connection.commit()
+            print("Successfully added order indexes.")
+        except Exception as e:
+            print(f"Error adding order indexes: {e}")
+
+if __name__ == "__main__":
+    add_order_indexes()
@@ -0,0 +1,14 @@
+from database import engine
+from sqlalchemy import text
+
+def add_order_version_column():
+    with engine.connect() as connection:
+        try:
+            connection.execute(text("ALTER TABLE orders ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+            connection.commit()
+            print("Successfully added 'version' column.")
+        except Exception as e:
+            print(f"Error (column might already exist): {e}")
+
+if __name__ == "__main__":
+    add_order_version_column()
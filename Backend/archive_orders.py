@@ -0,0 +1,35 @@
+import argparse
+from database import SessionLocal, engine, Base
+from src.Models.User import User # Ensure all mapped classes are known
+from src.Models.Cart import CartItem
+from src.Utils.OrderArchive import archive_orders, archive_cutoff, ARCHIVE_AFTER_MONTHS, ARCHIVE_DIR
+from src.Utils.OrderPartitions import ensure_order_partitions, drop_empty_partitions_before
+
+def run_archive(months: int):
+    Base.metadata.create_all(bind=engine)
+
+    # Postgres: make sure new orders have a partition before anything else (see ensure_order_partitions)
+    with engine.connect() as connection:
+        created = ensure_order_partitions(connection)
+        connection.commit()
+        if created:
+            print(f"Created partitions: {', '.join(created)}")
+
+    db = SessionLocal()
+    try:
+        archived = archive_orders(db, months)
+        print(f"Archived {archived} delivered/cancelled orders older than {months} months into {ARCHIVE_DIR}.")
+    finally:
+        db.close()
+
+    # Postgres: drop the partitions archival emptied
+    with engine.connect() as connection:
+        dropped = drop_empty_partitions_before(connection, archive_cutoff(months))
+        connection.commit()
+        if dropped:
+            print(f"Dropped empty partitions: {', '.join(dropped)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old delivered/cancelled orders to the archive.")
+    parser.add_argument("--months", type=int, default=ARCHIVE_AFTER_MONTHS)
+    run_archive(parser.parse_args().months)
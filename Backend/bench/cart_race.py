@@ -0,0 +1,326 @@
+"""
+Concurrency stress test for the cart and checkout: many simultaneous requests per user.
+
+Seeds a few jerseys and --users users, then fires --requests-per-user requests for every
+user at once through the ASGI app: add-to-cart calls drawn from a few line variants (so
+they race on merging into the same cart line) and, with --checkout-share, checkouts (which
+race with the adds on reading, copying and deleting the cart). Afterwards it checks:
+    no duplicate cart lines     at most one cart row per (user, jersey, size, name, number, patches)
+    quantities conserved        per user and line: units acknowledged by add-to-cart (200)
+                                = units left in the cart + units in the user's orders
+                                (less: an update was lost; more: a line was ordered twice)
+    one order per cart item     orders in the database = checkouts answered 201, every order's
+                                total matches its items, and stock taken = units ordered
+Exits with status 1 if any invariant is broken.
+
+It also reports throughput and latency per request type, the database errors raised
+(e.g. "database is locked") and how long writes waited:
+    write stall     time write statements took beyond their uncontended duration (the same
+                    requests are first run one at a time), by route; on SQLite this is where
+                    waiting for the write lock shows, along with thread scheduling on busy hosts
+    lock wait       Postgres only: sessions waiting on a lock, sampled from pg_stat_activity
+Run it against SQLite (switched to WAL here) and Postgres via DATABASE_URL, before and
+after a locking change. --max-in-flight bounds the requests in progress: far above the
+connection pool size, requests queue for connections (and time out after the pool
+timeout) instead of racing in the database.
+
+Usage (from Backend/, against the database in DATABASE_URL):
+    python -m bench.cart_race --users 10 --requests-per-user 200
+    python -m bench.cart_race --users 50 --requests-per-user 100 --checkout-share 0.2 --stock 500
+"""
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+import httpx
+from sqlalchemy import event, func, select, text
+from database import SessionLocal, engine
+from src.Models.Cart import CartItem
+from src.Models.Catalog import League, Team, JerseyType, Jersey, JerseyStock
+from src.Models.Order import Order, OrderItem
+from src.Models.User import User
+from src.Utils.QueryStats import current_query_stats, statement_shape
+from src.Utils.Security import create_access_token
+from bench.load_test import ORDER_PAYLOAD, percentile
+import main
+
+SIZES = ["M", "L"]
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+class WriteTimer:
+    """Durations of write statements by shape and route, plus database errors, while recording."""
+
+    def __init__(self):
+        self.recording = None # "baseline", "stress" or None
+        self.samples = {"baseline": [], "stress": []}
+        self.errors = Counter()
+        event.listen(engine, "before_cursor_execute", self.before)
+        event.listen(engine, "after_cursor_execute", self.after)
+        event.listen(engine, "handle_error", self.error)
+
+    def before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("race_started", []).append(time.perf_counter())
+
+    def after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("race_started")
+        if not started:
+            return
+        seconds = time.perf_counter() - started.pop()
+        if self.recording and statement.lstrip()[:6].upper() in WRITES:
+            stats = current_query_stats()
+            route = stats.describe() if stats is not None else None
+            self.samples[self.recording].append((statement_shape(statement), route, seconds))
+
+    def error(self, context):
+        if context.connection is not None:
+            context.connection.info.get("race_started", [None]).pop() # The statement never finished
+        if self.recording:
+            self.errors[f"{type(context.original_exception).__name__}: {str(context.original_exception).splitlines()[0][:120]}"] += 1
+
+    def stall(self) -> dict:
+        """Seconds of write statements beyond their uncontended median, by route."""
+        durations = defaultdict(list)
+        for shape, _, seconds in self.samples["baseline"]:
+            durations[shape].append(seconds)
+        medians = {shape: sorted(values)[len(values) // 2] for shape, values in durations.items()}
+        fallback = sorted(medians.values())[len(medians) // 2] if medians else 0.0
+        waits = defaultdict(float)
+        for shape, route, seconds in self.samples["stress"]:
+            waits[route or "other"] += max(0.0, seconds - medians.get(shape, fallback))
+        return dict(waits)
+
+class LockWaitSampler:
+    """Postgres: integrates the number of sessions waiting on a lock (pg_stat_activity) over time."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="lock-wait-sampler", daemon=True)
+
+    def _sample(self):
+        query = text("SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock' AND datname = current_database()")
+        with engine.connect() as conn:
+            last = time.perf_counter()
+            while not self._stop.wait(self.interval):
+                waiting = conn.execute(query).scalar()
+                conn.rollback() # Fresh snapshot next time
+                now = time.perf_counter()
+                self.seconds += waiting * (now - last)
+                last = now
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def seed(db, users: int, jerseys: int, stock: int):
+    run = uuid.uuid4().hex[:8]
+    league = League(name=f"bench-race-league-{run}")
+    team = Team(name=f"bench-race-team-{run}", league=league)
+    j_type = JerseyType(name=f"bench-race-type-{run}", original_price=90, current_price=80)
+    batch = [Jersey(team=team, jersey_type=j_type, season="2025/26", main_color="Azul") for _ in range(jerseys)]
+    db.add_all([league, team, j_type, *batch])
+    db.flush()
+    db.add_all(JerseyStock(jersey_id=jersey.id, size=size, quantity=stock) for jersey in batch for size in SIZES)
+    accounts = []
+    for i in range(users + 1): # The last one runs the uncontended baseline
+        user = User(username=f"bench-race-{run}-{i}", email=f"bench-race-{run}-{i}@example.com", hashed_password="!")
+        db.add(user)
+        db.flush()
+        accounts.append((user.id, create_access_token(data={"sub": user.email})))
+    db.commit()
+    return [jersey.id for jersey in batch], accounts[:-1], accounts[-1]
+
+def line_variants(jersey_ids, count: int, rng: random.Random):
+    variants = [(jersey_id, size, None, None, ()) for jersey_id in jersey_ids for size in SIZES]
+    variants += [(jersey_ids[0], "M", "BENCH", "10", ()), (jersey_ids[0], "M", None, None, ("Champions", "Liga"))]
+    return rng.sample(variants, min(count, len(variants)))
+
+class Run:
+    def __init__(self, client: httpx.AsyncClient, max_in_flight: int = 0):
+        self.client = client
+        self.slots = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.acknowledged = defaultdict(int) # (user_id, line) -> units
+        self.checkouts = Counter() # user_id -> orders created
+
+    async def add(self, user_id: int, token: str, line, quantity: int):
+        jersey_id, size, name, number, patches = line
+        item = {"jersey_id": jersey_id, "size": size, "quantity": quantity, "custom_name": name, "custom_number": number,
+                "patches": list(patches), "final_price": 80}
+        status = await self.request("add to cart", "/cart/", token, json=item)
+        if status == 200:
+            self.acknowledged[(user_id, line)] += quantity
+
+    async def checkout(self, user_id: int, token: str):
+        status = await self.request("checkout", "/orders/", token, json=ORDER_PAYLOAD, headers={"Idempotency-Key": uuid.uuid4().hex})
+        if status == 201:
+            self.checkouts[user_id] += 1
+
+    async def request(self, kind: str, path: str, token: str, headers: dict = None, **kwargs) -> int:
+        if self.slots is not None:
+            async with self.slots:
+                return await self._post(kind, path, token, headers, **kwargs)
+        return await self._post(kind, path, token, headers, **kwargs)
+
+    async def _post(self, kind: str, path: str, token: str, headers: dict = None, **kwargs) -> int:
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(path, headers={"Authorization": f"Bearer {token}", **(headers or {})}, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        self.latencies[kind].append(time.perf_counter() - started)
+        self.statuses[kind][status] += 1
+        return status
+
+def workload(user_id: int, token: str, run: Run, lines, requests: int, checkout_share: float, rng: random.Random):
+    calls = []
+    for _ in range(requests):
+        if rng.random() < checkout_share:
+            calls.append(run.checkout(user_id, token))
+        else:
+            calls.append(run.add(user_id, token, rng.choice(lines), rng.randint(1, 3)))
+    return calls
+
+def check(db, jersey_ids, accounts, run: Run, stock: int) -> list:
+    """Broken invariants, as messages."""
+    user_ids = [user_id for user_id, _ in accounts]
+    line = lambda row: (row.jersey_id, row.size, row.custom_name, row.custom_number, tuple(sorted(row.patches or [])))
+    failures = []
+
+    cart = db.query(CartItem).filter(CartItem.user_id.in_(user_ids)).all()
+    rows = Counter((item.user_id, line(item)) for item in cart)
+    duplicates = {key: count for key, count in rows.items() if count > 1}
+    if duplicates:
+        failures.append(f"duplicate cart lines: {len(duplicates)} lines with {sum(duplicates.values())} rows")
+
+    in_cart, ordered = defaultdict(int), defaultdict(int)
+    for item in cart:
+        in_cart[(item.user_id, line(item))] += item.quantity
+    orders = db.query(Order).filter(Order.user_id.in_(user_ids)).all()
+    items = db.query(OrderItem).join(Order).filter(Order.user_id.in_(user_ids)).all()
+    owner = {order.id: order.user_id for order in orders}
+    totals = defaultdict(float)
+    for item in items:
+        ordered[(owner[item.order_id], line(item))] += item.quantity
+        totals[item.order_id] += item.price * item.quantity
+
+    lost = over = 0
+    for key in set(run.acknowledged) | set(in_cart) | set(ordered):
+        difference = run.acknowledged[key] - in_cart[key] - ordered[key]
+        lost += max(0, difference)
+        over += max(0, -difference)
+    if lost:
+        failures.append(f"quantities not conserved: {lost} acknowledged units neither in a cart nor in an order (lost updates)")
+    if over:
+        failures.append(f"quantities not conserved: {over} units more in carts and orders than acknowledged (double counted)")
+
+    per_user = Counter(order.user_id for order in orders)
+    if per_user != run.checkouts:
+        failures.append(f"orders in the database ({len(orders)}) do not match checkouts answered 201 ({sum(run.checkouts.values())})")
+    wrong_totals = [order.id for order in orders if abs(order.total_amount - totals[order.id]) > 0.005]
+    if wrong_totals:
+        failures.append(f"{len(wrong_totals)} orders whose total does not match their items")
+
+    # The seeded jerseys are only ordered by this run (baseline user included)
+    remaining = db.execute(select(func.sum(JerseyStock.quantity)).where(JerseyStock.jersey_id.in_(jersey_ids))).scalar()
+    sold = db.execute(select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.jersey_id.in_(jersey_ids))).scalar()
+    taken = stock * len(jersey_ids) * len(SIZES) - remaining
+    if taken != sold:
+        failures.append(f"stock taken ({taken}) does not match units ordered ({sold})")
+    return failures
+
+async def stress(args, jersey_ids, accounts, baseline_account, timer: WriteTimer):
+    rng = random.Random(args.seed)
+    lines = line_variants(jersey_ids, args.lines, rng)
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False) # Server errors count as 500s
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+        # Uncontended durations: the same kind of requests, one at a time
+        timer.recording = "baseline"
+        baseline = Run(client)
+        for call in workload(*baseline_account, baseline, lines, args.baseline_requests, args.checkout_share, rng):
+            await call
+
+        timer.recording = "stress"
+        run = Run(client, args.max_in_flight)
+        calls = [call for user_id, token in accounts
+                 for call in workload(user_id, token, run, lines, args.requests_per_user, args.checkout_share, rng)]
+        rng.shuffle(calls)
+        sampler = LockWaitSampler() if engine.dialect.name == "postgresql" else None
+        started = time.perf_counter()
+        if sampler is not None:
+            with sampler:
+                await asyncio.gather(*calls)
+        else:
+            await asyncio.gather(*calls)
+        elapsed = time.perf_counter() - started
+        timer.recording = None
+    return run, elapsed, sampler
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--requests-per-user", type=int, default=200, help="Requests fired at once for each user")
+    parser.add_argument("--checkout-share", type=float, default=0.1, help="Share of requests that are checkouts")
+    parser.add_argument("--lines", type=int, default=3, help="Distinct cart lines each user adds to (fewer: more merge races)")
+    parser.add_argument("--jerseys", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=1000000, help="Stock per jersey and size (low values add 409 races)")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Requests in progress at once; 0 for all of them")
+    parser.add_argument("--baseline-requests", type=int, default=100, help="Uncontended requests timed first")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn: # Persistent: readers stop blocking the writer
+            mode = conn.execute(text("PRAGMA journal_mode=WAL")).scalar()
+        print(f"SQLite journal mode: {mode}")
+
+    timer = WriteTimer()
+    db = SessionLocal()
+    jersey_ids, accounts, baseline_account = seed(db, args.users, args.jerseys, args.stock)
+    run, elapsed, sampler = asyncio.run(stress(args, jersey_ids, accounts, baseline_account, timer))
+
+    db.expire_all()
+    failures = check(db, jersey_ids, accounts, run, args.stock)
+    db.close()
+
+    total = sum(len(values) for values in run.latencies.values())
+    print(f"{total} requests from {len(accounts)} users in {elapsed:.2f}s: {total / elapsed:.1f} req/s ({engine.dialect.name})")
+    print(f"{'request':<12} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    for kind, values in sorted(run.latencies.items()):
+        values.sort()
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(run.statuses[kind].items()))
+        print(f"{kind:<12} {len(values):>7} {percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.95) * 1000:>8.1f} "
+              f"{percentile(values, 0.99) * 1000:>8.1f}  {statuses}")
+
+    stalls = timer.stall()
+    print(f"write stall: {sum(stalls.values()):.2f}s over {len(timer.samples['stress'])} writes "
+          f"({sum(stalls.values()) / elapsed:.2f}s per second of run)")
+    for route, seconds in sorted(stalls.items(), key=lambda item: -item[1]):
+        print(f"  {route:<24} {seconds:8.2f}s")
+    if sampler is not None:
+        print(f"lock wait: {sampler.seconds:.2f}s ({sampler.seconds / elapsed:.2f}s per second of run)")
+    if timer.errors:
+        print("database errors:")
+        for message, count in timer.errors.most_common(5):
+            print(f"  {count}x {message}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK: cart and orders consistent")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,112 @@
+"""
+Requests per second of the public catalog read routes, driven in-process through
+the ASGI app with concurrent clients (no network, no server).
+
+Seeds a catalog once (jerseys with inline base64 images, like legacy rows), then
+runs each scenario for a fixed time and reports RPS, p50/p95 latency and the
+response size on the wire (after Content-Encoding, see --accept-encoding). Compare
+runs before and after a change on the same database.
+
+Usage (from Backend/, against the database in DATABASE_URL):
+    python -m bench.catalog_rps --jerseys 2000 --duration 10 --concurrency 16
+"""
+import argparse
+import asyncio
+import base64
+import os
+import random
+import time
+import httpx
+from database import SessionLocal
+from src.Models.Catalog import League, Team, JerseyType, Jersey, JerseyImage
+import main
+
+SEED_LEAGUE = "bench-rps-league"
+
+SCENARIOS = [
+    ("list 20", "/catalog/jerseys?limit=20"),
+    ("list 20 sparse", "/catalog/jerseys?limit=20&fields=id,team_name,season,jersey_type.current_price,images.variants,images.is_main"),
+    ("list 100 sparse", "/catalog/jerseys?limit=100&fields=id,team_name,season,jersey_type.current_price"),
+    ("detail", "/catalog/jerseys/{jersey_id}"),
+    ("detail sparse", "/catalog/jerseys/{jersey_id}?fields=id,team_name,season,description,jersey_type"),
+]
+
+def seed(jerseys: int, image_kb: int):
+    db = SessionLocal()
+    try:
+        league = db.query(League).filter(League.name == SEED_LEAGUE).first()
+        if league is None:
+            league = League(name=SEED_LEAGUE)
+            teams = [Team(name=f"bench-rps-team-{i}", league=league) for i in range(50)]
+            types = [JerseyType(name=f"bench-rps-type-{i}", original_price=90, current_price=70 + i) for i in range(3)]
+            db.add_all([league, *teams, *types])
+            db.commit()
+        teams = db.query(Team).filter(Team.league_id == league.id).all()
+        types = db.query(JerseyType).filter(JerseyType.name.like("bench-rps-type-%")).all()
+
+        existing = db.query(Jersey).filter(Jersey.team_id.in_([team.id for team in teams])).count()
+        for start in range(existing, jerseys, 500):
+            batch = [
+                Jersey(team_id=random.choice(teams).id, jersey_type_id=random.choice(types).id,
+                       season=f"{random.randint(2000, 2025)}/{random.randint(0, 99):02d}", main_color="Azul",
+                       description="Camisola de teste " * 5)
+                for _ in range(min(500, jerseys - start))
+            ]
+            db.add_all(batch)
+            db.flush()
+            db.add_all(
+                JerseyImage(jersey_id=jersey.id, position=i, is_main=i == 0,
+                            image_base64="data:image/jpeg;base64," + base64.b64encode(os.urandom(image_kb * 1024)).decode())
+                for jersey in batch for i in range(2)
+            )
+            db.commit()
+        return [row[0] for row in db.query(Jersey.id).filter(Jersey.team_id.in_([team.id for team in teams]))]
+    finally:
+        db.close()
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+async def run(path_template: str, jersey_ids, duration: float, concurrency: int, accept_encoding: str):
+    timings, sizes = [], []
+    deadline = time.perf_counter() + duration
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers={"Accept-Encoding": accept_encoding}) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                path = path_template.format(jersey_id=random.choice(jersey_ids))
+                started = time.perf_counter()
+                response = await client.get(path)
+                timings.append(time.perf_counter() - started)
+                sizes.append(response.num_bytes_downloaded)
+                assert response.status_code == 200, (path, response.status_code, response.text[:200])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    timings.sort()
+    return len(timings) / elapsed, percentile(timings, 0.5) * 1000, percentile(timings, 0.95) * 1000, sum(sizes) / len(sizes)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jerseys", type=int, default=2000)
+    parser.add_argument("--image-kb", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--only", help="Run only scenarios whose name contains this text")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--accept-encoding", default="gzip, deflate", help='Sent by the clients; "identity" for uncompressed responses')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    jersey_ids = seed(args.jerseys, args.image_kb)
+    print(f"{len(jersey_ids)} jerseys, {args.concurrency} concurrent clients, {args.duration:.0f}s per scenario, Accept-Encoding: {args.accept_encoding}")
+    for name, path in SCENARIOS:
+        if args.only and args.only not in name:
+            continue
+        asyncio.run(run(path, jersey_ids, min(2.0, args.duration), args.concurrency, args.accept_encoding)) # Warm-up
+        rps, p50, p95, size = asyncio.run(run(path, jersey_ids, args.duration, args.concurrency, args.accept_encoding))
+        print(f"{name:<16} {rps:8.0f} req/s   p50={p50:6.1f}ms p95={p95:6.1f}ms   {size / 1024:8.1f} KB/response")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,169 @@
+"""
+Overlapping checkouts of the same cart: every user fires --checkouts POST /orders/ at once
+through the ASGI app, half of them retries sharing one Idempotency-Key, while --adds
+add-to-cart calls race with them (an add that fails is simply not acknowledged; add-to-cart
+merge races are bench.cart_race's subject). Afterwards it checks, per user:
+    one order per claimed cart   orders = checkouts answered 201 with distinct order ids;
+                                 the others got 409 (claimed by another checkout), 400 (empty)
+                                 or replayed the order of their Idempotency-Key
+    totals                       every order's total matches its items
+    units conserved              units in the seeded cart + acknowledged adds
+                                 = units left in the cart + units in the user's orders
+    stock                        stock taken = units ordered, and only orders (and order
+                                 items) that took stock are marked stock_reserved
+Exits with status 1 if any invariant is broken.
+
+Usage (from Backend/, against the database in DATABASE_URL):
+    python -m bench.checkout_race --users 20 --checkouts 8 --adds 4
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+import httpx
+from main import app
+from database import SessionLocal
+from src.Models.User import User
+from src.Models.Cart import CartItem
+from src.Models.Catalog import League, Team, JerseyType, Jersey, JerseyStock
+from src.Models.Order import Order, OrderItem
+from src.Utils.Security import create_access_token
+from bench.load_test import ORDER_PAYLOAD
+
+SIZES = ["S", "M", "L"]
+
+def seed(db, users: int, stock: int):
+    run = uuid.uuid4().hex[:8]
+    league = League(name=f"bench-checkout-league-{run}")
+    team = Team(name=f"bench-checkout-team-{run}", league=league)
+    j_type = JerseyType(name=f"bench-checkout-type-{run}", original_price=90, current_price=80)
+    jersey = Jersey(team=team, jersey_type=j_type, season="2025/26", main_color="Verde")
+    db.add_all([league, team, j_type, jersey])
+    db.flush()
+    db.add_all(JerseyStock(jersey_id=jersey.id, size=size, quantity=stock) for size in SIZES[:-1]) # The last size is untracked
+
+    accounts = []
+    for i in range(users):
+        user = User(username=f"bench-checkout-{run}-{i}", email=f"bench-checkout-{run}-{i}@example.com", hashed_password="!")
+        db.add(user)
+        db.flush()
+        db.add_all(CartItem(user_id=user.id, jersey_id=jersey.id, size=size, quantity=n + 1, patches=[], final_price=80 - n * 5)
+                   for n, size in enumerate(SIZES))
+        accounts.append((user.id, create_access_token(data={"sub": user.email})))
+    db.commit()
+    return jersey.id, accounts
+
+async def race(accounts, jersey_id: int, checkouts: int, adds: int, max_in_flight: int):
+    slots = asyncio.Semaphore(max_in_flight) # Far above the pool size, requests time out waiting for connections
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False) # Server errors count as 500s
+    results = defaultdict(list) # user_id -> [(kind, status, order_id)]
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def checkout(user_id, token, key):
+            headers = {"Authorization": f"Bearer {token}"}
+            if key:
+                headers["Idempotency-Key"] = key
+            async with slots:
+                response = await client.post("/orders/", json=ORDER_PAYLOAD, headers=headers)
+            order_id = response.json().get("order_id") if response.status_code == 201 else None
+            results[user_id].append(("retry" if key else "checkout", response.status_code, order_id))
+
+        async def add(user_id, token):
+            item = {"jersey_id": jersey_id, "size": "M", "quantity": 1, "patches": [], "final_price": 75}
+            async with slots:
+                response = await client.post("/cart/", json=item, headers={"Authorization": f"Bearer {token}"})
+            results[user_id].append(("add", response.status_code, None))
+
+        calls = []
+        for user_id, token in accounts:
+            key = uuid.uuid4().hex
+            calls += [checkout(user_id, token, key if i % 2 else None) for i in range(checkouts)]
+            calls += [add(user_id, token) for _ in range(adds)]
+        await asyncio.gather(*calls)
+    return results
+
+def check(db, jersey_id: int, accounts, results, stock: int) -> list:
+    failures = []
+    user_ids = [user_id for user_id, _ in accounts]
+    orders = db.query(Order).filter(Order.user_id.in_(user_ids)).all()
+    items = db.query(OrderItem).join(Order).filter(Order.user_id.in_(user_ids)).all()
+    cart = db.query(CartItem).filter(CartItem.user_id.in_(user_ids)).all()
+
+    seeded_units = sum(n + 1 for n in range(len(SIZES)))
+    ordered, totals, in_cart = Counter(), defaultdict(float), Counter()
+    owner = {order.id: order.user_id for order in orders}
+    for item in items:
+        ordered[owner[item.order_id]] += item.quantity
+        totals[item.order_id] += item.price * item.quantity
+    for item in cart:
+        in_cart[item.user_id] += item.quantity
+
+    unexpected = Counter()
+    for user_id in user_ids:
+        calls = results[user_id]
+        created = {order_id for kind, status, order_id in calls if status == 201}
+        retried = {order_id for kind, status, order_id in calls if kind == "retry" and status == 201}
+        unexpected.update(status for kind, status, _ in calls if kind != "add" and status not in (201, 400, 409))
+        if len(retried) > 1:
+            failures.append(f"user {user_id}: retries with one Idempotency-Key created {len(retried)} orders")
+        if created != {order.id for order in orders if order.user_id == user_id}:
+            failures.append(f"user {user_id}: orders in the database do not match checkouts answered 201")
+        acknowledged = sum(1 for kind, status, _ in calls if kind == "add" and status == 200)
+        if seeded_units + acknowledged != in_cart[user_id] + ordered[user_id]:
+            failures.append(f"user {user_id}: {seeded_units + acknowledged} units added but {in_cart[user_id]} in the cart "
+                            f"and {ordered[user_id]} ordered")
+    if unexpected:
+        failures.append(f"unexpected checkout statuses: {dict(unexpected)}")
+
+    wrong_totals = [order.id for order in orders if abs(order.total_amount - totals[order.id]) > 0.005]
+    if wrong_totals:
+        failures.append(f"{len(wrong_totals)} orders whose total does not match their items")
+
+    remaining = {row.size: row.quantity for row in db.query(JerseyStock).filter(JerseyStock.jersey_id == jersey_id)}
+    tracked = {size: sum(item.quantity for item in items if item.size == size) for size in remaining}
+    for size, sold in tracked.items():
+        if stock - remaining[size] != sold:
+            failures.append(f"size {size}: stock taken ({stock - remaining[size]}) does not match units ordered ({sold})")
+    reserving = {item.order_id for item in items if item.size in remaining}
+    flagged = {order.id for order in orders if order.stock_reserved}
+    if flagged != reserving:
+        failures.append(f"{len(flagged ^ reserving)} orders whose stock_reserved flag does not match the stock they took")
+    wrong_lines = [item.id for item in items if item.stock_reserved != (item.size in remaining)]
+    if wrong_lines:
+        failures.append(f"{len(wrong_lines)} order items whose stock_reserved flag does not match the stock they took")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--checkouts", type=int, default=8, help="Checkouts fired at once per user (half of them retries)")
+    parser.add_argument("--adds", type=int, default=4, help="Add-to-cart calls racing with them per user")
+    parser.add_argument("--stock", type=int, default=100000, help="Stock per tracked size")
+    parser.add_argument("--max-in-flight", type=int, default=32, help="Requests in progress at once")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    jersey_id, accounts = seed(db, args.users, args.stock)
+
+    started = time.perf_counter()
+    results = asyncio.run(race(accounts, jersey_id, args.checkouts, args.adds, args.max_in_flight))
+    elapsed = time.perf_counter() - started
+
+    db.expire_all()
+    failures = check(db, jersey_id, accounts, results, args.stock)
+    db.close()
+
+    statuses = Counter((kind, status) for calls in results.values() for kind, status, _ in calls)
+    print(f"{sum(statuses.values())} requests from {len(accounts)} users in {elapsed:.2f}s")
+    for (kind, status), count in sorted(statuses.items()):
+        print(f"  {kind:<9} {status}: {count}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK: one order per cart, totals and stock consistent")
+
+if __name__ == "__main__":
+    main()
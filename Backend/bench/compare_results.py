@@ -0,0 +1,93 @@
+"""
+Compares two bench.load_test reports (a baseline and a candidate, e.g. two commits).
+
+For every step in both reports, prints the baseline and candidate values of p50/p95/p99
+latency, RPS, errors and statements per request, and flags regressions:
+    latency (p95, p99) up by more than --latency-tolerance (relative), and by at least --min-ms
+    RPS down by more than --rps-tolerance (relative)
+    statements per request up by more than --queries-tolerance (relative; they barely vary
+    between runs, so even small increases mean a new query, e.g. an N+1)
+    error rate up by more than --error-tolerance (absolute)
+Latency and RPS are only judged for steps with at least --min-requests in both reports;
+tail percentiles of a few dozen samples are noise.
+Exits with status 1 on any regression, so CI can gate on it. Compare runs made with the
+same dataset, load test arguments and machine; the reports' meta blocks are shown.
+
+Usage (from Backend/):
+    python -m bench.compare_results results/load-abc123.json results/load-def456.json
+"""
+import argparse
+import json
+import sys
+
+def load(path: str) -> dict:
+    with open(path) as handle:
+        return json.load(handle)
+
+def relative(baseline: float, candidate: float) -> float:
+    return (candidate - baseline) / baseline if baseline else 0.0
+
+def error_rate(step: dict) -> float:
+    return step["errors"] / step["requests"] if step["requests"] else 0.0
+
+def regressions(name: str, baseline: dict, candidate: dict, args) -> list:
+    found = []
+    if min(baseline["requests"], candidate["requests"]) >= args.min_requests:
+        for key in ("p95_ms", "p99_ms"):
+            if relative(baseline[key], candidate[key]) > args.latency_tolerance and candidate[key] - baseline[key] >= args.min_ms:
+                found.append(f"{name}: {key} {baseline[key]:.1f} -> {candidate[key]:.1f}")
+        if relative(baseline["rps"], candidate["rps"]) < -args.rps_tolerance:
+            found.append(f"{name}: rps {baseline['rps']:.1f} -> {candidate['rps']:.1f}")
+    if (baseline["mean_queries"] is not None and candidate["mean_queries"] is not None
+            and relative(baseline["mean_queries"], candidate["mean_queries"]) > args.queries_tolerance):
+        found.append(f"{name}: queries {baseline['mean_queries']:.2f} -> {candidate['mean_queries']:.2f}")
+    if error_rate(candidate) - error_rate(baseline) > args.error_tolerance:
+        found.append(f"{name}: error rate {error_rate(baseline):.1%} -> {error_rate(candidate):.1%}")
+    return found
+
+def change(baseline, candidate, digits: int = 1) -> str:
+    if baseline is None or candidate is None:
+        return f"{'-':>22}"
+    delta = f"{relative(baseline, candidate):+.0%}" if baseline else ""
+    return f"{baseline:>8.{digits}f} {candidate:>8.{digits}f} {delta:>4}"
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--latency-tolerance", type=float, default=0.15, help="Allowed relative p95/p99 increase")
+    parser.add_argument("--min-ms", type=float, default=2.0, help="Ignore latency increases smaller than this")
+    parser.add_argument("--rps-tolerance", type=float, default=0.10, help="Allowed relative RPS decrease")
+    parser.add_argument("--queries-tolerance", type=float, default=0.05, help="Allowed relative increase of statements per request")
+    parser.add_argument("--min-requests", type=int, default=200, help="Requests a step needs (in both reports) for latency and RPS checks")
+    parser.add_argument("--error-tolerance", type=float, default=0.01, help="Allowed absolute error rate increase")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    for label, report in (("baseline", baseline), ("candidate", candidate)):
+        meta = report["meta"]
+        print(f"{label:<10} {meta['commit']} {meta['date']} {meta['target']} users={meta['users']} duration={meta['duration']}s mix={meta['mix']}")
+    print()
+    print(f"{'step':<12} {'p50 ms':>22} {'p95 ms':>22} {'p99 ms':>22} {'rps':>22} {'queries':>22}")
+    found = []
+    for name in sorted(set(baseline["steps"]) | set(candidate["steps"])):
+        before, after = baseline["steps"].get(name), candidate["steps"].get(name)
+        if before is None or after is None:
+            print(f"{name:<12} only in {'candidate' if before is None else 'baseline'}")
+            continue
+        print(f"{name:<12} {change(before['p50_ms'], after['p50_ms'])} {change(before['p95_ms'], after['p95_ms'])} "
+              f"{change(before['p99_ms'], after['p99_ms'])} {change(before['rps'], after['rps'])} "
+              f"{change(before['mean_queries'], after['mean_queries'], 2)}"
+              f"{'  (few requests)' if min(before['requests'], after['requests']) < args.min_requests else ''}")
+        found += regressions(name, before, after, args)
+
+    print()
+    if found:
+        print("Regressions:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+    print("No regressions")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,117 @@
+"""
+Edit latency of update_jersey on a jersey with many images.
+
+The admin UI always resends every image, so each scenario resends the full list.
+The diff-based reconciliation is compared with the previous strategy (delete every
+image row and re-insert the whole list), both run at controller level on the same data.
+
+Usage (from Backend/, against the database in DATABASE_URL):
+    python -m bench.jersey_edit_latency --images 40 --image-kb 300 --repeat 10
+"""
+import argparse
+import base64
+import os
+import statistics
+import time
+import uuid
+from sqlalchemy import event
+from database import engine, SessionLocal
+from src.Models.Catalog import League, Team, JerseyType, Jersey, JerseyImage
+from src.Schemas.CatalogSchema import JerseyCreate
+from src.Controllers.CatalogController import update_jersey
+
+def legacy_update_jersey(db, jersey_id: int, jersey_data: JerseyCreate):
+    # The replace-everything behaviour update_jersey had before reconciliation
+    db_jersey = db.query(Jersey).filter(Jersey.id == jersey_id).first()
+    db_jersey.description = jersey_data.description
+    db.query(JerseyImage).filter(JerseyImage.jersey_id == jersey_id).delete()
+    for img in jersey_data.images:
+        db.add(JerseyImage(jersey_id=jersey_id, image_base64=img.image_base64, is_main=img.is_main))
+    db.commit()
+    db.refresh(db_jersey)
+    return db_jersey
+
+def seed(db, image_count: int, image_kb: int):
+    run = uuid.uuid4().hex[:8]
+    league = League(name=f"bench-league-{run}")
+    team = Team(name=f"bench-team-{run}", league=league)
+    j_type = JerseyType(name=f"bench-type-{run}", original_price=90, current_price=80)
+    jersey = Jersey(team=team, jersey_type=j_type, season="2025/26", main_color="Vermelho")
+    db.add_all([league, team, j_type, jersey])
+    db.commit()
+
+    # Random bytes, so every image is distinct and incompressible like real photos
+    images = [
+        {"image_base64": "data:image/jpeg;base64," + base64.b64encode(os.urandom(image_kb * 1024)).decode(), "is_main": i == 0}
+        for i in range(image_count)
+    ]
+    payload = {"team_id": team.id, "season": "2025/26", "jersey_type_id": j_type.id, "main_color": "Vermelho", "images": images}
+    update_jersey(db, jersey.id, JerseyCreate(**payload))
+    return jersey.id, payload
+
+def scenarios(payload):
+    """(name, payload builder) pairs; builders get the run number so consecutive runs differ."""
+    def description_edit(n):
+        return {**payload, "description": f"edit {n}"}
+
+    def main_flip(n):
+        count = len(payload["images"])
+        return {**payload, "images": [{**img, "is_main": i == n % count} for i, img in enumerate(payload["images"])]}
+
+    def reorder(n):
+        images = payload["images"][n % 2:] + payload["images"][:n % 2]
+        return {**payload, "images": images}
+
+    def add_one(n):
+        extra = {"image_base64": "data:image/jpeg;base64," + base64.b64encode(os.urandom(64 * 1024)).decode(), "is_main": False}
+        return {**payload, "images": payload["images"] + [extra]}
+
+    return [("description edit", description_edit), ("main image flip", main_flip), ("reorder", reorder), ("add one image", add_one)]
+
+def measure(db, jersey_id: int, strategy, build, repeat: int):
+    writes = []
+
+    def listener(conn, cursor, statement, params, context, executemany):
+        # One entry per statement (an executemany counts once)
+        if "jersey_images" in statement and not statement.lstrip().upper().startswith("SELECT"):
+            writes.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    timings = []
+    try:
+        for n in range(repeat):
+            data = JerseyCreate(**build(n))
+            started = time.perf_counter()
+            strategy(db, jersey_id, data)
+            timings.append((time.perf_counter() - started) * 1000)
+            db.expire_all()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return statistics.median(timings), max(timings), len(writes) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--image-kb", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    jersey_id, payload = seed(db, args.images, args.image_kb)
+    print(f"jersey {jersey_id}: {args.images} images x {args.image_kb} KB, {args.repeat} runs per scenario")
+    print(f"{'scenario':<18} {'strategy':<10} {'median ms':>10} {'max ms':>10} {'writes/run':>11}")
+
+    for name, build in scenarios(payload):
+        for label, strategy in [("replace", legacy_update_jersey), ("diff", update_jersey)]:
+            # Start every measurement from the same image list
+            update_jersey(db, jersey_id, JerseyCreate(**payload))
+            median, worst, writes = measure(db, jersey_id, strategy, build, args.repeat)
+            print(f"{name:<18} {label:<10} {median:>10.1f} {worst:>10.1f} {writes:>11.1f}")
+
+    db.query(JerseyImage).filter(JerseyImage.jersey_id == jersey_id).delete()
+    db.query(Jersey).filter(Jersey.id == jersey_id).delete()
+    db.commit()
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Scripted load test: virtual users run weighted shopping scenarios against the app.
+
+Scenarios (weights set with --mix):
+    browse    bootstrap, filtered/sorted list pages, search and suggestions
+    product   jersey detail, similar jerseys and stock
+    cart      add to cart, view cart
+    checkout  add to cart, place an order (409 when stock ran out is expected)
+    login     log in with a seeded user (a login storm when weighted alone)
+
+Each virtual user loops over randomly picked scenarios until --duration ends; requests
+that start during --warmup are not counted. Every step reports requests, errors, RPS,
+p50/p95/p99 latency, response bytes and database statements per request (from the
+Server-Timing header). The JSON written with --output is the input of
+bench.compare_results, to catch regressions between commits.
+
+Requests go in-process through the ASGI app unless --base-url is given (start that
+server with SERVER_TIMING=true to get statement counts). Either way the scenarios
+pick their jerseys and users from the database in DATABASE_URL, seeded with
+bench.seed_catalog.
+
+Usage (from Backend/):
+    python -m bench.load_test --users 20 --duration 30 --output results/load-$(git rev-parse --short HEAD).json
+    python -m bench.load_test --mix login=1 --users 50 --duration 20    # login storm
+    python -m bench.load_test --mix checkout=1 --base-url http://localhost:8000
+"""
+import os
+os.environ.setdefault("SERVER_TIMING", "true") # Read when the app is imported, for in-process runs
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+import httpx
+from sqlalchemy import select, func
+from database import SessionLocal, engine
+from src.Models.Catalog import League, Team, JerseyType, Jersey, JerseyStock
+from src.Models.User import User
+from src.Utils.Colors import COLOR_BUCKETS
+from src.Utils.Security import create_access_token
+from bench.seed_catalog import BENCH_PASSWORD, PATCHES
+
+DEFAULT_MIX = {"browse": 50, "product": 30, "cart": 10, "checkout": 5, "login": 5}
+ORDER_PAYLOAD = {
+    "shipping_name": "Load Test",
+    "shipping_address": "Rua do Teste 1",
+    "shipping_city": "Lisboa",
+    "shipping_postal_code": "1000-001",
+    "shipping_country": "Portugal",
+    "shipping_phone": "910000000",
+    "payment_method": "MBWAY"
+}
+
+class Fixtures:
+    """Ids and names the scenarios draw from, read once from the database."""
+
+    def __init__(self, sample: int = 5000):
+        db = SessionLocal()
+        try:
+            self.league_ids = list(db.scalars(select(League.id)))
+            self.team_ids = list(db.scalars(select(Team.id)))
+            self.type_ids = list(db.scalars(select(JerseyType.id)))
+            self.prices = dict(db.execute(select(JerseyType.id, JerseyType.current_price)).all())
+            # In-stock (jersey, size) pairs, so add-to-cart and checkout mostly succeed
+            self.stocked = db.execute(
+                select(JerseyStock.jersey_id, JerseyStock.size, Jersey.jersey_type_id)
+                .join(Jersey, Jersey.id == JerseyStock.jersey_id)
+                .where(JerseyStock.quantity > 0).order_by(func.random()).limit(sample)
+            ).all()
+            self.jersey_ids = sorted({row[0] for row in self.stocked}) or list(db.scalars(select(Jersey.id).limit(sample)))
+            self.words = sorted({word for name in db.scalars(select(Team.name).limit(500)) for word in name.split() if len(word) > 3})
+            self.users = [(user_id, email, username) for user_id, email, username in db.execute(
+                select(User.id, User.email, User.username).where(User.username.like("bench-user-%")).limit(sample)
+            )]
+        finally:
+            db.close()
+        if not self.jersey_ids:
+            sys.exit("No jerseys in the database: run python -m bench.seed_catalog first")
+        if not self.users:
+            sys.exit("No bench-user-* users in the database: run python -m bench.seed_catalog first")
+        self.tokens = {email: create_access_token(data={"sub": email}) for _, email, _ in self.users}
+
+class Recorder:
+    """Per-step samples: (latency seconds, status, expected, statements or None, bytes)."""
+
+    def __init__(self):
+        self.samples = {}
+        self.iterations = {}
+        self.counting = False
+
+    def add(self, step: str, seconds: float, status: int, expected: bool, queries, size: int):
+        if self.counting:
+            self.samples.setdefault(step, []).append((seconds, status, expected, queries, size))
+
+def percentile(values, fraction: float) -> float:
+    # Nearest rank on sorted values
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))]
+
+def statements(response: httpx.Response):
+    for part in response.headers.get("server-timing", "").split(","):
+        name, _, rest = part.strip().partition(";")
+        if name == "db-count" and rest.startswith("desc="):
+            return int(rest[5:])
+    return None
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, fixtures: Fixtures, recorder: Recorder, rng: random.Random, accept_encoding: str):
+        self.client = client
+        self.fixtures = fixtures
+        self.recorder = recorder
+        self.rng = rng
+        self.user_id, self.email, self.username = rng.choice(fixtures.users)
+        self.headers = {"Accept-Encoding": accept_encoding}
+        self.auth = {**self.headers, "Authorization": f"Bearer {fixtures.tokens[self.email]}"}
+
+    async def step(self, name: str, method: str, path: str, expected=(200,), **kwargs):
+        kwargs.setdefault("headers", self.headers)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.add(name, time.perf_counter() - started, 0, False, None, 0)
+            return None
+        self.recorder.add(name, time.perf_counter() - started, response.status_code, response.status_code in expected,
+                          statements(response), response.num_bytes_downloaded)
+        return response
+
+    # --- Scenarios ---
+
+    async def browse(self):
+        f, rng = self.fixtures, self.rng
+        await self.step("bootstrap", "GET", "/catalog/bootstrap")
+        params = {"page": rng.choice([1, 1, 1, 2, 3]), "limit": 20}
+        filters = rng.choice(["league", "team", "type", "color", "none"])
+        if filters == "league":
+            params["league_id"] = rng.choice(f.league_ids)
+        elif filters == "team":
+            params["team_id"] = rng.choice(f.team_ids)
+        elif filters == "type":
+            params["jersey_type_id"] = rng.choice(f.type_ids)
+        elif filters == "color":
+            params["main_color"] = rng.choice(list(COLOR_BUCKETS))
+        if rng.random() < 0.5:
+            params["sort_by"] = rng.choice(["newest", "price_asc", "price_desc"])
+        await self.step("list", "GET", "/catalog/jerseys", params=params)
+        if f.words:
+            word = rng.choice(f.words)
+            await self.step("suggest", "GET", "/catalog/suggest", params={"q": word[:rng.randint(2, len(word))]})
+            await self.step("search", "GET", "/catalog/jerseys", params={"search": word, "limit": 20})
+
+    async def product(self):
+        jersey_id = self.rng.choice(self.fixtures.jersey_ids)
+        await self.step("detail", "GET", f"/catalog/jerseys/{jersey_id}")
+        await self.step("similar", "GET", f"/catalog/jerseys/{jersey_id}/similar")
+        await self.step("stock", "GET", f"/catalog/jerseys/{jersey_id}/stock")
+
+    async def add_to_cart(self):
+        jersey_id, size, type_id = self.rng.choice(self.fixtures.stocked) if self.fixtures.stocked else (self.rng.choice(self.fixtures.jersey_ids), "M", None)
+        item = {"jersey_id": jersey_id, "size": size, "quantity": 1, "patches": self.rng.sample(PATCHES, self.rng.choice([0, 0, 1])),
+                "final_price": self.fixtures.prices.get(type_id, 80)}
+        await self.step("add to cart", "POST", "/cart/", json=item, headers=self.auth)
+
+    async def cart(self):
+        await self.add_to_cart()
+        await self.step("cart", "GET", "/cart/", headers=self.auth)
+
+    async def checkout(self):
+        await self.add_to_cart()
+        await self.step("checkout", "POST", "/orders/", expected=(201, 409), json=ORDER_PAYLOAD,
+                        headers={**self.auth, "Idempotency-Key": uuid.uuid4().hex})
+
+    async def login(self):
+        identifier = self.rng.choice([self.email, self.username])
+        await self.step("login", "POST", "/auth/login", json={"identifier": identifier, "password": BENCH_PASSWORD})
+
+SCENARIOS = {"browse": VirtualUser.browse, "product": VirtualUser.product, "cart": VirtualUser.cart,
+             "checkout": VirtualUser.checkout, "login": VirtualUser.login}
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r} (one of {', '.join(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+async def run(args, fixtures: Fixtures) -> Recorder:
+    recorder = Recorder()
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        import main # Imported here so SERVER_TIMING is set first and --base-url runs do not load the app
+        transport, base_url = httpx.ASGITransport(app=main.app, raise_app_exceptions=False), "http://bench" # Server errors count as 500s
+    names, weights = list(args.mix), list(args.mix.values())
+    limits = httpx.Limits(max_connections=args.users)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        deadline = time.perf_counter() + args.warmup + args.duration
+
+        async def virtual_user(index: int):
+            rng = random.Random(args.seed * 100003 + index)
+            user = VirtualUser(client, fixtures, recorder, rng, args.accept_encoding)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                await SCENARIOS[name](user)
+                if recorder.counting:
+                    recorder.iterations[name] = recorder.iterations.get(name, 0) + 1
+                if args.think_ms:
+                    await asyncio.sleep(rng.expovariate(1000 / args.think_ms))
+
+        async def start_counting():
+            await asyncio.sleep(args.warmup)
+            recorder.counting = True
+            recorder.started = time.perf_counter()
+
+        await asyncio.gather(start_counting(), *(virtual_user(i) for i in range(args.users)))
+        recorder.elapsed = time.perf_counter() - recorder.started
+    return recorder
+
+def summarize(recorder: Recorder) -> dict:
+    steps = {}
+    for name, samples in sorted(recorder.samples.items()):
+        latencies = sorted(sample[0] for sample in samples)
+        queries = [sample[3] for sample in samples if sample[3] is not None]
+        statuses = {}
+        for sample in samples:
+            statuses[str(sample[1])] = statuses.get(str(sample[1]), 0) + 1
+        steps[name] = {
+            "requests": len(samples),
+            "errors": sum(1 for sample in samples if not sample[2]),
+            "statuses": statuses,
+            "rps": round(len(samples) / recorder.elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean_queries": round(sum(queries) / len(queries), 2) if queries else None,
+            "mean_bytes": round(sum(sample[4] for sample in samples) / len(samples)),
+        }
+    total = sum(step["requests"] for step in steps.values())
+    return {"steps": steps, "iterations": recorder.iterations, "requests": total,
+            "errors": sum(step["errors"] for step in steps.values()), "rps": round(total / recorder.elapsed, 2) if total else 0.0}
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_report(report: dict):
+    print(f"{'step':<12} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'bytes':>8}")
+    for name, step in report["steps"].items():
+        queries = "-" if step["mean_queries"] is None else f"{step['mean_queries']:.1f}"
+        print(f"{name:<12} {step['requests']:>9} {step['errors']:>7} {step['rps']:>8.1f} {step['p50_ms']:>8.1f} "
+              f"{step['p95_ms']:>8.1f} {step['p99_ms']:>8.1f} {queries:>8} {step['mean_bytes']:>8}")
+    print(f"{'total':<12} {report['requests']:>9} {report['errors']:>7} {report['rps']:>8.1f}")
+    for name, step in report["steps"].items():
+        if step["errors"]:
+            print(f"  {name} statuses: {step['statuses']}")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds run before measuring")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Scenario weights, e.g. browse=5,product=3,login=1")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's scenarios")
+    parser.add_argument("--base-url", help="Test a running server instead of the in-process app")
+    parser.add_argument("--accept-encoding", default="gzip, br", help="Accept-Encoding sent by the virtual users")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as JSON (for bench.compare_results)")
+    args = parser.parse_args()
+
+    fixtures = Fixtures()
+    recorder = asyncio.run(run(args, fixtures))
+    report = {
+        "meta": {"commit": git_commit(), "date": datetime.now().isoformat(timespec="seconds"),
+                 "target": args.base_url or "in-process", "users": args.users, "duration": round(recorder.elapsed, 2),
+                 "warmup": args.warmup, "mix": args.mix, "think_ms": args.think_ms, "accept_encoding": args.accept_encoding,
+                 "database": engine.dialect.name, "jerseys_sampled": len(fixtures.jersey_ids)},
+        **summarize(recorder)
+    }
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,129 @@
+"""
+Peak memory of the large-payload routes, checked against a budget and a baseline.
+
+Seeds (once) a catalog with inline base64 images of --image-kb each and a user with a
+full cart and legacy uploaded images, then requests each route in-process through the
+ASGI app under tracemalloc (see src/Utils/MemoryProfile.py): once to warm caches, then
+--repeat times, keeping the lowest peak. The app is called directly and response bodies
+are only counted, so the peaks are the server's own allocations. Fails (status 1) when a
+route's peak exceeds its budget or, with --baseline (a previous --output), grows more than
+--tolerance. Budgets are sized for the default --image-kb.
+
+Usage (from Backend/, against the database in DATABASE_URL):
+    python -m bench.memory_budget --output results/memory-$(git rev-parse --short HEAD).json
+    python -m bench.memory_budget --baseline results/memory-abc123.json --show-sites
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import sys
+from bench.seed_catalog import seed_route_fixture, budget_requests
+from src.Utils.MemoryProfile import memory_profiler, MB
+import main
+
+# (name, path, budget in MB, needs auth); {jersey_id} is a seeded jersey
+BUDGETS = [
+    ("bootstrap", "/catalog/bootstrap", 1, False),
+    ("jersey list", "/catalog/jerseys?limit=50", 45, False),
+    ("jersey list sparse", "/catalog/jerseys?limit=50&fields=id,season,team_name", 1, False),
+    ("jersey detail", "/catalog/jerseys/{jersey_id}", 1, False), # Served from the document store
+    ("similar jerseys", "/catalog/jerseys/{jersey_id}/similar", 8, False),
+    ("cart", "/cart/", 10, True),
+    ("profile", "/profile/me", 1, True),
+    ("orders", "/orders/", 1, True),
+]
+
+async def get(path: str, headers: dict, on_start=None):
+    """Calls the app like a server would; returns (status, body size) without keeping the body."""
+    route, _, query = path.partition("?")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": route, "raw_path": route.encode(), "root_path": "", "query_string": query.encode(),
+             "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+             "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+    status, size = 0, 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            if on_start is not None:
+                on_start()
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await main.app(scope, receive, send)
+    return status, size
+
+async def measure(args) -> dict:
+    rng = random.Random(1)
+    image = lambda: "data:image/jpeg;base64," + base64.b64encode(rng.randbytes(args.image_kb * 1024)).decode()
+    # Legacy uploaded images must not be loaded by /profile/me
+    jersey_ids, token = seed_route_fixture("bench-mem", image, jerseys=60, cart_items=10, orders=5, uploads=10, similar=True)
+    profiler = memory_profiler # The app's, so sampled requests (MEMORY_PROFILE_RATE) cannot overlap these
+    profiler.frames = args.frames
+    results = {}
+    for name, url, budget, headers in budget_requests(BUDGETS, jersey_ids[0], token, {"Host": "bench", "Accept-Encoding": args.accept_encoding}):
+        status, size = await get(url, headers) # Warm caches and lazy imports
+        assert status == 200, (url, status)
+        best = None
+        for _ in range(args.repeat):
+            with profiler.measure(name, sites=False) as profile:
+                await get(url, headers)
+            if best is None or profile.peak < best.peak:
+                best = profile
+        results[name] = {"peak_mb": round(best.peak / MB, 3), "budget_mb": budget, "response_kb": round(size / 1024, 1)}
+        if args.show_sites:
+            # Read when the response starts, as MemoryProfileMiddleware does
+            with profiler.measure(name, sites=False) as profile:
+                await get(url, headers, on_start=lambda: profiler.capture_sites(profile))
+            results[name]["sites"] = profile.sites
+    return results
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image-kb", type=int, default=64, help="Size of each seeded image (used on the first run only)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--accept-encoding", default="gzip, br")
+    parser.add_argument("--frames", type=int, default=1, help="Traceback depth of the allocation sites")
+    parser.add_argument("--baseline", help="A previous --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative peak growth over the baseline")
+    parser.add_argument("--min-mb", type=float, default=0.25, help="Ignore growth smaller than this")
+    parser.add_argument("--show-sites", action="store_true", help="List the allocation sites holding the most memory when each response starts")
+    parser.add_argument("--output", help="Write the peaks as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(measure(args))
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)["routes"]
+
+    failed = False
+    print(f"{'route':<20} {'peak MB':>8} {'budget':>7} {'baseline':>9} {'sent KB':>8}")
+    for name, result in results.items():
+        notes = []
+        if result["peak_mb"] > result["budget_mb"]:
+            notes.append("OVER BUDGET")
+        before = baseline.get(name, {}).get("peak_mb")
+        if before is not None and result["peak_mb"] > before * (1 + args.tolerance) and result["peak_mb"] - before >= args.min_mb:
+            notes.append(f"REGRESSED {result['peak_mb'] / before - 1:+.0%}" if before else "REGRESSED")
+        failed = failed or bool(notes)
+        before_text = f"{before:9.2f}" if before is not None else f"{'-':>9}"
+        print(f"{name:<20} {result['peak_mb']:>8.2f} {result['budget_mb']:>7} {before_text} {result['response_kb']:>8.0f}   {' '.join(notes)}")
+        for site in result.get("sites", []):
+            print(f"    {site['size_mb']:8.2f} MB  {site['count']:>7}x  {site['site']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as handle:
+            json.dump({"image_kb": args.image_kb, "routes": results}, handle, indent=2)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,60 @@
+"""
+Per-request cost of MetricsMiddleware, and the cost of rendering /metrics.
+
+Calls a minimal ASGI app (one route, one small body) directly, without HTTP, with
+and without the middleware around it, and reports the difference per request; the
+budget is a few microseconds. Then renders the registry with many route templates.
+
+Usage (from Backend/):
+    python -m bench.metrics_overhead --requests 200000 --routes 200
+"""
+import argparse
+import asyncio
+import time
+from src.Utils.Metrics import MetricsMiddleware, MetricsRegistry
+
+class Route:
+    path = "/jerseys/{jersey_id}"
+
+async def app(scope, receive, send):
+    scope["route"] = Route # What the router leaves in the scope
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"id": 1}'})
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message):
+    pass
+
+async def per_request(application, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/catalog/jerseys/1", "root_path": "", "headers": []}
+    started = time.perf_counter()
+    for _ in range(requests):
+        await application(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--routes", type=int, default=200, help="Route templates in the registry for the render timing")
+    parser.add_argument("--rounds", type=int, default=5, help="Best of this many rounds")
+    args = parser.parse_args()
+
+    instrumented = MetricsMiddleware(app, MetricsRegistry(multiproc_dir=None))
+    bare = min(asyncio.run(per_request(app, args.requests)) for _ in range(args.rounds))
+    measured = min(asyncio.run(per_request(instrumented, args.requests)) for _ in range(args.rounds))
+    print(f"bare app          {bare * 1e6:7.2f} us/request")
+    print(f"with metrics      {measured * 1e6:7.2f} us/request")
+    print(f"overhead          {(measured - bare) * 1e6:7.2f} us/request")
+
+    registry = MetricsRegistry(multiproc_dir=None)
+    for i in range(args.routes):
+        for status in (200, 404):
+            registry.observe("GET", f"/route-{i}/{{id}}", status, 0.01 * (i % 7), 1000 * i)
+    started = time.perf_counter()
+    body = registry.render()
+    print(f"render            {(time.perf_counter() - started) * 1000:7.2f} ms for {args.routes} routes ({len(body) / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    main_cli()
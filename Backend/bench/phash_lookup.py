@@ -0,0 +1,61 @@
+"""
+Lookup latency of the perceptual-hash index (MultiIndexHashTable) at catalog scale.
+
+Fills the index with random 64-bit hashes plus clusters of near-duplicates, then
+times radius searches for hashes a few bits away from stored ones. No database needed.
+
+Usage (from Backend/):
+    python -m bench.phash_lookup --size 1000000 --queries 5000 --distance 6
+"""
+import argparse
+import random
+import time
+from src.Utils.PerceptualHash import MultiIndexHashTable
+
+def flip_bits(value: int, count: int) -> int:
+    for bit in random.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--distance", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    index = MultiIndexHashTable()
+    started = time.perf_counter()
+    stored = []
+    for item_id in range(args.size):
+        # Every 10th image is a recompressed copy of an earlier one
+        if stored and item_id % 10 == 0:
+            value = flip_bits(random.choice(stored), random.randint(0, 3))
+        else:
+            value = random.getrandbits(64)
+        index.add(item_id, value)
+        stored.append(value)
+    print(f"indexed {len(index)} hashes in {time.perf_counter() - started:.1f}s")
+
+    timings, hits = [], 0
+    for _ in range(args.queries):
+        query = flip_bits(random.choice(stored), random.randint(0, args.distance))
+        started = time.perf_counter()
+        results = index.search(query, args.distance)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+        hits += bool(results)
+    timings.sort()
+
+    print(f"{args.queries} searches at distance <= {args.distance}: "
+          f"p50={percentile(timings, 0.5):.0f}us p95={percentile(timings, 0.95):.0f}us "
+          f"p99={percentile(timings, 0.99):.0f}us max={timings[-1]:.0f}us")
+    print(f"recall: {hits}/{args.queries} queries found their source image")
+    assert hits == args.queries, "a stored hash within the distance was missed"
+
+if __name__ == "__main__":
+    main()
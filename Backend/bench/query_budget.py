@@ -0,0 +1,69 @@
+"""
+Statements issued per request by the main read routes, checked against a budget.
+
+Seeds a small catalog, a user with a cart and addresses (once, see bench/seed_catalog.py), then requests each
+route in-process through the ASGI app twice: cold (caches empty) and warm. The warm
+count must stay within the route's budget; repeated statement shapes (N+1 candidates)
+are listed. Exits with status 1 if a budget is exceeded, so CI can run it.
+
+Usage (from Backend/, against the database in DATABASE_URL):
+    python -m bench.query_budget --show-shapes
+"""
+import argparse
+import asyncio
+import sys
+import httpx
+from bench.seed_catalog import seed_route_fixture, budget_requests
+from src.Utils.QueryStats import assert_max_queries
+import main
+
+PIXEL = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+
+# (name, path, budget, needs auth); {jersey_id} is a seeded jersey
+BUDGETS = [
+    ("bootstrap", "/catalog/bootstrap", 1, False),
+    ("leagues", "/catalog/leagues", 1, False),
+    ("teams", "/catalog/teams", 1, False),
+    ("types", "/catalog/types", 1, False),
+    ("jersey list", "/catalog/jerseys?limit=20", 3, False),
+    ("jersey list sparse", "/catalog/jerseys?limit=20&fields=id,season,team_name", 2, False),
+    ("jersey detail", "/catalog/jerseys/{jersey_id}", 0, False),
+    ("similar jerseys", "/catalog/jerseys/{jersey_id}/similar", 3, False),
+    ("suggest", "/catalog/suggest?q=bench", 1, False),
+    ("cart", "/cart/", 3, True),
+    ("profile", "/profile/me", 3, True),
+    ("orders", "/orders/", 3, True),
+]
+
+async def measure(show_shapes: bool) -> bool:
+    jersey_ids, token = seed_route_fixture("bench-qb", lambda: PIXEL, jerseys=30, cart_items=8, addresses=2)
+    transport = httpx.ASGITransport(app=main.app)
+    within = True
+    print(f"{'route':<20} {'cold':>5} {'warm':>5} {'budget':>7}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, url, budget, headers in budget_requests(BUDGETS, jersey_ids[0], token):
+            counts = []
+            for _ in range(2): # Cold, then warm
+                try:
+                    with assert_max_queries(budget, name) as stats:
+                        response = await client.get(url, headers=headers)
+                except AssertionError:
+                    pass # Reported below from the warm run
+                assert response.status_code == 200, (url, response.status_code, response.text[:200])
+                counts.append(stats.count)
+            over = counts[-1] > budget
+            within = within and not over
+            print(f"{name:<20} {counts[0]:>5} {counts[1]:>5} {budget:>7}{'   OVER BUDGET' if over else ''}")
+            if show_shapes or over:
+                for shape, count in stats.repeated(2):
+                    print(f"    {count}x {shape[:140]}")
+    return within
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--show-shapes", action="store_true", help="List statements repeated within a request")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(measure(args.show_shapes)) else 1)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,307 @@
+"""
+Synthetic catalog generator for benchmarks and load tests.
+
+Fills the database in DATABASE_URL (SQLite or a local Postgres) with a reproducible
+catalog: leagues, teams, jersey types, jerseys with stock and inline images of a
+configurable size (a pool of real JPEGs, so they compress like real uploads), plus
+users with an address, carts and order history. The same --seed gives the same data.
+Rows are inserted in bulk, bypassing the controllers; derived data (bootstrap, search
+index, documents) is invalidated afterwards and rebuilt lazily by the app, except the
+similar jerseys lists, which are rebuilt here (--skip-similar to leave them empty).
+
+Seeded users are bench-user-<n> / bench-user-<n>@example.com, password BENCH_PASSWORD.
+
+Usage (from Backend/, on a database meant for benchmarks):
+    python -m bench.seed_catalog --reset --leagues 50 --teams 2000 --jerseys 200000 --image-kb 8
+    python -m bench.seed_catalog --reset --jerseys 5000 --users 500   # quick
+"""
+import argparse
+import base64
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+from PIL import Image, ImageDraw, ImageFilter
+from sqlalchemy import insert, select
+from database import engine, Base, SessionLocal
+import main # Registers every model on Base
+from src.Models.Address import Address
+from src.Models.Cart import CartItem
+from src.Models.Catalog import League, Team, JerseyType, Jersey, JerseyImage, JerseyStock
+from src.Models.Order import Order, OrderItem, OrderStatus
+from src.Models.User import User
+from src.Models.UserImage import UserImage
+from src.Controllers.AnalyticsController import apply_orders
+from src.Controllers.CacheVersionController import bump_cache_version, REFERENCE_DATA, JERSEY_DATA
+from src.Controllers.DocumentController import jersey_documents
+from src.Controllers.SimilarityController import rebuild_similar_jerseys
+from src.Utils.Colors import COLOR_BUCKETS
+from src.Utils.Security import get_password_hash, create_access_token
+
+BENCH_PASSWORD = "bench-password"
+BATCH = 2000
+SIZES = ["S", "M", "L", "XL", "XXL"]
+PATCHES = ["Liga", "Champions", "Campeão", "Taça"]
+
+COUNTRIES = ["Portugal", "Espanha", "Inglaterra", "Itália", "Alemanha", "França", "Países Baixos", "Brasil", "Argentina",
+             "Escócia", "Bélgica", "Turquia", "México", "Estados Unidos", "Japão", "Grécia", "Suíça", "Áustria"]
+TIERS = ["Primeira Liga", "Segunda Liga", "Taça", "Liga Feminina", "Liga Jovem", "Liga Regional"]
+PLACES = ["Lisboa", "Porto", "Braga", "Madrid", "Sevilha", "Londres", "Manchester", "Milão", "Roma", "Munique",
+          "Dortmund", "Paris", "Lyon", "Amesterdão", "São Paulo", "Rio", "Buenos Aires", "Glasgow", "Bruxelas",
+          "Istambul", "Atenas", "Viena", "Zurique", "Tóquio", "Cidade do México", "Nova Iorque", "Coimbra", "Faro"]
+PREFIXES = ["FC", "SC", "Sporting", "Atlético", "Real", "União", "Desportivo", "Académica", "Racing", "Inter", "Clube"]
+JERSEY_TYPES = [("Fã", 90, 30), ("Jogador", 120, 45), ("Retro", 100, 40), ("Criança", 70, 25),
+                ("Treino", 60, 22), ("Guarda-Redes", 110, 42), ("Edição Especial", 150, 60), ("Manga Comprida", 105, 38)]
+STATUS_WEIGHTS = {OrderStatus.DELIVERED: 50, OrderStatus.SHIPPED: 10, OrderStatus.PROCESSING: 8, OrderStatus.PAID: 12,
+                  OrderStatus.PENDING: 10, OrderStatus.CANCELLED: 10}
+
+def image_pool(count: int, kb: int, rng: random.Random):
+    """`count` distinct JPEG data URLs of roughly `kb` KB (stripes, shapes and noise, like product photos)."""
+    pool = []
+    for _ in range(count):
+        colors = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(3)]
+        edge = max(32, int((kb * 1024 / 0.35) ** 0.5)) # Rough JPEG bytes per pixel at this quality
+        for _ in range(4): # Converge on the target size
+            image = Image.new("RGB", (edge, edge), colors[0])
+            draw = ImageDraw.Draw(image)
+            for x in range(0, edge, max(4, edge // 12)):
+                draw.rectangle([x, 0, x + edge // 24, edge], fill=colors[1])
+            draw.ellipse([edge // 4, edge // 4, 3 * edge // 4, 3 * edge // 4], outline=colors[2], width=max(2, edge // 40))
+            noise = Image.effect_noise((edge, edge), 40).convert("RGB")
+            image = Image.blend(image, noise, 0.25).filter(ImageFilter.SMOOTH)
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=85)
+            size = output.tell()
+            if abs(size - kb * 1024) < kb * 1024 * 0.15:
+                break
+            edge = max(32, int(edge * (kb * 1024 / size) ** 0.5))
+        pool.append("data:image/jpeg;base64," + base64.b64encode(output.getvalue()).decode())
+    return pool
+
+def insert_returning_ids(db, model, rows):
+    ids = []
+    for start in range(0, len(rows), BATCH):
+        result = db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows[start:start + BATCH])
+        ids += [row[0] for row in result]
+    return ids
+
+def insert_rows(db, model, rows):
+    for start in range(0, len(rows), BATCH):
+        db.execute(insert(model), rows[start:start + BATCH])
+
+def season(rng: random.Random) -> str:
+    year = int(2025 - min(35, rng.expovariate(1 / 6))) # Mostly recent seasons
+    return f"{year}/{(year + 1) % 100:02d}"
+
+def generate(leagues: int, teams: int, jerseys: int, image_kb: int, images_per_jersey: int,
+             users: int, cart_ratio: float, orders_per_user: float, seed: int, similar: bool = True, log=print):
+    rng = random.Random(seed)
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        # --- Reference data ---
+        league_names = [f"{TIERS[i // len(COUNTRIES) % len(TIERS)]} {COUNTRIES[i % len(COUNTRIES)]}" + (f" {i // (len(COUNTRIES) * len(TIERS)) + 1}" if i >= len(COUNTRIES) * len(TIERS) else "")
+                        for i in range(leagues)]
+        league_ids = insert_returning_ids(db, League, [{"name": name} for name in league_names])
+        team_rows, seen = [], set()
+        for i in range(teams):
+            name = f"{rng.choice(PREFIXES)} {rng.choice(PLACES)}"
+            if name in seen:
+                name = f"{name} {i}"
+            seen.add(name)
+            team_rows.append({"name": name, "league_id": league_ids[i % len(league_ids)]})
+        team_ids = insert_returning_ids(db, Team, team_rows)
+        type_ids = insert_returning_ids(db, JerseyType, [
+            {"name": name, "original_price": original, "current_price": round(original * rng.uniform(0.6, 1.0), 2), "description": f"Camisola {name}"}
+            for name, original, _ in JERSEY_TYPES
+        ])
+        type_prices = {type_id: price for type_id, (_, price, _) in zip(type_ids, JERSEY_TYPES)}
+        log(f"{len(league_ids)} leagues, {len(team_ids)} teams, {len(type_ids)} types")
+
+        # --- Jerseys: team popularity is skewed, like real catalogs ---
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(len(team_ids))]
+        colors = list(COLOR_BUCKETS)
+        pool = image_pool(min(32, max(1, jerseys)), image_kb, rng) if image_kb and images_per_jersey else []
+        jersey_ids = []
+        for start in range(0, jerseys, BATCH):
+            count = min(BATCH, jerseys - start)
+            rows = [
+                {"team_id": team_id, "jersey_type_id": rng.choice(type_ids), "season": season(rng), "main_color": rng.choice(colors),
+                 "description": f"Camisola oficial, época {rng.randint(1990, 2025)}", "created_at": datetime(2025, 1, 1) - timedelta(minutes=rng.randrange(500000))}
+                for team_id in rng.choices(team_ids, weights, k=count)
+            ]
+            ids = insert_returning_ids(db, Jersey, rows)
+            jersey_ids += ids
+            if pool:
+                insert_rows(db, JerseyImage, [
+                    {"jersey_id": jersey_id, "position": position, "is_main": position == 0, "image_base64": rng.choice(pool)}
+                    for jersey_id in ids for position in range(images_per_jersey)
+                ])
+            insert_rows(db, JerseyStock, [
+                {"jersey_id": jersey_id, "size": size, "quantity": rng.choice([0, 2, 5, 10, 20, 50])}
+                for jersey_id in ids for size in SIZES
+            ])
+            db.commit()
+            log(f"{len(jersey_ids)}/{jerseys} jerseys ({time.perf_counter() - started:.0f}s)")
+
+        # --- Users, addresses, carts, orders ---
+        try:
+            password_hash = get_password_hash(BENCH_PASSWORD)
+        except ValueError as e: # passlib/bcrypt version mismatch in some environments
+            log(f"Password hashing unavailable ({e}); seeded users cannot log in")
+            password_hash = "!"
+        first_user = db.execute(select(User.id).order_by(User.id.desc()).limit(1)).scalar() or 0
+        user_rows = [
+            {"username": f"bench-user-{first_user + i}", "email": f"bench-user-{first_user + i}@example.com", "hashed_password": password_hash,
+             "role": "user", "first_name": "Bench", "last_name": f"User {i}"}
+            for i in range(users)
+        ]
+        user_ids = insert_returning_ids(db, User, user_rows)
+        insert_rows(db, Address, [
+            {"user_id": user_id, "first_name": "Bench", "last_name": "User", "country": "Portugal", "street_address": f"Rua {rng.randint(1, 500)}",
+             "district": "Lisboa", "city": rng.choice(PLACES), "postal_code": f"{rng.randint(1000, 9999)}-{rng.randint(100, 999)}",
+             "phone_number": f"91{rng.randint(1000000, 9999999)}", "email": row["email"]}
+            for user_id, row in zip(user_ids, user_rows)
+        ])
+
+        def line(jersey_id):
+            patches = sorted(rng.sample(PATCHES, rng.choice([0, 0, 1, 2])))
+            return {"jersey_id": jersey_id, "size": rng.choice(SIZES), "quantity": rng.choice([1, 1, 1, 2]), "patches": patches,
+                    "custom_name": rng.choice([None, None, "BENCH"]), "custom_number": rng.choice([None, None, "7"])}
+
+        jersey_price = dict(db.execute(select(Jersey.id, Jersey.jersey_type_id)).all()) if jersey_ids and users else {}
+        carts = {} # One row per cart line (uq_cart_items_line)
+        for user_id in user_ids:
+            if rng.random() < cart_ratio:
+                for _ in range(rng.randint(1, 4)):
+                    item = line(rng.choice(jersey_ids))
+                    key = (user_id, item["jersey_id"], item["size"], item["custom_name"], item["custom_number"], tuple(item["patches"]))
+                    carts.setdefault(key, {**item, "user_id": user_id, "final_price": type_prices[jersey_price[item["jersey_id"]]]})
+        carts = list(carts.values())
+        insert_rows(db, CartItem, carts)
+
+        order_count = 0
+        statuses, status_weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        for start in range(0, len(user_ids), BATCH // 4):
+            orders, items = [], []
+            for user_id in user_ids[start:start + BATCH // 4]:
+                for _ in range(int(rng.expovariate(1 / orders_per_user)) if orders_per_user else 0):
+                    lines = [line(rng.choice(jersey_ids)) for _ in range(rng.randint(1, 3))]
+                    for item in lines:
+                        item["price"] = type_prices[jersey_price[item["jersey_id"]]]
+                    orders.append({
+                        "user_id": user_id, "shipping_name": "Bench User", "shipping_address": "Rua 1", "shipping_city": "Lisboa",
+                        "shipping_postal_code": "1000-001", "shipping_country": "Portugal", "shipping_phone": "910000000",
+                        "total_amount": round(sum(item["price"] * item["quantity"] for item in lines), 2),
+                        "status": rng.choices(statuses, status_weights)[0].value, "payment_method": rng.choice(["MBWAY", "CARD", "MULTIBANCO"]),
+                        "created_at": datetime(2025, 1, 1) - timedelta(minutes=rng.randrange(525600)), "stock_reserved": False
+                    })
+                    items.append(lines)
+            order_ids = insert_returning_ids(db, Order, orders)
+            insert_rows(db, OrderItem, [{**item, "order_id": order_id} for order_id, lines in zip(order_ids, items) for item in lines])
+            apply_orders(db, order_ids) # Keep the analytics rollups consistent with the orders
+            db.commit()
+            order_count += len(order_ids)
+        log(f"{len(user_ids)} users, {len(carts)} cart items, {order_count} orders")
+
+        if similar:
+            rebuild_similar_jerseys(db)
+            log(f"Similar jerseys rebuilt ({time.perf_counter() - started:.0f}s)")
+
+        # The rest of the derived data is rebuilt by the app on demand
+        bump_cache_version(db, REFERENCE_DATA)
+        bump_cache_version(db, JERSEY_DATA)
+        db.commit()
+        jersey_documents.clear()
+        log(f"Done in {time.perf_counter() - started:.0f}s")
+        return {"leagues": len(league_ids), "teams": len(team_ids), "jerseys": len(jersey_ids), "users": len(user_ids),
+                "cart_items": len(carts), "orders": order_count}
+    finally:
+        db.close()
+
+# --- Fixtures for the per-route budget benches (query_budget, memory_budget) ---
+
+def seed_route_fixture(prefix: str, image: Callable[[], str], jerseys: int, cart_items: int, addresses: int = 1,
+                       orders: int = 0, uploads: int = 0, similar: bool = False):
+    """
+    A small catalog (5 teams, 2 types, `jerseys` jerseys with two images from `image()`) and
+    a user <prefix>@example.com with addresses, a cart, delivered orders and legacy uploaded
+    images, created on the first run and reused afterwards (rows are named after `prefix`).
+    Returns (jersey ids, the user's access token).
+    """
+    email = f"{prefix}@example.com"
+    db = SessionLocal()
+    try:
+        league = db.query(League).filter(League.name == f"{prefix}-league").first()
+        if league is None:
+            league = League(name=f"{prefix}-league")
+            teams = [Team(name=f"{prefix}-team-{i}", league=league) for i in range(5)]
+            types = [JerseyType(name=f"{prefix}-type-{i}", original_price=90, current_price=70) for i in range(2)]
+            batch = [
+                Jersey(team=teams[i % len(teams)], jersey_type=types[i % len(types)], season=f"20{i % 25:02d}/25",
+                       main_color="Azul", description="Camisola de teste")
+                for i in range(jerseys)
+            ]
+            db.add_all([league, *teams, *types, *batch])
+            db.flush()
+            db.add_all(JerseyImage(jersey_id=jersey.id, position=i, is_main=i == 0, image_base64=image()) for jersey in batch for i in range(2))
+            db.commit()
+            if similar:
+                rebuild_similar_jerseys(db)
+        jersey_ids = [row[0] for row in db.query(Jersey.id).join(Team).filter(Team.league_id == league.id).order_by(Jersey.id)]
+
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            user = User(username=prefix, email=email, hashed_password="!", role="user")
+            db.add(user)
+            db.flush()
+            db.add_all(
+                Address(user_id=user.id, first_name="Bench", last_name="User", country="Portugal", street_address="Rua 1",
+                        district="Lisboa", city="Lisboa", postal_code="1000-001", phone_number="910000000", email=email)
+                for _ in range(addresses)
+            )
+            db.add_all(UserImage(user_id=user.id, image_data=image()) for _ in range(uploads))
+            db.add_all(CartItem(user_id=user.id, jersey_id=jid, size="M", quantity=1, patches=[], final_price=70) for jid in jersey_ids[:cart_items])
+            for i in range(orders):
+                order = Order(user_id=user.id, shipping_name="Bench", shipping_address="Rua 1", shipping_city="Lisboa", shipping_postal_code="1000-001",
+                              shipping_country="Portugal", shipping_phone="910000000", total_amount=140, status="DELIVERED", payment_method="MBWAY")
+                db.add(order)
+                db.flush()
+                db.add_all(OrderItem(order_id=order.id, jersey_id=jid, size="M", quantity=1, patches=[], price=70) for jid in jersey_ids[i * 2:i * 2 + 2])
+            db.commit()
+        return jersey_ids, create_access_token({"sub": email})
+    finally:
+        db.close()
+
+def budget_requests(budgets, jersey_id: int, token: str, headers: dict = None):
+    """(name, url, budget, headers) for each (name, path, budget, needs auth) row of a bench's BUDGETS."""
+    for name, path, budget, auth in budgets:
+        request_headers = dict(headers or {})
+        if auth:
+            request_headers["Authorization"] = f"Bearer {token}"
+        yield name, path.format(jersey_id=jersey_id), budget, request_headers
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate every table first (destroys all data)")
+    parser.add_argument("--leagues", type=int, default=50)
+    parser.add_argument("--teams", type=int, default=2000)
+    parser.add_argument("--jerseys", type=int, default=200000)
+    parser.add_argument("--image-kb", type=int, default=8, help="Size of each inline image; 0 for none")
+    parser.add_argument("--images-per-jersey", type=int, default=2)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--cart-ratio", type=float, default=0.3, help="Share of users with items in the cart")
+    parser.add_argument("--orders-per-user", type=float, default=2.0, help="Average orders per user")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-similar", action="store_true", help="Leave the similar jerseys table empty (its rebuild grows quadratically: minutes at 20k jerseys)")
+    args = parser.parse_args()
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+    generate(args.leagues, args.teams, args.jerseys, args.image_kb, args.images_per_jersey,
+             args.users, args.cart_ratio, args.orders_per_user, args.seed, not args.skip_similar)
+
+if __name__ == "__main__":
+    main_cli()
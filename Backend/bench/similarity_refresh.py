@@ -0,0 +1,110 @@
+"""
+Cost of keeping similar_jerseys current on jersey edits, as the catalog grows.
+
+Seeds (per run) --jerseys jerseys spread over teams, leagues, types, seasons and colours,
+builds their lists with rebuild_similar_jerseys, then edits --edits random jerseys (season,
+team or colour) the way update_jersey does: flush, refresh_similar_jerseys, commit. The
+first edit runs after a version bump from "another process", so it pays the full read of
+the catalog and the lists; the others start from the process's SimilarityIndex. Reports
+the time and statements per edit. With --verify, the lists left by the edits must equal
+a full rebuild (status 1 otherwise).
+
+Usage (from Backend/, against the database in DATABASE_URL):
+    python -m bench.similarity_refresh --jerseys 20000 --edits 50 --verify
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from sqlalchemy import event, insert, select
+from database import SessionLocal, engine
+from src.Models.Catalog import League, Team, JerseyType, Jersey, SimilarJersey
+from src.Controllers.CacheVersionController import bump_cache_version, SIMILARITY_DATA
+from src.Controllers.SimilarityController import rebuild_similar_jerseys, refresh_similar_jerseys
+from src.Utils.Colors import canonical_color
+
+COLORS = ["Vermelho", "Azul", "Verde", "Branco", "Preto", "Amarelo", "Laranja", "Roxo"]
+
+def seed(db, jerseys: int, rng: random.Random):
+    run = uuid.uuid4().hex[:8]
+    leagues = [League(name=f"bench-sim-league-{run}-{i}") for i in range(max(1, jerseys // 2000))]
+    teams = [Team(name=f"bench-sim-team-{run}-{i}", league=leagues[i % len(leagues)]) for i in range(max(1, jerseys // 40))]
+    types = [JerseyType(name=f"bench-sim-type-{run}-{i}", original_price=90, current_price=70) for i in range(4)]
+    db.add_all(leagues + teams + types)
+    db.flush()
+    team_ids, type_ids = [team.id for team in teams], [j_type.id for j_type in types]
+    rows = [
+        {"team_id": rng.choice(team_ids), "jersey_type_id": rng.choice(type_ids), "season": f"{rng.randint(1990, 2025)}/00",
+         "main_color": canonical_color(rng.choice(COLORS)), "description": ""}
+        for _ in range(jerseys)
+    ]
+    for start in range(0, len(rows), 5000):
+        db.execute(insert(Jersey), rows[start:start + 5000])
+    db.commit()
+    return team_ids, [row[0] for row in db.execute(select(Jersey.id).where(Jersey.team_id.in_(team_ids)))]
+
+def snapshot(db):
+    return sorted(tuple(row) for row in db.execute(select(SimilarJersey.jersey_id, SimilarJersey.rank, SimilarJersey.similar_id, SimilarJersey.score)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jerseys", type=int, default=20000)
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--verify", action="store_true", help="Compare the lists with a full rebuild afterwards")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    team_ids, jersey_ids = seed(db, args.jerseys, rng)
+    total = db.query(Jersey).count()
+    started = time.perf_counter()
+    rebuild_similar_jerseys(db)
+    print(f"{total} jerseys in the catalog; full rebuild {time.perf_counter() - started:.1f}s")
+
+    statements = 0
+    def count(*_):
+        nonlocal statements
+        statements += 1
+    event.listen(engine, "before_cursor_execute", count)
+
+    bump_cache_version(db, SIMILARITY_DATA) # Another process's write: the first edit reloads
+    db.commit()
+    timings, counts = [], []
+    for _ in range(args.edits):
+        jersey = db.get(Jersey, rng.choice(jersey_ids))
+        change = rng.choice(["season", "team", "color"])
+        if change == "season":
+            jersey.season = f"{rng.randint(1990, 2025)}/00"
+        elif change == "team":
+            jersey.team_id = rng.choice(team_ids)
+        else:
+            jersey.main_color = canonical_color(rng.choice(COLORS))
+        statements = 0
+        started = time.perf_counter()
+        db.flush()
+        refresh_similar_jerseys(db, [jersey.id])
+        db.commit()
+        timings.append(time.perf_counter() - started)
+        counts.append(statements)
+    event.remove(engine, "before_cursor_execute", count)
+
+    warm = sorted(timings[1:]) or timings
+    print(f"first edit (cold index): {timings[0] * 1000:.0f} ms, {counts[0]} statements")
+    print(f"next {len(warm)} edits: p50 {statistics.median(warm) * 1000:.1f} ms, max {warm[-1] * 1000:.1f} ms, "
+          f"{statistics.mean(counts[1:] or counts):.1f} statements on average")
+
+    if args.verify:
+        db.expire_all()
+        incremental = snapshot(db)
+        rebuild_similar_jerseys(db)
+        if incremental != snapshot(db):
+            print("FAIL: incremental lists differ from a full rebuild")
+            sys.exit(1)
+        print("OK: incremental lists match a full rebuild")
+    db.close()
+
+if __name__ == "__main__":
+    main()
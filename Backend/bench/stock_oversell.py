@@ -0,0 +1,90 @@
+"""
+Stress test for stock reservation: N users check out the last units of the same
+jersey/size at the same time through the ASGI app, then we verify nothing was oversold.
+
+Usage (from Backend/, against the database in DATABASE_URL):
+    python -m bench.stock_oversell --checkouts 200 --stock 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+import httpx
+from main import app
+from database import SessionLocal
+from src.Models.User import User
+from src.Models.Cart import CartItem
+from src.Models.Catalog import League, Team, JerseyType, Jersey, JerseyStock
+from src.Models.Order import Order, OrderItem
+from src.Utils.Security import create_access_token
+
+ORDER_PAYLOAD = {
+    "shipping_name": "Stress Test",
+    "shipping_address": "Rua do Teste 1",
+    "shipping_city": "Lisboa",
+    "shipping_postal_code": "1000-001",
+    "shipping_country": "Portugal",
+    "shipping_phone": "910000000",
+    "payment_method": "MBWAY"
+}
+
+def seed(db, checkouts: int, stock: int, size: str):
+    run = uuid.uuid4().hex[:8]
+    league = League(name=f"bench-league-{run}")
+    team = Team(name=f"bench-team-{run}", league=league)
+    j_type = JerseyType(name=f"bench-type-{run}", original_price=90, current_price=80)
+    jersey = Jersey(team=team, jersey_type=j_type, season="2025/26", main_color="Vermelho")
+    db.add_all([league, team, j_type, jersey])
+    db.flush()
+    db.add(JerseyStock(jersey_id=jersey.id, size=size, quantity=stock))
+
+    tokens = []
+    for i in range(checkouts):
+        user = User(username=f"bench-{run}-{i}", email=f"bench-{run}-{i}@example.com", hashed_password="")
+        db.add(user)
+        db.flush()
+        db.add(CartItem(user_id=user.id, jersey_id=jersey.id, size=size, quantity=1, patches=[], final_price=80))
+        tokens.append(create_access_token(data={"sub": user.email}))
+    db.commit()
+    return jersey.id, tokens
+
+async def checkout_all(tokens):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def checkout(token):
+            response = await client.post("/orders/", json=ORDER_PAYLOAD, headers={"Authorization": f"Bearer {token}"})
+            return response.status_code
+        return await asyncio.gather(*(checkout(t) for t in tokens))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkouts", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=50)
+    parser.add_argument("--size", default="M")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    jersey_id, tokens = seed(db, args.checkouts, args.stock, args.size)
+
+    started = time.perf_counter()
+    statuses = asyncio.run(checkout_all(tokens))
+    elapsed = time.perf_counter() - started
+
+    db.expire_all()
+    remaining = db.query(JerseyStock.quantity).filter(JerseyStock.jersey_id == jersey_id, JerseyStock.size == args.size).scalar()
+    sold = db.query(OrderItem).join(Order).filter(OrderItem.jersey_id == jersey_id, Order.stock_reserved == True).count()
+    db.close()
+
+    created = statuses.count(201)
+    rejected = statuses.count(409)
+    errors = len(statuses) - created - rejected
+    print(f"{len(statuses)} checkouts in {elapsed:.2f}s: {created} created, {rejected} out of stock, {errors} errors")
+    print(f"stock: initial={args.stock} sold={sold} remaining={remaining}")
+
+    assert remaining >= 0, "stock went negative"
+    assert sold == created, "orders do not match successful checkouts"
+    assert sold + remaining == args.stock, "stock not conserved (oversold or lost units)"
+    print("OK: no oversell")
+
+if __name__ == "__main__":
+    main()
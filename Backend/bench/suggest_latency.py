@@ -0,0 +1,60 @@
+"""
+Search latency of the typeahead prefix index (PrefixIndex) at catalog scale.
+
+Builds an index of synthetic team, league, type and season labels (with accents and
+multi-word names) and times searches for 1-6 character prefixes typed the way a
+user would, accents dropped. No database needed.
+
+Usage (from Backend/):
+    python -m bench.suggest_latency --teams 20000 --queries 20000
+"""
+import argparse
+import random
+import string
+import time
+from src.Utils.PrefixIndex import PrefixIndex, PrefixEntry
+
+WORDS = ["Real", "Atlético", "Sporting", "União", "Académica", "Olympique", "Borussia", "Internacional",
+         "Clube", "Desportivo", "City", "United", "São", "Paço", "Vitória", "Inter", "Dynamo", "Estrela"]
+
+def random_name():
+    tail = "".join(random.choices(string.ascii_lowercase, k=random.randint(4, 9))).capitalize()
+    return " ".join(random.sample(WORDS, random.randint(0, 2)) + [tail])
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    labels = [random_name() for _ in range(args.teams)]
+    entries = [PrefixEntry(label, ("team", i), random.randint(0, 50)) for i, label in enumerate(labels)]
+    entries += [PrefixEntry(f"Liga {random_name()}", ("league", i), random.randint(0, 500)) for i in range(args.teams // 50)]
+    entries += [PrefixEntry(name, ("type", i), 100) for i, name in enumerate(["Fã", "Jogador", "Retro", "Criança"])]
+    entries += [PrefixEntry(f"{year}/{(year + 1) % 100:02d}", ("season", None), random.randint(0, 300)) for year in range(1970, 2027)]
+
+    started = time.perf_counter()
+    index = PrefixIndex(entries)
+    print(f"indexed {len(index)} labels ({len(index.keys)} keys) in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    timings = []
+    for _ in range(args.queries):
+        word = random.choice(random.choice(labels).split())
+        query = word[:random.randint(1, 6)].lower().replace("é", "e").replace("ã", "a")
+        started = time.perf_counter()
+        index.search(query, args.limit)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+
+    print(f"{args.queries} searches (1-6 characters, limit {args.limit}): "
+          f"p50={percentile(timings, 0.5):.0f}us p95={percentile(timings, 0.95):.0f}us "
+          f"p99={percentile(timings, 0.99):.0f}us max={timings[-1]:.0f}us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from sqlalchemy import func
+from database import SessionLocal, engine, Base
+from src.Models.User import User
+from src.Models.Cart import CartItem # Ensure all mapped classes are known
+from src.Models.UserImage import UserImage, UserAvatar
+from src.Utils.Images import make_avatar_variants, decode_base64_image, AVATAR_CONTENT_TYPE
+from fastapi import HTTPException
+
+def compact_user_images(batch_size: int = 100):
+    """
+    Converts each user's latest legacy upload into their current avatar (unless they
+    already uploaded one through the new endpoint) and deletes all legacy rows.
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    converted, deleted, failed = 0, 0, 0
+    try:
+        while True:
+            latest = db.query(UserImage.user_id, func.max(UserImage.id)).group_by(UserImage.user_id).limit(batch_size).all()
+            if not latest:
+                break
+
+            for user_id, image_id in latest:
+                has_avatar = db.query(UserAvatar.user_id).filter(UserAvatar.user_id == user_id).first()
+                if not has_avatar:
+                    image = db.query(UserImage).filter(UserImage.id == image_id).first()
+                    try:
+                        variants = make_avatar_variants(decode_base64_image(image.image_data or ""))
+                        db.add(UserAvatar(user_id=user_id, version=1, content_type=AVATAR_CONTENT_TYPE, **variants))
+                        converted += 1
+                    except HTTPException:
+                        failed += 1 # Unreadable upload: dropped with the rest of the history
+
+                deleted += db.query(UserImage).filter(UserImage.user_id == user_id).delete()
+            db.commit()
+            db.expunge_all()
+
+        print(f"Compaction done: {converted} avatars created, {failed} unreadable images skipped, {deleted} legacy rows deleted.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    compact_user_images()
@@ -0,0 +1,52 @@
+from fastapi import HTTPException
+from database import SessionLocal
+from src.Models.Catalog import League, Team, JerseyImage
+from src.Controllers.ImageJobController import enqueue_image_variants
+from src.Controllers.BootstrapController import invalidate_reference_data
+from src.Controllers.DocumentController import jersey_documents
+from src.Utils.Images import store_base64_image, image_content_hash
+
+SUBDIRS = {League: "leagues", Team: "teams", JerseyImage: "jerseys"}
+
+def move_inline_images(db, batch_size: int = 100):
+    # Images created from base64 JSON before it was written to disk: store each one as a
+    # file, so it gets an image_path (and derivatives below) and the row loses its base64
+    moved, failed = 0, 0
+    for model, subdir in SUBDIRS.items():
+        ids = [row[0] for row in db.query(model.id).filter(model.image_path.is_(None), model.image_base64.isnot(None)).order_by(model.id)]
+        for start in range(0, len(ids), batch_size):
+            for row in db.query(model).filter(model.id.in_(ids[start:start + batch_size])):
+                try:
+                    row.image_path = store_base64_image(row.image_base64, subdir)
+                except HTTPException:
+                    failed += 1 # Not a decodable image: left inline
+                    continue
+                row.image_base64 = None
+                if model is JerseyImage:
+                    row.content_hash = image_content_hash(image_path=row.image_path)
+                moved += 1
+            db.commit()
+            db.expunge_all()
+    if moved:
+        invalidate_reference_data(db)
+        db.commit()
+        # Detail documents embed the images; they re-render on their next view
+        jersey_documents.clear()
+    print(f"Moved {moved} inline images to files ({failed} could not be decoded).")
+
+def enqueue_existing_images():
+    # Backfill: queue derivatives for every uploaded image (already queued ones are skipped)
+    db = SessionLocal()
+    try:
+        move_inline_images(db)
+        paths = []
+        for model in [League, Team, JerseyImage]:
+            paths += [row[0] for row in db.query(model.image_path).filter(model.image_path.isnot(None))]
+        enqueue_image_variants(db, paths)
+        db.commit()
+        print(f"Queued derivatives for {len(set(paths))} images.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    enqueue_existing_images()
@@ -0,0 +1,27 @@
+import argparse
+from database import SessionLocal
+from src.Controllers.DuplicateImageController import find_duplicate_clusters, IMAGE_DUPLICATE_DISTANCE
+
+def report_duplicate_images(distance: int):
+    db = SessionLocal()
+    try:
+        clusters = find_duplicate_clusters(db, distance)
+    finally:
+        db.close()
+
+    if not clusters:
+        print("No near-duplicate images found.")
+        return
+
+    wasted = sum(len(cluster) - 1 for cluster in clusters)
+    print(f"{len(clusters)} clusters of near-duplicate images ({wasted} redundant copies), pHash distance <= {distance}:")
+    for number, cluster in enumerate(clusters, 1):
+        jerseys = sorted({image["jersey_id"] for image in cluster})
+        print(f"\n#{number}: {len(cluster)} images across {len(jerseys)} jerseys")
+        for image in cluster:
+            print(f"  image {image['image_id']:>8}  jersey {image['jersey_id']:>6}  {image['team_name'] or '-'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report clusters of near-duplicate jersey images across the catalog.")
+    parser.add_argument("--distance", type=int, default=IMAGE_DUPLICATE_DISTANCE, help="Max differing pHash bits")
+    report_duplicate_images(parser.parse_args().distance)
@@ -1,16 +1,138 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+from database import engine, Base, SessionLocal
 from src.Models.User import User
+from src.Models.Address import Address
 from src.Models.Catalog import Jersey # Ensure Jersey table is known
 from src.Models.Cart import CartItem
 from src.Models.Order import Order, OrderItem
+from src.Models.Idempotency import IdempotencyKey
+from src.Models.UserImage import UserImage, UserAvatar
+from src.Models.Analytics import OrdersDaily, SalesDaily, PatchDaily
+from src.Models.ImageJob import ImageVariantJob
+from src.Models.CacheVersion import CacheVersion
 
 Base.metadata.create_all(bind=engine)
 
-from src.Routes import AuthRoutes, UserRoutes, ProfileRoutes, CatalogRoutes, CartRoutes, OrderRoutes
+from src.Routes import AuthRoutes, UserRoutes, ProfileRoutes, CatalogRoutes, CartRoutes, OrderRoutes, AdminRoutes
 
-app = FastAPI(title="FanatikJersey API")
+from src.Controllers.InventoryController import release_expired_reservations
+from src.Utils.OrderPartitions import ensure_order_partitions
+from src.Utils.Idempotency import purge_idempotency_keys
+from src.Controllers.ImageJobController import claim_image_jobs, finish_image_job
+from src.Utils.Uploads import MEDIA_DIR, MEDIA_URL
+from src.Utils.ImageVariants import MediaFiles, generate_variants
+from src.Utils.Compression import CompressionMiddleware
+from src.Utils.QueryStats import QueryStatsMiddleware
+from src.Utils.MemoryProfile import MemoryProfileMiddleware
+from src.Utils.Metrics import MetricsMiddleware, metrics_registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+RESERVATION_SWEEP_SECONDS = int(os.getenv("RESERVATION_SWEEP_SECONDS", 60))
+
+def sweep_reservations():
+    db = SessionLocal()
+    try:
+        released = release_expired_reservations(db)
+        if released:
+            print(f"Released stock for {released} expired orders")
+    finally:
+        db.close()
+
+def sweep_idempotency_keys():
+    db = SessionLocal()
+    try:
+        purged = purge_idempotency_keys(db)
+        if purged:
+            print(f"Purged {purged} expired idempotency keys")
+    finally:
+        db.close()
+
+def sweep_partitions():
+    # Postgres: upcoming month partitions of `orders`, so new orders never land in orders_default
+    with engine.connect() as connection:
+        created = ensure_order_partitions(connection)
+        connection.commit()
+        if created:
+            print(f"Created order partitions: {', '.join(created)}")
+
+async def reservation_sweeper():
+    # Safe to run in every worker: each release is guarded by conditional UPDATEs,
+    # partition creation by an advisory lock, and purges only delete expired rows
+    while True:
+        await asyncio.sleep(RESERVATION_SWEEP_SECONDS)
+        for sweep in (sweep_reservations, sweep_idempotency_keys, sweep_partitions):
+            try:
+                await asyncio.to_thread(sweep)
+            except Exception as e:
+                print(f"{sweep.__name__} failed: {e}")
+
+# Image derivatives are rendered in worker processes; 0 disables the background pipeline
+# and leaves every variant to be rendered lazily on its first request
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+IMAGE_POLL_SECONDS = float(os.getenv("IMAGE_POLL_SECONDS", 2))
+
+def claim_jobs():
+    db = SessionLocal()
+    try:
+        return claim_image_jobs(db, IMAGE_WORKERS * 2)
+    finally:
+        db.close()
+
+def finish_jobs(results):
+    db = SessionLocal()
+    try:
+        for job_id, result in results:
+            finish_image_job(db, job_id, f"{type(result).__name__}: {result}" if isinstance(result, BaseException) else None)
+    finally:
+        db.close()
+
+async def image_worker(pool: ProcessPoolExecutor):
+    # Jobs are claimed with a guarded UPDATE, so every API worker can run one of these
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            jobs = await asyncio.to_thread(claim_jobs)
+            if not jobs:
+                await asyncio.sleep(IMAGE_POLL_SECONDS)
+                continue
+            results = await asyncio.gather(
+                *[loop.run_in_executor(pool, generate_variants, source_path) for _, source_path in jobs],
+                return_exceptions=True
+            )
+            await asyncio.to_thread(finish_jobs, [(job_id, result) for (job_id, _), result in zip(jobs, results)])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Image worker failed: {e}")
+            await asyncio.sleep(IMAGE_POLL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await asyncio.to_thread(sweep_partitions)
+    except Exception as e:
+        print(f"sweep_partitions failed: {e}")
+    sweeper = asyncio.create_task(reservation_sweeper())
+
+    pool, renderer = None, None
+    if IMAGE_WORKERS > 0:
+        # spawn: never fork a process that already runs an event loop and threads
+        pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        renderer = asyncio.create_task(image_worker(pool))
+
+    yield
+
+    sweeper.cancel()
+    if renderer:
+        renderer.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title="FanatikJersey API", lifespan=lifespan)
 
 # Configure CORS
 origins = [
@@ -29,20 +151,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip (brotli/zstd when installed) for JSON and text; per-route counters at /metrics and /admin/compression
+app.add_middleware(CompressionMiddleware)
+
+# Per-request statement counts and timings: N+1 and slow-query logs, Server-Timing when SERVER_TIMING=true
+app.add_middleware(QueryStatsMiddleware)
+
+# tracemalloc peak and top allocation sites of a sample of requests (MEMORY_PROFILE_RATE); see /admin/memory
+app.add_middleware(MemoryProfileMiddleware)
+
+# Outermost, so request metrics include the middlewares above; scraped at /metrics
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(AuthRoutes.router, prefix="/auth", tags=["auth"])
 app.include_router(UserRoutes.router, prefix="/users", tags=["users"])
 app.include_router(ProfileRoutes.router, prefix="/profile", tags=["profile"])
 app.include_router(CatalogRoutes.router, prefix="/catalog", tags=["catalog"])
 app.include_router(CartRoutes.router, prefix="/cart", tags=["cart"])
 app.include_router(OrderRoutes.router, prefix="/orders", tags=["orders"])
+app.include_router(AdminRoutes.router, prefix="/admin", tags=["admin"])
+
+# Uploaded images (see src/Utils/Uploads.py) and their derivatives are served straight from disk
+os.makedirs(MEDIA_DIR, exist_ok=True)
+app.mount(MEDIA_URL, MediaFiles(directory=MEDIA_DIR), name="media")
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to FanatikJersey API"}
 
+# Prometheus scrape target (all workers of the host when METRICS_MULTIPROC_DIR is set)
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
-    import os
     
     port = int(os.getenv("PORT", 9000))
     uvicorn.run("main:app", host="127.0.0.1", port=port, reload=True)
@@ -0,0 +1,22 @@
+from database import engine
+from sqlalchemy import text
+
+def migrate_patches_to_json():
+    with engine.connect() as connection:
+        try:
+            for table in ("cart_items", "order_items"):
+                # Empty or missing values become an empty list so every row holds valid JSON
+                connection.execute(text(f"UPDATE {table} SET patches = '[]' WHERE patches IS NULL OR patches = ''"))
+
+                if connection.dialect.name == "postgresql":
+                    connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN patches TYPE JSONB USING patches::jsonb"))
+                    connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_patches ON {table} USING gin (patches)"))
+                # SQLite keeps JSON as text: the existing json.dumps values are already in the stored format
+
+            connection.commit()
+            print("Successfully migrated patches to JSON columns.")
+        except Exception as e:
+            print(f"Error migrating patches: {e}")
+
+if __name__ == "__main__":
+    migrate_patches_to_json()
@@ -0,0 +1,38 @@
+from database import SessionLocal
+from src.Models.Catalog import Jersey, JerseyColor
+from src.Controllers.ColorController import update_jersey_colors
+from src.Utils.Colors import canonical_color
+from src.Controllers.DocumentController import jersey_documents
+
+def normalize_jersey_colors(batch_size: int = 100):
+    db = SessionLocal()
+    try:
+        # 1. Map hand-typed main_color values onto the canonical buckets
+        changed, unknown = 0, set()
+        for jersey in db.query(Jersey).all():
+            color = canonical_color(jersey.main_color or "")
+            if color is None:
+                unknown.add(jersey.main_color)
+            elif color != jersey.main_color:
+                jersey.main_color = color
+                changed += 1
+        db.commit()
+        print(f"Normalized main_color on {changed} jerseys.")
+        if unknown:
+            print(f"Unrecognised values left as they are: {sorted(str(v) for v in unknown)}")
+
+        # 2. Extract dominant colours for every jersey (unchanged main images are skipped)
+        jersey_ids = [row[0] for row in db.query(Jersey.id).order_by(Jersey.id)]
+        for start in range(0, len(jersey_ids), batch_size):
+            for jersey_id in jersey_ids[start:start + batch_size]:
+                update_jersey_colors(db, jersey_id)
+            db.commit()
+            db.expunge_all()
+        # Detail documents embed main_color; they re-render on their next view
+        jersey_documents.clear()
+        print(f"Dominant colours stored for {db.query(JerseyColor.jersey_id).distinct().count()} of {len(jersey_ids)} jerseys.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    normalize_jersey_colors()
@@ -0,0 +1,23 @@
+from database import engine
+from src.Utils.OrderPartitions import is_postgres, is_partitioned, partition_orders_table, ensure_order_partitions
+
+def partition_orders():
+    with engine.connect() as connection:
+        if not is_postgres(connection):
+            print("Partitioning is only available on Postgres; nothing to do.")
+            return
+        try:
+            if is_partitioned(connection):
+                ensure_order_partitions(connection)
+                connection.commit()
+                print("'orders' is already partitioned; upcoming month partitions ensured.")
+                return
+            partition_orders_table(connection)
+            connection.commit()
+            print("Successfully partitioned 'orders' by month.")
+        except Exception as e:
+            connection.rollback()
+            print(f"Error partitioning orders: {e}")
+
+if __name__ == "__main__":
+    partition_orders()
@@ -0,0 +1,18 @@
+from database import SessionLocal, engine, Base
+from src.Models.User import User # Ensure all mapped classes are known
+from src.Models.Cart import CartItem
+from src.Models.Analytics import OrdersDaily, SalesDaily, PatchDaily
+from src.Controllers.AnalyticsController import rebuild_rollups
+
+def rebuild_analytics():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("Rebuilding analytics rollups from orders...")
+        processed = rebuild_rollups(db)
+        print(f"Rollups rebuilt from {processed} orders.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_analytics()
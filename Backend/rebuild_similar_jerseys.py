@@ -0,0 +1,21 @@
+from database import SessionLocal, engine, Base
+from src.Models.Catalog import SimilarJersey
+from src.Controllers.SimilarityController import rebuild_similar_jerseys, SIMILAR_JERSEYS_K
+import time
+
+def rebuild():
+    # Creates similar_jerseys if needed, then recomputes every jersey's top-K.
+    # The app keeps the table current incrementally; run this after bulk imports,
+    # scripts that edit jerseys directly, or a change to the similarity weights. It also
+    # bumps the similarity cache version, so running apps reload their SimilarityIndex.
+    Base.metadata.create_all(bind=engine, tables=[SimilarJersey.__table__])
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count = rebuild_similar_jerseys(db)
+        print(f"Top-{SIMILAR_JERSEYS_K} similar jerseys rebuilt for {count} jerseys in {time.perf_counter() - started:.1f}s.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,15 @@
+from database import SessionLocal
+from src.Models.User import User # Ensure all mapped classes are known
+from src.Models.Cart import CartItem
+from src.Controllers.InventoryController import release_expired_reservations
+
+def release_expired_orders():
+    db = SessionLocal()
+    try:
+        released = release_expired_reservations(db)
+        print(f"Released stock for {released} PENDING orders past their payment deadline.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    release_expired_orders()
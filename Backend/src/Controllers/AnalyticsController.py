@@ -0,0 +1,262 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func, true, tuple_, cast
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import JSONB
+from src.Models.Analytics import OrdersDaily, SalesDaily, PatchDaily
+from src.Models.Catalog import League, Team, Jersey, JerseyType
+from src.Models.Order import Order, OrderItem, OrderStatus, ArchivedOrder
+from src.Utils.OrderArchive import read_archived_orders
+from datetime import date, datetime, timedelta
+from collections import defaultdict
+from typing import List
+
+# Rollups count every order that is not CANCELLED: orders are added when created
+# and subtracted again when they are cancelled.
+
+def _upsert(db: Session, model, rows: List[dict], key_columns: List[str], sum_columns: List[str]):
+    """Adds rows into a rollup table, summing into existing rows with the same key."""
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={c: model.__table__.c[c] + stmt.excluded[c] for c in sum_columns}
+        )
+        db.execute(stmt)
+        return
+
+    # Generic fallback: read-modify-write per row
+    for row in rows:
+        existing = db.query(model).filter_by(**{c: row[c] for c in key_columns}).first()
+        if existing:
+            for c in sum_columns:
+                setattr(existing, c, getattr(existing, c) + row[c])
+        else:
+            db.add(model(**row))
+    db.flush()
+
+def _patch_units_query(db: Session, order_ids: List[int]):
+    """Units per (order created_at, patch) for the given orders, unnesting the JSON patch arrays in SQL."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Cast so the query also works while patches is still a TEXT column (before migrate_patches_to_json)
+        patch = func.jsonb_array_elements_text(cast(OrderItem.patches, JSONB)).table_valued("value")
+    else:
+        patch = func.json_each(OrderItem.patches).table_valued("value")
+
+    return (
+        select(Order.created_at, patch.c.value, func.sum(OrderItem.quantity))
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(patch, true())
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(Order.created_at, patch.c.value)
+    )
+
+class _Rollups:
+    """Rollup rows being accumulated for one upsert per table."""
+
+    def __init__(self):
+        self.daily = defaultdict(lambda: {"orders": 0, "units": 0, "revenue": 0.0})
+        self.sales = defaultdict(lambda: {"units": 0, "revenue": 0.0})
+        self.patches = defaultdict(int)
+
+    def add_order(self, created_at: datetime, total_amount: float, sign: int):
+        bucket = self.daily[created_at.date()]
+        bucket["orders"] += sign
+        bucket["revenue"] += sign * (total_amount or 0)
+
+    def add_item(self, created_at: datetime, team_id, league_id, jersey_type_id, size, quantity: int, price: float, sign: int):
+        day = created_at.date()
+        self.daily[day]["units"] += sign * quantity
+
+        bucket = self.sales[(day, team_id or 0, league_id or 0, jersey_type_id or 0, size or "")]
+        bucket["units"] += sign * quantity
+        bucket["revenue"] += sign * quantity * (price or 0)
+
+    def add_patch(self, created_at: datetime, patch: str, quantity: int, sign: int):
+        self.patches[(created_at.date(), patch)] += sign * quantity
+
+    def write(self, db: Session):
+        # Rows go in primary-key order so concurrent writers lock them in the same order
+        # (no deadlocks), and the per-day OrdersDaily row, which every order of the day
+        # touches, is locked last so it is held for the shortest time before commit
+        _upsert(
+            db, SalesDaily,
+            [
+                {"day": day, "team_id": team_id, "league_id": league_id, "jersey_type_id": jersey_type_id, "size": size, **v}
+                for (day, team_id, league_id, jersey_type_id, size), v in sorted(self.sales.items())
+            ],
+            ["day", "team_id", "league_id", "jersey_type_id", "size"],
+            ["units", "revenue"]
+        )
+        _upsert(
+            db, PatchDaily,
+            [{"day": day, "patch": patch, "units": units} for (day, patch), units in sorted(self.patches.items())],
+            ["day", "patch"],
+            ["units"]
+        )
+        _upsert(db, OrdersDaily, [{"day": day, **v} for day, v in sorted(self.daily.items())], ["day"], ["orders", "units", "revenue"])
+
+def apply_orders(db: Session, order_ids: List[int], sign: int = 1):
+    """
+    Adds (sign=1) or removes (sign=-1) the given orders from the rollups inside the
+    caller's transaction. Costs three reads (orders, items, unnested patches) plus one upsert per table.
+    """
+    if not order_ids:
+        return
+
+    orders = db.execute(
+        select(Order.created_at, Order.total_amount).where(Order.id.in_(order_ids))
+    ).all()
+    items = db.execute(
+        select(
+            Order.created_at,
+            Team.id,
+            Team.league_id,
+            Jersey.jersey_type_id,
+            OrderItem.size,
+            OrderItem.quantity,
+            OrderItem.price
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .outerjoin(Jersey, Jersey.id == OrderItem.jersey_id)
+        .outerjoin(Team, Team.id == Jersey.team_id)
+        .where(OrderItem.order_id.in_(order_ids))
+    ).all()
+
+    rollups = _Rollups()
+    for created_at, total_amount in orders:
+        rollups.add_order(created_at, total_amount, sign)
+    for created_at, team_id, league_id, jersey_type_id, size, quantity, price in items:
+        rollups.add_item(created_at, team_id, league_id, jersey_type_id, size, quantity, price, sign)
+
+    # Patches are unnested and summed by the database
+    for created_at, patch, quantity in db.execute(_patch_units_query(db, order_ids)).all():
+        rollups.add_patch(created_at, patch, quantity, sign)
+
+    rollups.write(db)
+
+def _apply_archived_orders(db: Session, documents: List[dict]):
+    # Archived documents carry the items and patches; dimensions are looked up from the
+    # current jerseys, as apply_orders does for hot orders
+    jersey_ids = {item["jersey_id"] for document in documents for item in document["items"]}
+    dims = {}
+    if jersey_ids:
+        dims = {row[0]: row[1:] for row in db.execute(
+            select(Jersey.id, Team.id, Team.league_id, Jersey.jersey_type_id)
+            .outerjoin(Team, Team.id == Jersey.team_id)
+            .where(Jersey.id.in_(jersey_ids))
+        )}
+
+    rollups = _Rollups()
+    for document in documents:
+        created_at = document["created_at"]
+        rollups.add_order(created_at, document["total_amount"], 1)
+        for item in document["items"]:
+            team_id, league_id, jersey_type_id = dims.get(item["jersey_id"], (None, None, None))
+            rollups.add_item(created_at, team_id, league_id, jersey_type_id, item["size"], item["quantity"], item["price"], 1)
+            for patch in item["patches"] or []:
+                rollups.add_patch(created_at, patch, item["quantity"], 1)
+    rollups.write(db)
+
+def rebuild_rollups(db: Session, batch_size: int = 1000):
+    """
+    Recomputes all rollups (backfill / repair) from the orders tables and the order
+    archive, so days whose orders were archived keep their totals.
+    """
+    db.execute(delete(OrdersDaily))
+    db.execute(delete(SalesDaily))
+    db.execute(delete(PatchDaily))
+
+    last_id = 0
+    processed = 0
+    while True:
+        order_ids = [row[0] for row in db.execute(
+            select(Order.id)
+            .where(Order.id > last_id, Order.status != OrderStatus.CANCELLED)
+            .order_by(Order.id)
+            .limit(batch_size)
+        ).all()]
+        if not order_ids:
+            break
+        apply_orders(db, order_ids)
+        last_id = order_ids[-1]
+        processed += len(order_ids)
+
+    # Archived orders, oldest first; the index is read up front per batch so the session stays free for the upserts
+    last_key = (datetime.min, 0)
+    while True:
+        entries = db.execute(
+            select(ArchivedOrder)
+            .where(ArchivedOrder.status != OrderStatus.CANCELLED.value, tuple_(ArchivedOrder.created_at, ArchivedOrder.id) > last_key)
+            .order_by(ArchivedOrder.created_at, ArchivedOrder.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not entries:
+            break
+        _apply_archived_orders(db, list(read_archived_orders(entries)))
+        last_key = (entries[-1].created_at, entries[-1].id)
+        processed += len(entries)
+
+    db.commit()
+    return processed
+
+def _breakdown(db: Session, column, name_model, date_from: date, date_to: date):
+    rows = db.execute(
+        select(column, func.sum(SalesDaily.units), func.sum(SalesDaily.revenue))
+        .where(SalesDaily.day >= date_from, SalesDaily.day <= date_to)
+        .group_by(column)
+        .having(func.sum(SalesDaily.units) != 0) # Fully cancelled combinations
+        .order_by(func.sum(SalesDaily.revenue).desc())
+    ).all()
+
+    names = {}
+    ids = [r[0] for r in rows if r[0]] if name_model is not None else []
+    if ids:
+        # Reference tables are small; names are looked up instead of being copied into the rollups
+        names = dict(db.execute(select(name_model.id, name_model.name).where(name_model.id.in_(ids))).all())
+
+    if name_model is None:
+        # Dimension is already a label (e.g. size)
+        return [{"id": None, "name": key, "units": units or 0, "revenue": round(revenue or 0, 2)} for key, units, revenue in rows]
+
+    return [
+        {"id": key or None, "name": names.get(key), "units": units or 0, "revenue": round(revenue or 0, 2)}
+        for key, units, revenue in rows
+    ]
+
+def get_analytics(db: Session, date_from: date = None, date_to: date = None, top_patches: int = 10):
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=29)
+
+    daily = db.query(OrdersDaily).filter(
+        OrdersDaily.day >= date_from,
+        OrdersDaily.day <= date_to
+    ).order_by(OrdersDaily.day).all()
+
+    patches = db.execute(
+        select(PatchDaily.patch, func.sum(PatchDaily.units))
+        .where(PatchDaily.day >= date_from, PatchDaily.day <= date_to)
+        .group_by(PatchDaily.patch)
+        .having(func.sum(PatchDaily.units) != 0)
+        .order_by(func.sum(PatchDaily.units).desc())
+        .limit(top_patches)
+    ).all()
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "orders": sum(d.orders for d in daily),
+        "units": sum(d.units for d in daily),
+        "revenue": round(sum(d.revenue for d in daily), 2),
+        "daily": daily,
+        "by_team": _breakdown(db, SalesDaily.team_id, Team, date_from, date_to),
+        "by_league": _breakdown(db, SalesDaily.league_id, League, date_from, date_to),
+        "by_jersey_type": _breakdown(db, SalesDaily.jersey_type_id, JerseyType, date_from, date_to),
+        "by_size": _breakdown(db, SalesDaily.size, None, date_from, date_to),
+        "top_patches": [{"patch": patch, "units": units} for patch, units in patches]
+    }
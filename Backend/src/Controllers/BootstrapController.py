@@ -0,0 +1,44 @@
+from sqlalchemy.orm import Session
+from src.Models.Catalog import League, Team, JerseyType
+from src.Schemas.CatalogSchema import CatalogBootstrapResponse, LeagueResponse, LeagueWithTeamsResponse, TeamResponse, JerseyTypeResponse
+from src.Controllers.CacheVersionController import bump_cache_version, get_cache_version, REFERENCE_DATA
+from src.Utils.Precompressed import PrecompressedBody
+from collections import defaultdict
+import threading
+
+_bootstrap = None
+_bootstrap_version = None
+_lock = threading.Lock()
+
+def invalidate_reference_data(db: Session):
+    # Called by every write to leagues, teams or jersey types (see CatalogController)
+    bump_cache_version(db, REFERENCE_DATA)
+
+def build_catalog_bootstrap(db: Session) -> PrecompressedBody:
+    teams_by_league = defaultdict(list)
+    for team in db.query(Team).order_by(Team.name):
+        teams_by_league[team.league_id].append(TeamResponse.model_validate(team))
+
+    document = CatalogBootstrapResponse(
+        leagues=[
+            LeagueWithTeamsResponse(**LeagueResponse.model_validate(league).model_dump(), teams=teams_by_league[league.id])
+            for league in db.query(League).order_by(League.name)
+        ],
+        types=[JerseyTypeResponse.model_validate(jersey_type) for jersey_type in db.query(JerseyType).order_by(JerseyType.name)]
+    )
+    return PrecompressedBody(document.model_dump_json().encode())
+
+def get_catalog_bootstrap(db: Session) -> PrecompressedBody:
+    """
+    This process's serialized (and lazily compressed) bootstrap document. Each call costs one
+    primary-key read of the reference-data version; the document is only rebuilt
+    after a write anywhere bumped it.
+    """
+    global _bootstrap, _bootstrap_version
+    # Read the version before the data, so a concurrent write can only make the copy newer
+    version = get_cache_version(db, REFERENCE_DATA)
+    with _lock:
+        if _bootstrap is None or version != _bootstrap_version:
+            _bootstrap = build_catalog_bootstrap(db)
+            _bootstrap_version = version
+        return _bootstrap
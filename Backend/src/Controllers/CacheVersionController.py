@@ -0,0 +1,50 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from src.Models.CacheVersion import CacheVersion
+from datetime import datetime
+from typing import List, Tuple
+
+# Names of the versioned catalog documents
+REFERENCE_DATA = "catalog-reference" # Leagues, teams and jersey types
+JERSEY_DATA = "catalog-jerseys" # Jersey team, season and type assignments
+SIMILARITY_DATA = "catalog-similarity" # Similarity features and similar_jerseys lists
+COLOR_DATA = "catalog-colors" # Extracted dominant colours (jersey_colors)
+
+# Bumps made by this process, so its own caches can notice them without polling
+_local_bumps = 0
+
+def local_bump_count() -> int:
+    return _local_bumps
+
+def bump_cache_version(db: Session, name: str):
+    """Invalidates every process's copy of `name` once the caller's transaction commits."""
+    global _local_bumps
+    _local_bumps += 1
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(
+            dialect_insert(CacheVersion)
+            .values(name=name, version=1, updated_at=now)
+            .on_conflict_do_update(index_elements=["name"], set_={"version": CacheVersion.version + 1, "updated_at": now})
+        )
+        return
+
+    # Generic fallback
+    result = db.execute(
+        update(CacheVersion).where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(name=name, version=1, updated_at=now))
+        db.flush()
+
+def get_cache_version(db: Session, name: str) -> int:
+    return db.execute(select(CacheVersion.version).where(CacheVersion.name == name)).scalar() or 0
+
+def get_cache_versions(db: Session, names: List[str]) -> Tuple[int, ...]:
+    found = dict(db.execute(select(CacheVersion.name, CacheVersion.version).where(CacheVersion.name.in_(names))).all())
+    return tuple(found.get(name, 0) for name in names)
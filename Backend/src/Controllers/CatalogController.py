@@ -1,12 +1,30 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import select, update, delete, func, or_, case
 from src.Models.Catalog import League, Team, Jersey, JerseyImage
-from src.Schemas.CatalogSchema import LeagueCreate, TeamCreate, JerseyCreate
-from fastapi import HTTPException, status
+from src.Schemas.CatalogSchema import LeagueCreate, TeamCreate, JerseyCreate, JerseyImageBase
+from src.Utils.Images import image_content_hash, store_base64_image
+from src.Utils.Colors import canonical_color
+from src.Utils.Uploads import save_image_upload, media_path_from_url, MAX_FILES_PER_REQUEST
+from src.Controllers.ImageJobController import enqueue_image_variants
+from src.Controllers.ColorController import normalize_main_color, update_jersey_colors, find_jerseys_by_color, DEFAULT_COLOR_TOLERANCE, MAX_COLOR_MATCHES
+from src.Controllers.DuplicateImageController import compute_image_hashes, flag_near_duplicates, sync_duplicate_index, forget_images
+from src.Controllers.SimilarityController import refresh_similar_jerseys, lists_including
+from src.Controllers.BootstrapController import invalidate_reference_data
+from src.Controllers.SuggestController import invalidate_jersey_data
+from src.Controllers.DocumentController import publish_jersey_documents, drop_jersey_documents
+from fastapi import HTTPException, UploadFile, status
+from typing import List
+from collections import defaultdict
 
 # --- Leagues ---
 def create_league(db: Session, league: LeagueCreate):
-    db_league = League(name=league.name, image_base64=league.image_base64)
+    db_league = League(name=league.name)
+    if league.image_base64:
+        # Inline images are stored like uploads, so they get a file and derivatives too
+        db_league.image_path = store_base64_image(league.image_base64, "leagues")
+        enqueue_image_variants(db, [db_league.image_path])
     db.add(db_league)
+    invalidate_reference_data(db)
     db.commit()
     db.refresh(db_league)
     return db_league
@@ -18,10 +36,28 @@ def delete_league(db: Session, league_id: int):
     league = db.query(League).filter(League.id == league_id).first()
     if not league:
         raise HTTPException(status_code=404, detail="Liga não encontrada")
+    jersey_ids = [jersey.id for team in league.teams for jersey in team.jerseys]
+    including = lists_including(db, jersey_ids)
     db.delete(league)
+    db.flush()
+    refresh_similar_jerseys(db, jersey_ids, including)
+    invalidate_reference_data(db)
     db.commit()
+    drop_jersey_documents(jersey_ids)
     return {"message": "Liga eliminada com sucesso"}
 
+def set_league_image(db: Session, league_id: int, file: UploadFile):
+    league = db.query(League).filter(League.id == league_id).first()
+    if not league:
+        raise HTTPException(status_code=404, detail="Liga não encontrada")
+    league.image_path = save_image_upload(file, "leagues")
+    league.image_base64 = None
+    enqueue_image_variants(db, [league.image_path])
+    invalidate_reference_data(db)
+    db.commit()
+    db.refresh(league)
+    return league
+
 # --- Teams ---
 def create_team(db: Session, team: TeamCreate):
     # Verify league exists
@@ -29,8 +65,12 @@ def create_team(db: Session, team: TeamCreate):
     if not league:
         raise HTTPException(status_code=404, detail="Liga não encontrada")
 
-    db_team = Team(name=team.name, league_id=team.league_id, image_base64=team.image_base64)
+    db_team = Team(name=team.name, league_id=team.league_id)
+    if team.image_base64:
+        db_team.image_path = store_base64_image(team.image_base64, "teams")
+        enqueue_image_variants(db, [db_team.image_path])
     db.add(db_team)
+    invalidate_reference_data(db)
     db.commit()
     db.refresh(db_team)
     return db_team
@@ -45,10 +85,28 @@ def delete_team(db: Session, team_id: int):
     team = db.query(Team).filter(Team.id == team_id).first()
     if not team:
         raise HTTPException(status_code=404, detail="Clube não encontrado")
+    jersey_ids = [jersey.id for jersey in team.jerseys]
+    including = lists_including(db, jersey_ids)
     db.delete(team)
+    db.flush()
+    refresh_similar_jerseys(db, jersey_ids, including)
+    invalidate_reference_data(db)
     db.commit()
+    drop_jersey_documents(jersey_ids)
     return {"message": "Clube eliminado com sucesso"}
 
+def set_team_image(db: Session, team_id: int, file: UploadFile):
+    team = db.query(Team).filter(Team.id == team_id).first()
+    if not team:
+        raise HTTPException(status_code=404, detail="Clube não encontrado")
+    team.image_path = save_image_upload(file, "teams")
+    team.image_base64 = None
+    enqueue_image_variants(db, [team.image_path])
+    invalidate_reference_data(db)
+    db.commit()
+    db.refresh(team)
+    return team
+
 # --- Jersey Types ---
 from src.Models.Catalog import JerseyType
 from src.Schemas.CatalogSchema import JerseyTypeCreate
@@ -61,6 +119,7 @@ def create_jersey_type(db: Session, type_data: JerseyTypeCreate):
         description=type_data.description
     )
     db.add(db_type)
+    invalidate_reference_data(db)
     db.commit()
     db.refresh(db_type)
     return db_type
@@ -78,7 +137,10 @@ def update_jersey_type(db: Session, type_id: int, type_data: JerseyTypeCreate):
     db_type.current_price = type_data.current_price
     db_type.description = type_data.description
     
+    invalidate_reference_data(db)
     db.commit()
+    # Every detail document embeds its type; they re-render on their next view
+    drop_jersey_documents(jersey.id for jersey in db_type.jerseys)
     db.refresh(db_type)
     return db_type
 
@@ -90,8 +152,13 @@ def delete_jersey_type(db: Session, type_id: int):
     db_type = db.query(JerseyType).filter(JerseyType.id == type_id).first()
     if not db_type:
         raise HTTPException(status_code=404, detail="Tipo não encontrado")
+    jersey_ids = [jersey.id for jersey in db_type.jerseys]
     db.delete(db_type)
+    db.flush() # Its jerseys lose their type, which changes their recommendations
+    refresh_similar_jerseys(db, jersey_ids)
+    invalidate_reference_data(db)
     db.commit()
+    drop_jersey_documents(jersey_ids)
     return {"message": "Tipo eliminado"}
 
 # --- Jerseys ---
@@ -111,7 +178,7 @@ def create_jersey(db: Session, jersey: JerseyCreate):
         team_id=jersey.team_id,
         season=jersey.season,
         jersey_type_id=jersey.jersey_type_id,
-        main_color=jersey.main_color,
+        main_color=normalize_main_color(jersey.main_color),
         description=jersey.description
     )
     db.add(db_jersey)
@@ -119,29 +186,37 @@ def create_jersey(db: Session, jersey: JerseyCreate):
     db.refresh(db_jersey)
     
     # Add Images
-    for img in jersey.images:
-        db_image = JerseyImage(
-            jersey_id=db_jersey.id,
-            image_base64=img.image_base64,
-            is_main=img.is_main
-        )
-        db.add(db_image)
+    warnings = reconcile_jersey_images(db, db_jersey.id, jersey.images)
+    update_jersey_colors(db, db_jersey.id)
+    refresh_similar_jerseys(db, [db_jersey.id])
+    invalidate_jersey_data(db)
     
     db.commit()
+    publish_jersey_documents(db, [db_jersey.id])
     db.refresh(db_jersey)
+    db_jersey.duplicate_warnings = warnings
     return db_jersey
 
 from sqlalchemy.orm import Session, joinedload
 
 # ... (imports)
 
-def get_jerseys(db: Session, team_id: int = None, league_id: int = None, jersey_type_id: int = None, main_color: str = None, page: int = 1, limit: int = 20, sort_by: str = None, search: str = None):
-    # Eager load relations
-    query = db.query(Jersey).options(
-        joinedload(Jersey.team),
-        joinedload(Jersey.jersey_type),
-        joinedload(Jersey.images)
-    )
+def get_jerseys(db: Session, team_id: int = None, league_id: int = None, jersey_type_id: int = None, main_color: str = None, page: int = 1, limit: int = 20, sort_by: str = None, search: str = None, color: str = None, tolerance: float = DEFAULT_COLOR_TOLERANCE, include: dict = None):
+    # Eager load the relations that will be serialized (`include` is a sparse fieldset, None = all).
+    # Images come in a second query, so big image rows are not repeated by the join.
+    options = []
+    if include is None or "team_name" in include:
+        options.append(joinedload(Jersey.team))
+    if include is None or "jersey_type" in include:
+        options.append(joinedload(Jersey.jersey_type))
+    if include is None or "images" in include:
+        images = selectinload(Jersey.images)
+        # Legacy inline images are large; skip them unless they were asked for
+        image_fields = include.get("images") if include else None
+        if isinstance(image_fields, dict) and "image_base64" not in image_fields:
+            images = images.defer(JerseyImage.image_base64)
+        options.append(images)
+    query = db.query(Jersey)
     
     # --- Filtering Logic ---
     
@@ -180,7 +255,21 @@ def get_jerseys(db: Session, team_id: int = None, league_id: int = None, jersey_
         query = query.filter(Jersey.jersey_type_id == jersey_type_id)
 
     if main_color:
-        query = query.filter(Jersey.main_color == main_color)
+        # "vermelho", "red" and "Vermelho" all mean the same bucket
+        query = query.filter(Jersey.main_color == (canonical_color(main_color) or main_color))
+
+    # Visual colour similarity from the in-memory colour index (closest first). The other
+    # filters apply before the MAX_COLOR_MATCHES cap, so a filtered search is not limited
+    # to the catalog-wide closest matches
+    color_matches = None
+    if color:
+        ranked = [jersey_id for jersey_id, _ in find_jerseys_by_color(db, color, tolerance)]
+        if team_id or league_id or jersey_type_id or main_color or search:
+            allowed = {row[0] for row in query.with_entities(Jersey.id)}
+            ranked = [jersey_id for jersey_id in ranked if jersey_id in allowed]
+        color_matches = ranked[:MAX_COLOR_MATCHES]
+        query = query.filter(Jersey.id.in_(color_matches))
+    query = query.options(*options)
     
     # --- Sorting ---
     if sort_by == 'newest':
@@ -193,6 +282,8 @@ def get_jerseys(db: Session, team_id: int = None, league_id: int = None, jersey_
         if not search:
             query = query.join(Jersey.jersey_type)
         query = query.order_by(JerseyType.current_price.desc())
+    elif color_matches:
+        query = query.order_by(case({jersey_id: rank for rank, jersey_id in enumerate(color_matches)}, value=Jersey.id))
     
     # --- Pagination ---
     # Total count (before limit/offset)
@@ -216,7 +307,12 @@ def get_jerseys(db: Session, team_id: int = None, league_id: int = None, jersey_
     }
 
 def get_jersey_by_id(db: Session, jersey_id: int):
-    jersey = db.query(Jersey).filter(Jersey.id == jersey_id).first()
+    jersey = (
+        db.query(Jersey)
+        .options(joinedload(Jersey.team), joinedload(Jersey.jersey_type), selectinload(Jersey.images))
+        .filter(Jersey.id == jersey_id)
+        .first()
+    )
     if not jersey:
         raise HTTPException(status_code=404, detail="Camisola não encontrada")
     return jersey
@@ -225,6 +321,7 @@ def update_jersey(db: Session, jersey_id: int, jersey_data: JerseyCreate):
     db_jersey = db.query(Jersey).filter(Jersey.id == jersey_id).first()
     if not db_jersey:
         raise HTTPException(status_code=404, detail="Camisola não encontrada")
+    before = (db_jersey.team_id, db_jersey.season, db_jersey.jersey_type_id, db_jersey.main_color)
     
     # Update Fields
     if jersey_data.team_id:
@@ -234,38 +331,186 @@ def update_jersey(db: Session, jersey_id: int, jersey_data: JerseyCreate):
     if jersey_data.jersey_type_id:
         db_jersey.jersey_type_id = jersey_data.jersey_type_id
     if jersey_data.main_color:
-        db_jersey.main_color = jersey_data.main_color
+        db_jersey.main_color = normalize_main_color(jersey_data.main_color)
     
     # Description is optional, so we update it directly (it can be None)
     db_jersey.description = jersey_data.description
 
     # Handle Images:
-    # If images are provided, we replace/update. 
-    # For simplicity in this iteration: If images list is provided and not empty, 
-    # we wipe existing and add new. If empty/not provided, we keep existing?
-    # The frontend usually sends the full state.
-    # Let's assume full replacement of images if provided
+    # The frontend sends the full state; an empty/missing list keeps the current images.
+    # Only images that actually changed are written (see reconcile_jersey_images).
+    if before[:3] != (db_jersey.team_id, db_jersey.season, db_jersey.jersey_type_id):
+        invalidate_jersey_data(db)
+
+    warnings = []
+    colors_changed = False
     if jersey_data.images:
-        # Delete old
-        db.query(JerseyImage).filter(JerseyImage.jersey_id == jersey_id).delete()
-        
-        # Add new
-        for img in jersey_data.images:
-            db_image = JerseyImage(
-                jersey_id=db_jersey.id,
-                image_base64=img.image_base64,
-                is_main=img.is_main
-            )
-            db.add(db_image)
+        warnings = reconcile_jersey_images(db, db_jersey.id, jersey_data.images)
+        colors_changed = update_jersey_colors(db, db_jersey.id)
+
+    # Recommendations only depend on these fields and the colours, so a description edit skips the refresh
+    if colors_changed or before != (db_jersey.team_id, db_jersey.season, db_jersey.jersey_type_id, db_jersey.main_color):
+        db.flush()
+        refresh_similar_jerseys(db, [db_jersey.id])
 
     db.commit()
+    publish_jersey_documents(db, [db_jersey.id])
     db.refresh(db_jersey)
+    db_jersey.duplicate_warnings = warnings
     return db_jersey
 
+def _backfill_content_hashes(db: Session, image_ids: List[int]):
+    # Rows created before content hashes existed: load their data once and store the hash
+    rows = db.execute(
+        select(JerseyImage.id, JerseyImage.image_base64, JerseyImage.image_path).where(JerseyImage.id.in_(image_ids))
+    ).all()
+    hashes = {row.id: image_content_hash(row.image_base64, row.image_path) for row in rows}
+    db.execute(update(JerseyImage), [{"id": image_id, "content_hash": h} for image_id, h in hashes.items()])
+    return hashes
+
+def reconcile_jersey_images(db: Session, jersey_id: int, images: List[JerseyImageBase]):
+    """
+    Brings a jersey's images to the given ordered list, writing only what changed.
+
+    Current rows are matched to incoming images by content hash (preferring the same
+    position) without loading any image data. Kept rows only get their position
+    adjusted, a main-image flip is one UPDATE over the old and new main rows, and
+    only new images are inserted and dropped ones deleted. Runs in the caller's transaction.
+    Returns near-duplicate warnings for the inserted images.
+    """
+    # 1. Incoming images in order, identified by content. Inline (base64) images are written
+    # to MEDIA_DIR like uploads, so every new row has a file and derivatives (a legacy inline
+    # row sent back as base64 no longer matches and is replaced; enqueue_image_variants.py
+    # converts those in bulk)
+    desired = []
+    for img in images:
+        path = media_path_from_url(img.image_url) if img.image_url else store_base64_image(img.image_base64, "jerseys")
+        desired.append((image_content_hash(image_path=path), img, path))
+
+    # 2. Current rows, without image data (the duplicate index is synced before any write)
+    sync_duplicate_index(db)
+    existing = db.execute(
+        select(JerseyImage.id, JerseyImage.content_hash, JerseyImage.position, JerseyImage.is_main)
+        .where(JerseyImage.jersey_id == jersey_id)
+        .order_by(JerseyImage.position, JerseyImage.id)
+    ).all()
+    legacy = [row.id for row in existing if row.content_hash is None]
+    hashes = _backfill_content_hashes(db, legacy) if legacy else {}
+
+    by_hash = defaultdict(list)
+    for row in existing:
+        by_hash[row.content_hash or hashes[row.id]].append(row)
+
+    # 3. Match by hash, preferring a row already at the same position
+    matched = {}
+    for position, (content_hash, _, _) in enumerate(desired):
+        candidates = by_hash.get(content_hash)
+        if candidates:
+            row = next((r for r in candidates if r.position == position), candidates[0])
+            candidates.remove(row)
+            matched[position] = row
+    removed = [row.id for rows in by_hash.values() for row in rows]
+
+    # 4. Write only the differences
+    if removed:
+        db.execute(delete(JerseyImage).where(JerseyImage.id.in_(removed)))
+        forget_images(removed)
+
+    moved = [{"id": row.id, "position": position} for position, row in matched.items() if row.position != position]
+    if moved:
+        db.execute(update(JerseyImage), moved)
+
+    if any(row.is_main != desired[position][1].is_main for position, row in matched.items()):
+        main_ids = [row.id for position, row in matched.items() if desired[position][1].is_main]
+        db.execute(
+            update(JerseyImage)
+            .where(JerseyImage.jersey_id == jersey_id, or_(JerseyImage.is_main == True, JerseyImage.id.in_(main_ids)))
+            .values(is_main=JerseyImage.id.in_(main_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+    added = []
+    for position, (content_hash, img, path) in enumerate(desired):
+        if position in matched:
+            continue
+        image_phash, image_dhash = compute_image_hashes(image_path=path)
+        added.append(JerseyImage(
+            jersey_id=jersey_id,
+            image_path=path,
+            content_hash=content_hash,
+            phash=image_phash,
+            dhash=image_dhash,
+            position=position,
+            is_main=img.is_main
+        ))
+    db.add_all(added)
+    db.flush()
+    enqueue_image_variants(db, [image.image_path for image in added])
+
+    # 5. New images that look like ones already in the catalog are reported, not rejected
+    return flag_near_duplicates(db, added)
+
+def add_jersey_images(db: Session, jersey_id: int, files: List[UploadFile], main_index: int = None):
+    """
+    Appends multipart-uploaded images to a jersey. Files are streamed to MEDIA_DIR
+    and only their paths are stored; `main_index` marks one of the new files as main.
+    """
+    jersey = db.query(Jersey).filter(Jersey.id == jersey_id).first()
+    if not jersey:
+        raise HTTPException(status_code=404, detail="Camisola não encontrada")
+    if not files:
+        raise HTTPException(status_code=400, detail="Nenhuma imagem enviada")
+    if len(files) > MAX_FILES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_FILES_PER_REQUEST} imagens por pedido")
+    if main_index is not None and not 0 <= main_index < len(files):
+        raise HTTPException(status_code=400, detail="Índice da imagem principal inválido")
+
+    # 1. Store every file before touching the database
+    paths = [save_image_upload(file, "jerseys") for file in files]
+    sync_duplicate_index(db)
+
+    # 2. Only one main image per jersey
+    if main_index is not None:
+        db.query(JerseyImage).filter(JerseyImage.jersey_id == jersey_id).update({"is_main": False})
+
+    # New images go after the existing ones
+    start = db.query(func.coalesce(func.max(JerseyImage.position) + 1, 0)).filter(JerseyImage.jersey_id == jersey_id).scalar()
+    added = []
+    for index, path in enumerate(paths):
+        image_phash, image_dhash = compute_image_hashes(image_path=path)
+        added.append(JerseyImage(
+            jersey_id=jersey_id,
+            image_path=path,
+            content_hash=image_content_hash(image_path=path),
+            phash=image_phash,
+            dhash=image_dhash,
+            position=start + index,
+            is_main=index == main_index
+        ))
+    db.add_all(added)
+    db.flush()
+
+    # 3. Derivatives (card/detail/zoom) are rendered by the background image workers
+    enqueue_image_variants(db, paths)
+    warnings = flag_near_duplicates(db, added)
+    if update_jersey_colors(db, jersey_id):
+        refresh_similar_jerseys(db, [jersey_id])
+
+    db.commit()
+    publish_jersey_documents(db, [jersey_id])
+    db.refresh(jersey)
+    jersey.duplicate_warnings = warnings
+    return jersey
+
 def delete_jersey(db: Session, jersey_id: int):
     jersey = db.query(Jersey).filter(Jersey.id == jersey_id).first()
     if not jersey:
         raise HTTPException(status_code=404, detail="Camisola não encontrada")
+    including = lists_including(db, [jersey_id])
     db.delete(jersey)
+    db.flush()
+    refresh_similar_jerseys(db, [jersey_id], including)
+    invalidate_jersey_data(db)
     db.commit()
+    drop_jersey_documents([jersey_id])
     return {"message": "Camisola eliminada com sucesso"}
@@ -0,0 +1,140 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from src.Models.Catalog import JerseyImage, JerseyColor
+from src.Utils.Colors import dominant_colors, canonical_color, parse_hex, rgb_to_lab, COLOR_BUCKETS
+from src.Utils.Images import load_catalog_image
+from src.Controllers.CacheVersionController import bump_cache_version, get_cache_version, local_bump_count, COLOR_DATA
+from fastapi import HTTPException
+from datetime import datetime
+from typing import List, Optional, Tuple
+import numpy as np
+import os
+import threading
+import time
+
+# A jersey matches a colour query when one of its dominant colours covering at least
+# COLOR_MIN_WEIGHT of the kit is within `tolerance` (CIE76 delta E; ~2 is barely visible,
+# ~20 is "same colour family").
+COLOR_MIN_WEIGHT = 0.15
+DEFAULT_COLOR_TOLERANCE = 20.0
+MAX_COLOR_MATCHES = 1000
+
+# The colour index is per process; other processes' colour changes are seen once the
+# COLOR_DATA version is re-read, at most every COLOR_CHECK_SECONDS
+COLOR_CHECK_SECONDS = float(os.getenv("COLOR_CHECK_SECONDS", 5))
+
+def normalize_main_color(value: str) -> str:
+    """Canonical bucket for a hand-entered main_color; 400 if it is not a known colour."""
+    color = canonical_color(value)
+    if not color:
+        raise HTTPException(status_code=400, detail=f"Cor desconhecida: {value}. Use uma de: {', '.join(COLOR_BUCKETS)}")
+    return color
+
+def update_jersey_colors(db: Session, jersey_id: int):
+    """
+    Re-extracts a jersey's dominant colours inside the caller's transaction when its
+    main image changed (compared by content hash), so ordinary edits cost one small SELECT.
+    Returns whether the stored colours changed (and then bumps COLOR_DATA).
+    """
+    main = db.execute(
+        select(JerseyImage.id, JerseyImage.content_hash)
+        .where(JerseyImage.jersey_id == jersey_id)
+        .order_by(JerseyImage.is_main.desc(), JerseyImage.position, JerseyImage.id)
+        .limit(1)
+    ).first()
+    current = db.execute(select(JerseyColor.source_hash).where(JerseyColor.jersey_id == jersey_id).limit(1)).scalar()
+    if main is not None and main.content_hash is not None and current == main.content_hash:
+        return False
+
+    db.execute(delete(JerseyColor).where(JerseyColor.jersey_id == jersey_id))
+    image = None
+    if main is not None:
+        source = db.execute(select(JerseyImage.image_base64, JerseyImage.image_path).where(JerseyImage.id == main.id)).first()
+        image = load_catalog_image(source.image_base64, source.image_path)
+    if image is None:
+        if current is None:
+            return False
+        bump_cache_version(db, COLOR_DATA)
+        return True
+
+    now = datetime.utcnow()
+    for rank, color in enumerate(dominant_colors(image)):
+        db.add(JerseyColor(
+            jersey_id=jersey_id,
+            rank=rank,
+            hex=color["hex"],
+            l=color["lab"][0],
+            a=color["lab"][1],
+            b=color["lab"][2],
+            weight=color["weight"],
+            source_hash=main.content_hash,
+            updated_at=now
+        ))
+    db.flush()
+    bump_cache_version(db, COLOR_DATA)
+    return True
+
+class ColorIndex:
+    """
+    All dominant colours as float32 CIELAB columns sorted by lightness. A query slices
+    the rows whose L is within the tolerance (binary search) and computes distances
+    for that slice in one vectorised pass.
+    """
+
+    def __init__(self, rows):
+        rows = sorted((row for row in rows if row.weight >= COLOR_MIN_WEIGHT), key=lambda row: row.l)
+        self.jersey_ids = np.array([row.jersey_id for row in rows], dtype=np.int64)
+        self.l = np.array([row.l for row in rows], dtype=np.float32)
+        self.a = np.array([row.a for row in rows], dtype=np.float32)
+        self.b = np.array([row.b for row in rows], dtype=np.float32)
+
+    def query(self, lab, tolerance: float, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(jersey_id, distance) of jerseys with a colour within `tolerance`, closest first (the first `limit`)."""
+        l, a, b = (float(v) for v in lab)
+        lo, hi = np.searchsorted(self.l, [l - tolerance, l + tolerance])
+        dl, da, db = self.l[lo:hi] - l, self.a[lo:hi] - a, self.b[lo:hi] - b
+        squared = dl * dl + da * da + db * db
+
+        within = np.flatnonzero(squared <= tolerance * tolerance)
+        order = within[np.argsort(squared[within], kind="stable")]
+        # First occurrence of each jersey in distance order is its closest colour
+        ids = self.jersey_ids[lo:hi][order]
+        _, first = np.unique(ids, return_index=True)
+        best = np.sort(first)[:limit]
+        return [(int(ids[i]), float(np.sqrt(squared[order[i]]))) for i in best]
+
+_color_index = None
+_color_index_version = None
+_checked_at = 0.0
+_checked_bumps = -1
+_lock = threading.Lock()
+
+def get_color_index(db: Session) -> ColorIndex:
+    """This process's index, rebuilt when the COLOR_DATA version moved (see update_jersey_colors)."""
+    global _color_index, _color_index_version, _checked_at, _checked_bumps
+    with _lock:
+        stale = time.monotonic() - _checked_at > COLOR_CHECK_SECONDS or local_bump_count() != _checked_bumps
+        if _color_index is None or stale:
+            bumps = local_bump_count()
+            version = get_cache_version(db, COLOR_DATA)
+            if _color_index is None or version != _color_index_version:
+                rows = db.execute(select(JerseyColor.jersey_id, JerseyColor.l, JerseyColor.a, JerseyColor.b, JerseyColor.weight)).all()
+                _color_index = ColorIndex(rows)
+                _color_index_version = version
+            _checked_at = time.monotonic()
+            _checked_bumps = bumps
+        return _color_index
+
+def find_jerseys_by_color(db: Session, color: str, tolerance: float = DEFAULT_COLOR_TOLERANCE, limit: Optional[int] = None):
+    """
+    (jersey_id, distance) of every matching jersey, closest first (the first `limit`). `color`
+    is a hex code (#c8102e) or a colour name (mapped to its bucket's reference shade). Callers
+    filter before capping the matches (see get_jerseys).
+    """
+    rgb = parse_hex(color) if color.strip().startswith("#") else None
+    if rgb is None:
+        bucket = canonical_color(color)
+        if not bucket:
+            raise HTTPException(status_code=400, detail="Cor inválida")
+        rgb = parse_hex(COLOR_BUCKETS[bucket][0])
+    return get_color_index(db).query(rgb_to_lab(np.array(rgb)), tolerance, limit)
@@ -0,0 +1,56 @@
+from sqlalchemy.orm import Session, joinedload, selectinload
+from src.Models.Catalog import Jersey
+from src.Schemas.CatalogSchema import JerseyResponse
+from src.Utils.DocumentStore import DocumentStore
+from src.Utils.Precompressed import PrecompressedBody
+from typing import Iterable, Optional
+import os
+
+# Jersey detail documents, rendered once per change and served as stored (see PrecompressedBody)
+DOCUMENT_STORE_PATH = os.getenv("DOCUMENT_STORE_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "cache", "documents.sqlite3")))
+DOCUMENT_CACHE_ENTRIES = int(os.getenv("DOCUMENT_CACHE_ENTRIES", 5000)) # Per process
+DOCUMENT_SYNC_SECONDS = float(os.getenv("DOCUMENT_SYNC_SECONDS", 1))
+
+jersey_documents = DocumentStore(DOCUMENT_STORE_PATH, DOCUMENT_CACHE_ENTRIES, DOCUMENT_SYNC_SECONDS, load=PrecompressedBody)
+
+def _key(jersey_id: int) -> str:
+    return f"jersey:{jersey_id}"
+
+def render_jersey_document(jersey: Jersey) -> bytes:
+    # duplicate_warnings only belong to the admin's write response, never to the stored document
+    document = JerseyResponse.model_validate(jersey).model_copy(update={"duplicate_warnings": []})
+    return document.model_dump_json().encode()
+
+def _load_jerseys(db: Session, jersey_ids: Iterable[int]):
+    return (
+        db.query(Jersey)
+        .options(joinedload(Jersey.team), joinedload(Jersey.jersey_type), selectinload(Jersey.images))
+        .filter(Jersey.id.in_(list(jersey_ids)))
+        .all()
+    )
+
+def publish_jersey_documents(db: Session, jersey_ids: Iterable[int]):
+    """Re-renders the given jerseys' documents. Call after commit, so only committed state is published."""
+    jersey_ids = set(jersey_ids)
+    found = _load_jerseys(db, jersey_ids) if jersey_ids else []
+    for jersey in found:
+        jersey_documents.put(_key(jersey.id), render_jersey_document(jersey))
+    drop_jersey_documents(jersey_ids - {jersey.id for jersey in found})
+
+def drop_jersey_documents(jersey_ids: Iterable[int]):
+    """Forgets documents of deleted jerseys, or ones to re-render lazily on their next view."""
+    jersey_documents.delete(_key(jersey_id) for jersey_id in jersey_ids)
+
+def get_jersey_document(db: Session, jersey_id: int) -> Optional[PrecompressedBody]:
+    """The stored detail document; rendered from the database (once) on a miss. None if the jersey does not exist."""
+    document = jersey_documents.get(_key(jersey_id))
+    if document is not None:
+        return document
+    seq = jersey_documents.current_seq()
+    found = _load_jerseys(db, [jersey_id])
+    if not found:
+        return None
+    body = render_jersey_document(found[0])
+    # Skipped if an update published a newer document while this one was rendered
+    jersey_documents.put(_key(jersey_id), body, unless_written_after=seq)
+    return jersey_documents.get(_key(jersey_id)) or PrecompressedBody(body)
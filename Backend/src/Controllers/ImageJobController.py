@@ -0,0 +1,98 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import update, select, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from src.Models.ImageJob import ImageVariantJob, ImageJobStatus
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+import os
+
+# Failed jobs are retried with exponential backoff (base * 2^(attempt-1)) until they give up
+IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", 5))
+IMAGE_JOB_RETRY_SECONDS = int(os.getenv("IMAGE_JOB_RETRY_SECONDS", 30))
+
+# A RUNNING job whose worker died is claimable again after this long
+IMAGE_JOB_CLAIM_MINUTES = 10
+
+def enqueue_image_variants(db: Session, source_paths: Iterable[str]):
+    """
+    Queues derivative generation for uploaded images inside the caller's transaction.
+    Sources are content-addressed, so a path that was already queued is skipped.
+    """
+    paths = sorted({path for path in source_paths if path})
+    if not paths:
+        return
+
+    now = datetime.utcnow()
+    rows = [
+        {"source_path": path, "status": ImageJobStatus.PENDING.value, "attempts": 0, "run_after": now, "created_at": now, "updated_at": now}
+        for path in paths
+    ]
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(dialect_insert(ImageVariantJob).values(rows).on_conflict_do_nothing(index_elements=["source_path"]))
+        return
+
+    # Generic fallback
+    existing = set(db.scalars(select(ImageVariantJob.source_path).where(ImageVariantJob.source_path.in_(paths))))
+    for row in rows:
+        if row["source_path"] not in existing:
+            db.add(ImageVariantJob(**row))
+    db.flush()
+
+def claim_image_jobs(db: Session, limit: int) -> List[Tuple[int, str]]:
+    """
+    Claims up to `limit` due jobs for this worker and returns (id, source_path) pairs.
+
+    The claim is one guarded UPDATE, so workers in other processes polling at the same
+    time can never take the same job. A claim expires after IMAGE_JOB_CLAIM_MINUTES.
+    """
+    now = datetime.utcnow()
+    due = or_(
+        ImageVariantJob.status == ImageJobStatus.PENDING.value,
+        ImageVariantJob.status == ImageJobStatus.RUNNING.value
+    )
+    candidates = db.scalars(
+        select(ImageVariantJob.id)
+        .where(due, ImageVariantJob.run_after <= now)
+        .order_by(ImageVariantJob.run_after, ImageVariantJob.id)
+        .limit(limit)
+    ).all()
+    if not candidates:
+        return []
+
+    claimed = db.execute(
+        update(ImageVariantJob)
+        .where(ImageVariantJob.id.in_(candidates), due, ImageVariantJob.run_after <= now)
+        .values(
+            status=ImageJobStatus.RUNNING.value,
+            attempts=ImageVariantJob.attempts + 1,
+            run_after=now + timedelta(minutes=IMAGE_JOB_CLAIM_MINUTES),
+            updated_at=now
+        )
+        .returning(ImageVariantJob.id, ImageVariantJob.source_path)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return [(row.id, row.source_path) for row in claimed]
+
+def finish_image_job(db: Session, job_id: int, error: Optional[str] = None):
+    """Marks a claimed job DONE, or schedules its retry (FAILED once attempts run out)."""
+    job = db.query(ImageVariantJob).filter(ImageVariantJob.id == job_id).first()
+    if not job:
+        return
+
+    now = datetime.utcnow()
+    job.updated_at = now
+    if error is None:
+        job.status = ImageJobStatus.DONE.value
+        job.last_error = None
+    elif job.attempts >= IMAGE_JOB_MAX_ATTEMPTS:
+        job.status = ImageJobStatus.FAILED.value
+        job.last_error = error
+    else:
+        job.status = ImageJobStatus.PENDING.value
+        job.last_error = error
+        job.run_after = now + timedelta(seconds=IMAGE_JOB_RETRY_SECONDS * 2 ** (job.attempts - 1))
+    db.commit()
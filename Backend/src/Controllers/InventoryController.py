@@ -0,0 +1,139 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import update, select
+from src.Models.Catalog import Jersey, JerseyStock
+from src.Models.Order import Order, OrderItem, OrderStatus
+from src.Schemas.CatalogSchema import StockEntry
+from src.Controllers.AnalyticsController import apply_orders
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+import os
+
+# Unpaid (PENDING) orders give their stock back once their payment deadline passes. Only the
+# payment methods listed here get a deadline at checkout (a payment request the customer has
+# RESERVATION_TIMEOUT_MINUTES to complete); orders paid otherwise keep their stock until an
+# admin marks them paid or cancels them.
+PAYMENT_DEADLINE_METHODS = {method.strip().upper() for method in os.getenv("PAYMENT_DEADLINE_METHODS", "").split(",") if method.strip()}
+RESERVATION_TIMEOUT_MINUTES = int(os.getenv("RESERVATION_TIMEOUT_MINUTES", 30))
+
+def get_stock(db: Session, jersey_id: int):
+    return db.query(JerseyStock).filter(JerseyStock.jersey_id == jersey_id).order_by(JerseyStock.size).all()
+
+def set_stock(db: Session, jersey_id: int, entries: List[StockEntry]):
+    jersey = db.query(Jersey).filter(Jersey.id == jersey_id).first()
+    if not jersey:
+        raise HTTPException(status_code=404, detail="Camisola não encontrada")
+
+    current = {s.size: s for s in get_stock(db, jersey_id)}
+    for entry in entries:
+        if entry.size in current:
+            current[entry.size].quantity = entry.quantity
+        else:
+            db.add(JerseyStock(jersey_id=jersey_id, size=entry.size, quantity=entry.quantity))
+
+    db.commit()
+    return get_stock(db, jersey_id)
+
+def payment_deadline(payment_method: str) -> Optional[datetime]:
+    """When an order paid with this method is cancelled if still unpaid; None = no deadline."""
+    if (payment_method or "").upper() not in PAYMENT_DEADLINE_METHODS:
+        return None
+    return datetime.utcnow() + timedelta(minutes=RESERVATION_TIMEOUT_MINUTES)
+
+def stock_lines(items: Iterable) -> List[Tuple[int, str, int]]:
+    """
+    (jersey_id, size, quantity) per jersey and size of cart or order lines (anything with
+    jersey_id, size and quantity). Reservation and release both use it, so they always
+    cover the same lines.
+    """
+    totals = {}
+    for item in items:
+        key = (item.jersey_id, item.size)
+        totals[key] = totals.get(key, 0) + item.quantity
+    return [(jersey_id, size, quantity) for (jersey_id, size), quantity in sorted(totals.items())]
+
+def reserve_stock(db: Session, lines: List[Tuple[int, str, int]]) -> Set[Tuple[int, str]]:
+    """
+    Takes stock for (jersey_id, size, quantity) lines inside the caller's transaction.
+
+    Each line is one conditional UPDATE (quantity = quantity - n WHERE quantity >= n), so
+    concurrent checkouts can never oversell. Lines are applied in (jersey_id, size) order,
+    so two checkouts touching the same rows always lock them in the same order and
+    cannot deadlock. Sizes without a stock row are not tracked and are left alone.
+    Raises 409 (the caller's transaction must be rolled back) if any line is short.
+    Returns the (jersey_id, size) pairs whose stock was taken; the caller flags those
+    order items, and only they are released later.
+    """
+    reserved = set()
+    for jersey_id, size, quantity in sorted(tuple(line) for line in lines):
+        result = db.execute(
+            update(JerseyStock)
+            .where(
+                JerseyStock.jersey_id == jersey_id,
+                JerseyStock.size == size,
+                JerseyStock.quantity >= quantity
+            )
+            .values(quantity=JerseyStock.quantity - quantity)
+        )
+        if result.rowcount == 0:
+            tracked = db.query(JerseyStock.id).filter(
+                JerseyStock.jersey_id == jersey_id,
+                JerseyStock.size == size
+            ).first()
+            if tracked:
+                raise HTTPException(status_code=409, detail=f"Stock insuficiente para o tamanho {size}")
+        else:
+            reserved.add((jersey_id, size))
+    return reserved
+
+def release_order_stock(db: Session, order_id: int):
+    """
+    Gives back the stock held by an order, once: only items flagged stock_reserved at
+    checkout, so sizes that were untracked then (or stock rows added since) are left alone.
+    Returns True if stock was released.
+    """
+    claimed = db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.stock_reserved == True)
+        .values(stock_reserved=False)
+    )
+    if claimed.rowcount == 0:
+        return False
+
+    items = db.execute(
+        select(OrderItem.jersey_id, OrderItem.size, OrderItem.quantity)
+        .where(OrderItem.order_id == order_id, OrderItem.stock_reserved == True)
+    ).all()
+    for jersey_id, size, quantity in stock_lines(items):
+        db.execute(
+            update(JerseyStock)
+            .where(JerseyStock.jersey_id == jersey_id, JerseyStock.size == size)
+            .values(quantity=JerseyStock.quantity + quantity)
+        )
+    return True
+
+def release_expired_reservations(db: Session, now: Optional[datetime] = None):
+    """
+    Cancels PENDING orders holding stock whose payment deadline has passed and returns their
+    stock. Orders without a deadline (see PAYMENT_DEADLINE_METHODS) are never cancelled here.
+    """
+    expired_ids = [row[0] for row in db.query(Order.id).filter(
+        Order.status == OrderStatus.PENDING,
+        Order.stock_reserved == True,
+        Order.payment_due_at < (now or datetime.utcnow())
+    ).order_by(Order.id).all()]
+
+    released = 0
+    for order_id in expired_ids:
+        # Guarded by status so an order paid in the meantime is left untouched
+        cancelled = db.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == OrderStatus.PENDING)
+            .values(status=OrderStatus.CANCELLED, version=Order.version + 1)
+        )
+        if cancelled.rowcount:
+            apply_orders(db, [order_id], sign=-1)
+            if release_order_stock(db, order_id):
+                released += 1
+        db.commit()
+    return released
@@ -0,0 +1,79 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import update, select, or_, tuple_
+from src.Models.Order import Order, OrderStatus, ORDER_TRANSITIONS
+from src.Schemas.OrderSchema import OrderStatusTransition
+from src.Controllers.InventoryController import release_order_stock
+from src.Controllers.AnalyticsController import apply_orders
+from fastapi import HTTPException
+
+def transition_orders(db: Session, transition: OrderStatusTransition):
+    """
+    Moves a batch of orders from one status to another with a single UPDATE.
+
+    The UPDATE only matches rows still in `from_status` (and at the expected version
+    when one is given), so concurrent edits are detected instead of overwritten.
+    Rows that did not match are classified with one extra SELECT.
+    """
+    if transition.to_status not in ORDER_TRANSITIONS[transition.from_status]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Transição inválida: {transition.from_status.value} -> {transition.to_status.value}"
+        )
+
+    # Last reference wins if an id is repeated
+    expected = {ref.id: ref.version for ref in transition.orders}
+    versioned = [(order_id, version) for order_id, version in expected.items() if version is not None]
+    unversioned = [order_id for order_id, version in expected.items() if version is None]
+
+    guards = []
+    if versioned:
+        guards.append(tuple_(Order.id, Order.version).in_(versioned))
+    if unversioned:
+        guards.append(Order.id.in_(unversioned))
+
+    updated = dict(db.execute(
+        update(Order)
+        .where(Order.status == transition.from_status.value, or_(*guards))
+        .values(status=transition.to_status.value, version=Order.version + 1)
+        .returning(Order.id, Order.version)
+        .execution_options(synchronize_session=False)
+    ).all())
+
+    # Cancelling gives stock back and removes the orders from the sales rollups
+    if transition.to_status == OrderStatus.CANCELLED and updated:
+        for order_id in sorted(updated):
+            release_order_stock(db, order_id)
+        apply_orders(db, list(updated), sign=-1)
+
+    missed = [order_id for order_id in expected if order_id not in updated]
+    current = {}
+    if missed:
+        current = {
+            row.id: row for row in db.execute(
+                select(Order.id, Order.status, Order.version).where(Order.id.in_(missed))
+            ).all()
+        }
+
+    db.commit()
+
+    results = []
+    for order_id in expected:
+        if order_id in updated:
+            results.append({"id": order_id, "outcome": "updated", "status": transition.to_status.value, "version": updated[order_id]})
+            continue
+
+        row = current.get(order_id)
+        if row is None:
+            outcome = "not_found"
+        elif row.status != transition.from_status:
+            outcome = "status_mismatch"
+        else:
+            outcome = "version_conflict"
+        results.append({
+            "id": order_id,
+            "outcome": outcome,
+            "status": row.status if row else None,
+            "version": row.version if row else None
+        })
+
+    return {"updated": len(updated), "results": results}
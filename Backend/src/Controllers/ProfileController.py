@@ -1,12 +1,16 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer, joinedload, selectinload
 from src.Models.User import User
 from src.Models.Address import Address
-from src.Models.UserImage import UserImage
+from src.Models.UserImage import UserAvatar
 from src.Schemas.ProfileSchema import AddressCreate, UserUpdateInfo, UserImageCreate
-from fastapi import HTTPException, status
+from src.Utils.Images import decode_base64_image, make_avatar_variants, AVATAR_SIZES, AVATAR_CONTENT_TYPE
+from src.Utils.Uploads import read_upload
+from fastapi import HTTPException, UploadFile, status
+from datetime import datetime
 
 def get_user_profile(db: Session, user_id: int):
-    user = db.query(User).filter(User.id == user_id).first()
+    # ProfileResponse reads addresses and avatar_url; load them with the user
+    user = db.query(User).options(selectinload(User.addresses), joinedload(User.avatar)).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -92,12 +96,38 @@ def delete_address(db: Session, user_id: int, address_id: int):
 
 # Image Management
 def upload_image(db: Session, user_id: int, image_data: str):
-    # Optional: Delete previous image if exists (assuming 1 profile image based on context, though table supports multiple if needed)
-    # user.user_images is a list. For now, let's append. Or clear and set new if it's meant to be THE profile pic.
-    # Request said "guardar imagens" (plural possible), but usually profile has one. I'll just add for now.
-    
-    new_image = UserImage(user_id=user_id, image_data=image_data)
-    db.add(new_image)
+    return store_avatar(db, user_id, decode_base64_image(image_data))
+
+def upload_avatar_file(db: Session, user_id: int, file: UploadFile):
+    # Multipart variant of upload_image: raw bytes, no base64 inflation
+    return store_avatar(db, user_id, read_upload(file))
+
+def store_avatar(db: Session, user_id: int, raw: bytes):
+    # Replaces the single current avatar; resized variants are generated once here, not per view
+    variants = make_avatar_variants(raw)
+
+    avatar = db.query(UserAvatar).filter(UserAvatar.user_id == user_id).first()
+    if avatar:
+        avatar.version += 1
+    else:
+        avatar = UserAvatar(user_id=user_id, version=1)
+        db.add(avatar)
+
+    avatar.small = variants["small"]
+    avatar.medium = variants["medium"]
+    avatar.large = variants["large"]
+    avatar.content_type = AVATAR_CONTENT_TYPE
+    avatar.updated_at = datetime.utcnow()
+
     db.commit()
-    db.refresh(new_image)
-    return new_image
+    return db.query(User).filter(User.id == user_id).first()
+
+def get_avatar(db: Session, user_id: int, size: str):
+    if size not in AVATAR_SIZES:
+        raise HTTPException(status_code=404, detail="Tamanho inválido")
+
+    # Only the requested variant's bytes are loaded
+    avatar = db.query(UserAvatar).options(undefer(getattr(UserAvatar, size))).filter(UserAvatar.user_id == user_id).first()
+    if not avatar:
+        raise HTTPException(status_code=404, detail="Avatar não encontrado")
+    return avatar, getattr(avatar, size)
@@ -0,0 +1,304 @@
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import select, delete, insert, func, event
+from src.Models.Catalog import Team, Jersey, JerseyColor, SimilarJersey
+from src.Controllers.CacheVersionController import bump_cache_version, get_cache_version, SIMILARITY_DATA
+from fastapi import HTTPException
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+import os
+import re
+import threading
+
+# Each jersey keeps its SIMILAR_JERSEYS_K best matches in similar_jerseys, so the product
+# page reads recommendations with one indexed lookup. Scores are a weighted sum of
+# per-attribute similarities in [0, 1]; weights add up to 1.
+SIMILAR_JERSEYS_K = int(os.getenv("SIMILAR_JERSEYS_K", 12))
+SIMILARITY_WEIGHTS = {"team": 0.35, "league": 0.15, "type": 0.15, "season": 0.15, "color": 0.20}
+SEASON_SPAN = 5 # Seasons apart at which season similarity reaches 0
+COLOR_SPAN = 50.0 # CIE76 delta E at which colour similarity reaches 0
+BLOCK_CELLS = 1 << 21 # Scores per vectorised pass (rows x catalog size), about 16 MB per temporary
+STORE_CHUNK = 64 # Lists replaced per DELETE/INSERT pair
+
+def season_year(season: str) -> float:
+    """Starting year of "2024/25", "2024-2025", "24/25" or "2024"; NaN if there is none."""
+    match = re.search(r"\d{4}|\d{2}", season or "")
+    if not match:
+        return np.nan
+    year = int(match.group())
+    return float(year + 2000 if year < 100 else year)
+
+class CatalogFeatures:
+    """
+    The attributes similarity is computed from, one NumPy column per attribute. Jerseys
+    deleted since it was loaded stay in the columns, masked out by `live`.
+    """
+
+    COLUMNS = ("ids", "team", "league", "type", "year", "bucket", "lab", "live")
+
+    def __init__(self, rows, colors, buckets: Optional[Dict[str, int]] = None):
+        self.ids = np.array([row.id for row in rows], dtype=np.int64)
+        self.position = {jersey_id: i for i, jersey_id in enumerate(self.ids.tolist())}
+        missing = -1
+        self.team = np.array([row.team_id if row.team_id is not None else missing for row in rows], dtype=np.int64)
+        self.league = np.array([row.league_id if row.league_id is not None else missing for row in rows], dtype=np.int64)
+        self.type = np.array([row.jersey_type_id if row.jersey_type_id is not None else missing for row in rows], dtype=np.int64)
+        self.year = np.array([season_year(row.season) for row in rows], dtype=np.float64)
+        self.live = np.ones(len(rows), dtype=bool)
+
+        # Most prominent extracted colour, falling back to the main_color bucket
+        names = self.buckets = buckets if buckets is not None else {}
+        self.bucket = np.array([names.setdefault(row.main_color, len(names)) if row.main_color else missing for row in rows], dtype=np.int64)
+        self.lab = np.full((len(rows), 3), np.nan, dtype=np.float64)
+        for row in colors:
+            i = self.position.get(row.jersey_id)
+            if i is not None:
+                self.lab[i] = (row.l, row.a, row.b)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.live))
+
+    def __contains__(self, jersey_id: int):
+        i = self.position.get(jersey_id)
+        return i is not None and bool(self.live[i])
+
+    def patched(self, rows, colors, gone: Iterable[int]) -> "CatalogFeatures":
+        """
+        A copy with the given rows reloaded (appended if new) and the `gone` jerseys masked
+        out; this one is left untouched. Costs a copy of the columns, not a catalog read.
+        """
+        fresh = CatalogFeatures(rows, colors, self.buckets) # Shared buckets keep colour ids comparable
+        added = [i for i, jersey_id in enumerate(fresh.ids.tolist()) if jersey_id not in self.position]
+        copy = object.__new__(CatalogFeatures)
+        copy.buckets = self.buckets
+        for name in self.COLUMNS:
+            setattr(copy, name, np.concatenate([getattr(self, name), getattr(fresh, name)[added]]))
+        copy.position = dict(self.position)
+        copy.position.update((jersey_id, len(self.ids) + n) for n, jersey_id in enumerate(fresh.ids[added].tolist()))
+        for i, jersey_id in enumerate(fresh.ids.tolist()):
+            for name in self.COLUMNS:
+                getattr(copy, name)[copy.position[jersey_id]] = getattr(fresh, name)[i]
+        for jersey_id in gone:
+            i = copy.position.get(jersey_id)
+            if i is not None:
+                copy.live[i] = False
+        return copy
+
+    def block_rows(self) -> int:
+        return max(1, min(256, BLOCK_CELLS // max(len(self.ids), 1)))
+
+    def scores(self, rows: np.ndarray) -> np.ndarray:
+        """(len(rows), N) similarity of the given row positions against every jersey; self pairs and deleted jerseys are -inf."""
+        w = SIMILARITY_WEIGHTS
+
+        def same(column):
+            a, b = column[rows][:, None], column[None, :]
+            return (a == b) & (a != -1)
+
+        score = w["team"] * same(self.team) + w["league"] * same(self.league) + w["type"] * same(self.type)
+
+        gap = np.abs(self.year[rows][:, None] - self.year[None, :])
+        score += w["season"] * np.nan_to_num(np.clip(1 - gap / SEASON_SPAN, 0, 1))
+
+        # Per channel, so a block never materialises a (rows, N, 3) array
+        distance = np.sqrt(sum((self.lab[rows, c][:, None] - self.lab[None, :, c]) ** 2 for c in range(3)))
+        color = np.where(np.isnan(distance), same(self.bucket), np.clip(1 - distance / COLOR_SPAN, 0, 1))
+        score += w["color"] * np.nan_to_num(color)
+
+        # Rounded so equal attribute matches tie exactly (ties are broken by id)
+        score = np.round(score, 6)
+        score[np.arange(len(rows)), rows] = -np.inf
+        score[:, ~self.live] = -np.inf
+        return score
+
+    def top_k(self, rows: np.ndarray, k: int = SIMILAR_JERSEYS_K):
+        """Best k (similar_id, score) per row, highest score first (ties by id); zero scores are left out."""
+        result = []
+        step = self.block_rows()
+        for start in range(0, len(rows), step):
+            block = self.scores(rows[start:start + step])
+            keep = min(k, len(self) - 1)
+            if keep <= 0:
+                result += [[] for _ in range(len(block))]
+                continue
+            kth = -np.partition(-block, keep - 1, axis=1)[:, keep - 1]
+            for line, threshold in zip(block, kth):
+                # Everything tied with the k-th score competes on id
+                picked = np.flatnonzero(line >= max(threshold, 1e-9))
+                picked = picked[np.lexsort((self.ids[picked], -line[picked]))][:keep]
+                result.append([(int(self.ids[j]), float(line[j])) for j in picked])
+        return result
+
+def _feature_rows(db: Session, jersey_ids: Optional[Iterable[int]] = None):
+    rows = (
+        select(Jersey.id, Jersey.team_id, Team.league_id, Jersey.jersey_type_id, Jersey.season, Jersey.main_color)
+        .join(Team, Team.id == Jersey.team_id, isouter=True)
+        .order_by(Jersey.id)
+    )
+    colors = select(JerseyColor.jersey_id, JerseyColor.l, JerseyColor.a, JerseyColor.b).where(JerseyColor.rank == 0)
+    if jersey_ids is not None:
+        jersey_ids = list(jersey_ids)
+        rows = rows.where(Jersey.id.in_(jersey_ids))
+        colors = colors.where(JerseyColor.jersey_id.in_(jersey_ids))
+    return db.execute(rows).all(), db.execute(colors).all()
+
+def load_catalog_features(db: Session) -> CatalogFeatures:
+    return CatalogFeatures(*_feature_rows(db))
+
+class SimilarityIndex:
+    """
+    Catalog features plus each list's floor (its k-th score; 0 while it has fewer than K
+    matches), as of one SIMILARITY_DATA version. Refreshes start from it instead of
+    reading the whole catalog and similar_jerseys.
+    """
+
+    def __init__(self, features: CatalogFeatures, floor: np.ndarray, version: int):
+        self.features = features
+        self.floor = floor
+        self.version = version
+
+# This process's index; a writer installs its patched copy once its transaction commits
+_index: Optional[SimilarityIndex] = None
+_lock = threading.Lock()
+_PENDING = "similarity_index" # Session.info key of the index to install on commit
+
+@event.listens_for(Session, "after_commit")
+def _install_pending_index(session):
+    global _index
+    pending = session.info.pop(_PENDING, None)
+    if pending is not None:
+        with _lock:
+            if _index is None or pending.version > _index.version:
+                _index = pending
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_pending_index(session, transaction):
+    # Rolled back or closed without committing: the patched index never became true
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+def _load_index(db: Session, version: int) -> SimilarityIndex:
+    # Full read: on first use, or after another process (or an offline job) changed the lists
+    features = load_catalog_features(db)
+    floor = np.zeros(len(features.ids))
+    for row in db.execute(
+        select(SimilarJersey.jersey_id, func.min(SimilarJersey.score), func.count())
+        .group_by(SimilarJersey.jersey_id)
+    ).all():
+        i = features.position.get(row[0])
+        if i is not None and row[2] >= SIMILAR_JERSEYS_K:
+            floor[i] = row[1]
+    return SimilarityIndex(features, floor, version)
+
+def _current_index(db: Session, version: int) -> SimilarityIndex:
+    """The index as of `version` (the one before this transaction's bump): pending, cached or loaded."""
+    pending = db.info.get(_PENDING)
+    if pending is not None and pending.version == version:
+        return pending # An earlier refresh in this transaction
+    with _lock:
+        cached = _index
+    if cached is not None and cached.version == version:
+        return cached
+    return _load_index(db, version)
+
+def _store(db: Session, features: CatalogFeatures, jersey_ids: List[int]) -> Dict[int, float]:
+    # Replaces the lists of the given jerseys; returns each list's floor
+    floors = {}
+    for start in range(0, len(jersey_ids), STORE_CHUNK):
+        chunk = jersey_ids[start:start + STORE_CHUNK]
+        db.execute(delete(SimilarJersey).where(SimilarJersey.jersey_id.in_(chunk)))
+        rows = np.array([features.position[jersey_id] for jersey_id in chunk], dtype=np.int64)
+        values = []
+        for jersey_id, matches in zip(chunk, features.top_k(rows)):
+            floors[jersey_id] = matches[-1][1] if len(matches) >= SIMILAR_JERSEYS_K else 0.0
+            values += [{"jersey_id": jersey_id, "rank": rank, "similar_id": similar_id, "score": score}
+                       for rank, (similar_id, score) in enumerate(matches)]
+        if values:
+            db.execute(insert(SimilarJersey), values)
+    return floors
+
+def lists_including(db: Session, jersey_ids: Iterable[int]) -> Set[int]:
+    """
+    Jerseys whose list points at one of the given jerseys. Deletes must read it before
+    flushing: on Postgres the rows pointing at a deleted jersey cascade away with it.
+    """
+    jersey_ids = list(jersey_ids)
+    if not jersey_ids:
+        return set()
+    return set(db.execute(select(SimilarJersey.jersey_id).where(SimilarJersey.similar_id.in_(jersey_ids))).scalars())
+
+def refresh_similar_jerseys(db: Session, jersey_ids: Iterable[int], including: Iterable[int] = ()):
+    """
+    Incrementally updates similar_jerseys after the given jerseys were created, changed
+    or deleted, inside the caller's transaction (changes must be flushed). Deletes pass
+    `including`, the lists_including() read before the delete.
+
+    Their own lists are recomputed, and so is the list of every other jersey that
+    currently points at one of them (its score moved or it is gone) or that would now
+    rank one of them above its current k-th match. Scores are symmetric, so the second
+    set comes from the changed jerseys' own score rows. Everything else is untouched.
+
+    Features and list floors come from the process's SimilarityIndex, patched with the
+    changed jerseys' rows, so an edit reads those rows and the lists pointing at them,
+    not the catalog; the scoring itself is one vectorised row per changed jersey.
+    """
+    changed = set(jersey_ids)
+    if not changed:
+        return
+    # Bumped first: on Postgres the version row stays locked until commit, so refreshes
+    # from different processes run one after the other, each from the previous one's lists
+    bump_cache_version(db, SIMILARITY_DATA)
+    version = get_cache_version(db, SIMILARITY_DATA)
+    index = _current_index(db, version - 1)
+
+    rows, colors = _feature_rows(db, changed)
+    gone = changed - {row.id for row in rows}
+    features = index.features.patched(rows, colors, gone)
+    floor = np.concatenate([index.floor, np.zeros(len(features.ids) - len(index.floor))])
+    live = [jersey_id for jersey_id in changed if jersey_id in features]
+    if gone:
+        db.execute(delete(SimilarJersey).where(SimilarJersey.jersey_id.in_(gone)))
+
+    # 1. Lists that include a changed jersey
+    affected = lists_including(db, changed) | set(including)
+
+    # 2. Lists a changed jersey should now enter: its score reaches their k-th (or they are not full)
+    if live:
+        rows = np.array([features.position[jersey_id] for jersey_id in live], dtype=np.int64)
+        step = features.block_rows()
+        for start in range(0, len(rows), step):
+            block = features.scores(rows[start:start + step])
+            entering = np.flatnonzero(((block >= floor[None, :]) & (block > 0)).any(axis=0))
+            affected.update(features.ids[entering].tolist())
+
+    targets = sorted(jersey_id for jersey_id in (affected | set(live)) - gone if jersey_id in features)
+    for jersey_id, value in _store(db, features, targets).items():
+        floor[features.position[jersey_id]] = value
+    db.flush()
+    db.info[_PENDING] = SimilarityIndex(features, floor, version)
+
+def rebuild_similar_jerseys(db: Session):
+    """Recomputes every list from scratch (offline job, see rebuild_similar_jerseys.py)."""
+    bump_cache_version(db, SIMILARITY_DATA) # Other processes drop their index
+    version = get_cache_version(db, SIMILARITY_DATA)
+    features = load_catalog_features(db)
+    db.execute(delete(SimilarJersey))
+    floor = np.zeros(len(features.ids))
+    for jersey_id, value in _store(db, features, features.ids.tolist()).items():
+        floor[features.position[jersey_id]] = value
+    db.info[_PENDING] = SimilarityIndex(features, floor, version)
+    db.commit()
+    return len(features)
+
+def get_similar_jerseys(db: Session, jersey_id: int, limit: int = 8):
+    if not db.query(Jersey.id).filter(Jersey.id == jersey_id).first():
+        raise HTTPException(status_code=404, detail="Camisola não encontrada")
+    # One lookup on the similar_jerseys primary key; the join skips rows left by deleted jerseys
+    return (
+        db.query(Jersey)
+        .join(SimilarJersey, SimilarJersey.similar_id == Jersey.id)
+        .filter(SimilarJersey.jersey_id == jersey_id)
+        .options(joinedload(Jersey.team), joinedload(Jersey.jersey_type), selectinload(Jersey.images))
+        .order_by(SimilarJersey.rank)
+        .limit(limit)
+        .all()
+    )
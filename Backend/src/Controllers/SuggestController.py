@@ -0,0 +1,66 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from src.Models.Catalog import League, Team, Jersey, JerseyType
+from src.Controllers.CacheVersionController import bump_cache_version, get_cache_versions, local_bump_count, REFERENCE_DATA, JERSEY_DATA
+from src.Utils.PrefixIndex import PrefixIndex, PrefixEntry
+import os
+import threading
+import time
+
+# Typeahead is served from memory. Writes in this process are seen on the next request;
+# other processes' writes once the cache versions are re-read, at most every
+# SUGGEST_CHECK_SECONDS (the only time a suggestion request touches the database).
+SUGGEST_CHECK_SECONDS = float(os.getenv("SUGGEST_CHECK_SECONDS", 5))
+MAX_SUGGESTIONS = 20
+
+_index = None
+_version = None
+_checked_at = 0.0
+_checked_bumps = -1
+_lock = threading.Lock()
+
+def invalidate_jersey_data(db: Session):
+    # Called when a jersey is created, deleted or changes team, season or type
+    bump_cache_version(db, JERSEY_DATA)
+
+def build_suggestion_index(db: Session) -> PrefixIndex:
+    """Team, league and type names and seasons, each weighted by how many jerseys it has."""
+    team_counts = dict(db.execute(select(Jersey.team_id, func.count()).group_by(Jersey.team_id)).all())
+    type_counts = dict(db.execute(select(Jersey.jersey_type_id, func.count()).group_by(Jersey.jersey_type_id)).all())
+    league_counts = dict(db.execute(
+        select(Team.league_id, func.count(Jersey.id)).join(Jersey, Jersey.team_id == Team.id).group_by(Team.league_id)
+    ).all())
+    season_counts = db.execute(
+        select(Jersey.season, func.count()).where(Jersey.season.isnot(None), Jersey.season != "").group_by(Jersey.season)
+    ).all()
+
+    entries = []
+    for team_id, name in db.execute(select(Team.id, Team.name)).all():
+        entries.append(PrefixEntry(name, ("team", team_id), team_counts.get(team_id, 0)))
+    for league_id, name in db.execute(select(League.id, League.name)).all():
+        entries.append(PrefixEntry(name, ("league", league_id), league_counts.get(league_id, 0)))
+    for type_id, name in db.execute(select(JerseyType.id, JerseyType.name)).all():
+        entries.append(PrefixEntry(name, ("type", type_id), type_counts.get(type_id, 0)))
+    for season, count in season_counts:
+        entries.append(PrefixEntry(season, ("season", None), count))
+    return PrefixIndex([entry for entry in entries if entry.label])
+
+def get_suggestion_index(db: Session) -> PrefixIndex:
+    global _index, _version, _checked_at, _checked_bumps
+    with _lock:
+        stale = time.monotonic() - _checked_at > SUGGEST_CHECK_SECONDS or local_bump_count() != _checked_bumps
+        if _index is None or stale:
+            bumps = local_bump_count()
+            version = get_cache_versions(db, [REFERENCE_DATA, JERSEY_DATA])
+            if _index is None or version != _version:
+                _index = build_suggestion_index(db)
+                _version = version
+            _checked_at = time.monotonic()
+            _checked_bumps = bumps
+        return _index
+
+def suggest(db: Session, q: str, limit: int = 8):
+    return [
+        {"kind": entry.payload[0], "id": entry.payload[1], "label": entry.label, "count": entry.weight}
+        for entry in get_suggestion_index(db).search(q, limit)
+    ]
@@ -25,4 +25,15 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
+
+    # End the read transaction so the connection goes back to the pool while the request
+    # waits for a worker thread. Routes only read scalar columns (id, role) from the user.
+    db.expunge(user)
+    db.rollback()
     return user
+
+# Dependency to check for Admin role
+def get_current_admin(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Acesso negado. Apenas administradores.")
+    return current_user
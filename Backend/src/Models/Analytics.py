@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Float, Date, UniqueConstraint
+from database import Base
+
+# Rollup tables maintained incrementally from orders (see AnalyticsController).
+# Dimension ids are plain integers, not foreign keys, so deleting a team or jersey
+# does not rewrite sales history. Unknown dimensions are stored as 0 / "" rather than
+# NULL so they still hit the unique constraint used for upserts.
+
+class OrdersDaily(Base):
+    __tablename__ = "analytics_orders_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, unique=True, index=True)
+    orders = Column(Integer, default=0)
+    units = Column(Integer, default=0)
+    revenue = Column(Float, default=0)
+
+class SalesDaily(Base):
+    __tablename__ = "analytics_sales_daily"
+    __table_args__ = (
+        UniqueConstraint("day", "team_id", "league_id", "jersey_type_id", "size", name="uq_sales_daily_dims"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, index=True)
+    team_id = Column(Integer, default=0)
+    league_id = Column(Integer, default=0)
+    jersey_type_id = Column(Integer, default=0)
+    size = Column(String, default="")
+
+    units = Column(Integer, default=0)
+    revenue = Column(Float, default=0)
+
+class PatchDaily(Base):
+    __tablename__ = "analytics_patch_daily"
+    __table_args__ = (UniqueConstraint("day", "patch", name="uq_patch_daily_patch"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, index=True)
+    patch = Column(String)
+    units = Column(Integer, default=0)
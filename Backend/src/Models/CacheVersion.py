@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from database import Base
+import datetime
+
+class CacheVersion(Base):
+    """
+    Version counter per cached document. Writers bump it in their transaction and every
+    process compares it (one primary-key read) with the version its copy was built from.
+    """
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, func, literal_column
 from sqlalchemy.orm import relationship
 from database import Base
+from src.Models.Types import JSONDocument
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        Index("ix_cart_items_patches", "patches", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True)
@@ -12,9 +16,21 @@ class CartItem(Base):
     quantity = Column(Integer, default=1)
     custom_name = Column(String, nullable=True)
     custom_number = Column(String, nullable=True)
-    patches = Column(Text, nullable=True) # Stored as JSON string
+    patches = Column(JSONDocument, nullable=True) # Sorted list of patch names
     final_price = Column(Float)
 
     # Relationships
     user = relationship("User", back_populates="cart_items")
-    jersey = relationship("Jersey") 
+    jersey = relationship("Jersey")
+
+# Identity of a cart line: adding the same line again adds to its quantity (see add_to_cart).
+# Missing customisations compare as '' (NULLs would never conflict); patches are stored sorted, [] for none
+CART_LINE = (
+    CartItem.user_id,
+    CartItem.jersey_id,
+    CartItem.size,
+    func.coalesce(CartItem.custom_name, literal_column("''")),
+    func.coalesce(CartItem.custom_number, literal_column("''")),
+    CartItem.patches
+)
+Index("uq_cart_items_line", *CART_LINE, unique=True)
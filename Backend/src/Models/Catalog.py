@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, ForeignKey, Float, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from database import Base
+from src.Utils.Uploads import media_url
+from src.Utils.ImageVariants import variant_urls
 from datetime import datetime
 
 class League(Base):
@@ -9,20 +11,38 @@ class League(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
     image_base64 = Column(String, nullable=True)
+    image_path = Column(String, nullable=True) # File under MEDIA_DIR (multipart uploads)
     
     teams = relationship("Team", back_populates="league", cascade="all, delete-orphan")
 
+    @property
+    def image_url(self):
+        return media_url(self.image_path)
+
+    @property
+    def variants(self):
+        return variant_urls(self.image_path)
+
 class Team(Base):
     __tablename__ = "teams"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
     image_base64 = Column(String, nullable=True)
+    image_path = Column(String, nullable=True) # File under MEDIA_DIR (multipart uploads)
     league_id = Column(Integer, ForeignKey("leagues.id"))
     
     league = relationship("League", back_populates="teams")
     jerseys = relationship("Jersey", back_populates="team", cascade="all, delete-orphan")
 
+    @property
+    def image_url(self):
+        return media_url(self.image_path)
+
+    @property
+    def variants(self):
+        return variant_urls(self.image_path)
+
 class JerseyType(Base):
     __tablename__ = "jersey_types"
 
@@ -48,18 +68,76 @@ class Jersey(Base):
     jersey_type = relationship("JerseyType", back_populates="jerseys")
     
     team = relationship("Team", back_populates="jerseys")
-    images = relationship("JerseyImage", back_populates="jersey", cascade="all, delete-orphan")
+    images = relationship("JerseyImage", back_populates="jersey", cascade="all, delete-orphan", order_by="(JerseyImage.position, JerseyImage.id)")
+    stock = relationship("JerseyStock", back_populates="jersey", cascade="all, delete-orphan")
+    colors = relationship("JerseyColor", cascade="all, delete-orphan")
 
     @property
     def team_name(self):
         return self.team.name if self.team else None
 
+    @property
+    def jersey_type_name(self):
+        return self.jersey_type.name if self.jersey_type else None
+
 class JerseyImage(Base):
     __tablename__ = "jersey_images"
+    __table_args__ = (Index("ix_jersey_images_jersey_position", "jersey_id", "position"),)
 
     id = Column(Integer, primary_key=True, index=True)
     jersey_id = Column(Integer, ForeignKey("jerseys.id"))
-    image_base64 = Column(String)
+    image_base64 = Column(String, nullable=True)
+    image_path = Column(String, nullable=True) # File under MEDIA_DIR (multipart uploads)
     is_main = Column(Boolean, default=False)
+
+    # Lets update_jersey keep unchanged images instead of rewriting them (see image_content_hash)
+    content_hash = Column(String(64), nullable=True)
+    position = Column(Integer, default=0, nullable=False)
+
+    # 64-bit perceptual hashes (signed) for near-duplicate detection, see src/Utils/PerceptualHash.py
+    phash = Column(BigInteger, nullable=True)
+    dhash = Column(BigInteger, nullable=True)
     
     jersey = relationship("Jersey", back_populates="images")
+
+    @property
+    def image_url(self):
+        return media_url(self.image_path)
+
+    @property
+    def variants(self):
+        return variant_urls(self.image_path)
+
+class JerseyStock(Base):
+    __tablename__ = "jersey_stock"
+    __table_args__ = (UniqueConstraint("jersey_id", "size", name="uq_jersey_stock_jersey_size"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    jersey_id = Column(Integer, ForeignKey("jerseys.id"))
+    size = Column(String)
+    quantity = Column(Integer, default=0)
+
+    jersey = relationship("Jersey", back_populates="stock")
+
+class JerseyColor(Base):
+    """Dominant colours of a jersey's main image (see src/Utils/Colors.py), one row per colour."""
+    __tablename__ = "jersey_colors"
+
+    jersey_id = Column(Integer, ForeignKey("jerseys.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True) # 0 = most prominent
+    hex = Column(String(7))
+    l = Column(Float)
+    a = Column(Float)
+    b = Column(Float)
+    weight = Column(Float) # Share of the jersey's foreground pixels
+    source_hash = Column(String(64)) # content_hash of the image the colours came from
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class SimilarJersey(Base):
+    """Precomputed top-K recommendations per jersey (see SimilarityController)."""
+    __tablename__ = "similar_jerseys"
+
+    jersey_id = Column(Integer, ForeignKey("jerseys.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True) # 0 = most similar
+    similar_id = Column(Integer, ForeignKey("jerseys.id", ondelete="CASCADE"), index=True)
+    score = Column(Float)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, UniqueConstraint
+from database import Base
+import datetime
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    key = Column(String)
+
+    # Fingerprint of the original request body, so a reused key with a different payload is rejected
+    request_hash = Column(String)
+
+    # Stored response, replayed verbatim on retries
+    status_code = Column(Integer)
+    response_body = Column(Text) # JSON
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True) # Purged after IDEMPOTENCY_KEY_TTL_HOURS
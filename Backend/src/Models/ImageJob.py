@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from database import Base
+import datetime
+import enum
+
+class ImageJobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+class ImageVariantJob(Base):
+    """Persisted queue of derivative generation work, one row per uploaded source image."""
+    __tablename__ = "image_variant_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_path = Column(String, unique=True, nullable=False) # Relative to MEDIA_DIR
+    status = Column(String, default=ImageJobStatus.PENDING.value, index=True)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, default=datetime.datetime.utcnow) # Retry backoff / stale claim recovery
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, DateTime, Enum, Index, Boolean
 from sqlalchemy.orm import relationship
 from database import Base
+from src.Models.Types import JSONDocument
 import datetime
 import enum
 
@@ -12,8 +13,20 @@ class OrderStatus(str, enum.Enum):
     DELIVERED = "DELIVERED"
     CANCELLED = "CANCELLED"
 
+# Allowed status transitions (fulfilment state machine)
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.PAID, OrderStatus.CANCELLED},
+    OrderStatus.PAID: {OrderStatus.PROCESSING, OrderStatus.CANCELLED},
+    OrderStatus.PROCESSING: {OrderStatus.SHIPPED, OrderStatus.CANCELLED},
+    OrderStatus.SHIPPED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
 class Order(Base):
     __tablename__ = "orders"
+    # Order history is read per user, newest first (keyset pagination on created_at, id)
+    __table_args__ = (Index("ix_orders_user_created", "user_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -32,29 +45,60 @@ class Order(Base):
     
     total_amount = Column(Float)
     status = Column(String, default=OrderStatus.PENDING)
+    # Bumped on every status change; used for optimistic concurrency in bulk transitions
+    version = Column(Integer, default=1, nullable=False)
     
     payment_method = Column(String)
     payment_details = Column(Text, nullable=True) # JSON for things like MBWay Phone
     
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    # True while the order holds stock taken at checkout (released on cancel/timeout)
+    stock_reserved = Column(Boolean, default=False)
+    # Unpaid by then, the order is cancelled and its stock released; None = no deadline
+    payment_due_at = Column(DateTime, nullable=True)
     
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_patches", "patches", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     jersey_id = Column(Integer, ForeignKey("jerseys.id"))
     
     size = Column(String)
     quantity = Column(Integer)
     custom_name = Column(String, nullable=True)
     custom_number = Column(String, nullable=True)
-    patches = Column(Text, nullable=True) # JSON
+    patches = Column(JSONDocument, nullable=True) # List of patch names
     
     price = Column(Float) # Price at moment of purchase
+    stock_reserved = Column(Boolean, default=False) # Stock was taken for this line at checkout (see reserve_stock)
     
     order = relationship("Order", back_populates="items")
     jersey = relationship("Jersey")
+
+class ArchivedOrder(Base):
+    """
+    Index of orders moved out of the hot tables into compressed archive files.
+    The full order document lives at (archive_file, offset, length) as its own gzip member.
+    """
+    __tablename__ = "archived_orders"
+    __table_args__ = (
+        Index("ix_archived_orders_user_created", "user_id", "created_at", "id"),
+        Index("ix_archived_orders_created", "created_at", "id"), # Exports and rollup rebuilds by date
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False) # Original order id
+    user_id = Column(Integer)
+    created_at = Column(DateTime)
+    status = Column(String)
+
+    archive_file = Column(String) # Relative to ARCHIVE_DIR
+    offset = Column(Integer)
+    length = Column(Integer)
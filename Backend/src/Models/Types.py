@@ -0,0 +1,6 @@
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# JSON document column: JSONB on Postgres (comparable and GIN-indexable), JSON text elsewhere.
+# Values are (de)serialized by the type, so models and routes only see Python lists/dicts.
+JSONDocument = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
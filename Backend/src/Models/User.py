@@ -21,5 +21,12 @@ class User(Base):
 
     addresses = relationship("Address", back_populates="user", cascade="all, delete-orphan")
     user_images = relationship("UserImage", back_populates="user", cascade="all, delete-orphan")
+    avatar = relationship("UserAvatar", back_populates="user", uselist=False, cascade="all, delete-orphan")
     cart_items = relationship("CartItem", back_populates="user", cascade="all, delete-orphan")
     orders = relationship("Order", back_populates="user")
+
+    @property
+    def avatar_url(self):
+        if not self.avatar:
+            return None
+        return f"/profile/avatar/{self.id}/medium?v={self.avatar.version}"
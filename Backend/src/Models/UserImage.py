@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, LargeBinary
+from sqlalchemy.orm import relationship, deferred
 from database import Base
+from datetime import datetime
 
+# Legacy upload history (one row per upload); compacted into UserAvatar by compact_user_images.py
 class UserImage(Base):
     __tablename__ = "user_images"
 
@@ -12,3 +14,19 @@ class UserImage(Base):
     image_data = Column(Text) 
 
     user = relationship("User", back_populates="user_images")
+
+class UserAvatar(Base):
+    """The user's current avatar: one row per user, with pre-resized variants."""
+    __tablename__ = "user_avatars"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, default=1) # Bumped on every upload; part of the avatar URL for cache busting
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    content_type = Column(String) # Of the resized variants
+
+    # Deferred so loading the row (e.g. to build the URL) doesn't pull image bytes
+    small = deferred(Column(LargeBinary))
+    medium = deferred(Column(LargeBinary))
+    large = deferred(Column(LargeBinary))
+
+    user = relationship("User", back_populates="avatar")
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from database import get_db
+from src.Models.User import User
+from src.Dependencies import get_current_admin
+from src.Schemas.AnalyticsSchema import AnalyticsResponse
+from src.Schemas.OrderSchema import OrderStatusTransition, OrderTransitionResponse
+from src.Schemas.MetricsSchema import CompressionRouteStats, MemoryReport, HeapSnapshotResponse
+from src.Controllers.AnalyticsController import get_analytics
+from src.Controllers.OrderController import transition_orders
+from src.Utils.Metrics import metrics_registry
+from src.Utils.MemoryProfile import memory_profiler
+from src.Utils.QueryStats import InstrumentedRoute
+from datetime import date
+from typing import List
+
+router = APIRouter(route_class=InstrumentedRoute)
+
+# Reads only the rollup tables, so latency does not grow with order volume
+@router.get("/analytics", response_model=AnalyticsResponse)
+def read_analytics(
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    top_patches: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    return get_analytics(db, date_from, date_to, top_patches)
+
+# Bulk fulfilment: one guarded UPDATE for the whole batch, per-order outcomes in the response
+@router.post("/orders/status", response_model=OrderTransitionResponse)
+def change_orders_status(transition: OrderStatusTransition, db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
+    return transition_orders(db, transition)
+
+# Response compression counters (see CompressionMiddleware), of every worker when METRICS_MULTIPROC_DIR is set
+@router.get("/compression", response_model=List[CompressionRouteStats])
+def read_compression_stats(admin: User = Depends(get_current_admin)):
+    return [
+        {
+            "route": route, "coding": coding, "source": source, "responses": responses,
+            "bytes_in": bytes_in, "bytes_out": bytes_out, "bytes_saved": bytes_in - bytes_out,
+            "cpu_seconds": round(cpu_seconds, 6)
+        }
+        for (route, coding, source), (responses, bytes_in, bytes_out, cpu_seconds) in sorted(metrics_registry.compression_totals().items())
+    ]
+
+# Sampled per-request memory profiles of the worker that answers (see MemoryProfileMiddleware)
+@router.get("/memory", response_model=MemoryReport)
+def read_memory_profiles(admin: User = Depends(get_current_admin)):
+    return memory_profiler.snapshot()
+
+# Keeps tracemalloc on in this worker (slows it down) so heap snapshots can be taken
+@router.put("/memory/tracing", response_model=MemoryReport)
+def change_memory_tracing(enabled: bool, frames: int = Query(None, ge=1, le=50), admin: User = Depends(get_current_admin)):
+    if enabled:
+        memory_profiler.start_tracing(frames)
+    else:
+        memory_profiler.stop_tracing()
+    return memory_profiler.snapshot()
+
+# Dumps this worker's heap (load the file with tracemalloc.Snapshot.load); growth is since the previous dump
+@router.post("/memory/snapshot", response_model=HeapSnapshotResponse)
+def dump_heap_snapshot(
+    top: int = Query(20, ge=1, le=200),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    admin: User = Depends(get_current_admin)
+):
+    if not memory_profiler.tracing:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="O tracemalloc não está ativo: ative-o primeiro em PUT /admin/memory/tracing")
+    return memory_profiler.dump_heap(top, group_by)
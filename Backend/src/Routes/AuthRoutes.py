@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from database import get_db
 from src.Schemas.UserSchema import UserCreate, UserLogin, UserResponse, Token, UserGoogleLogin
 from src.Controllers.AuthController import register_user, login_user, google_login_user
+from src.Utils.QueryStats import InstrumentedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 @router.post("/register", response_model=UserResponse)
 def register(user: UserCreate, db: Session = Depends(get_db)):
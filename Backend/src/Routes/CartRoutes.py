@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload, selectinload
 from database import get_db
-from src.Models.Cart import CartItem
+from src.Models.Cart import CartItem, CART_LINE
+from src.Models.Catalog import Jersey
 from src.Models.User import User
 from src.Dependencies import get_current_user
 from src.Schemas.CatalogSchema import JerseyResponse
+from src.Utils.QueryStats import InstrumentedRoute
 from pydantic import BaseModel
 from typing import List, Optional
-import json
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 # Schema for incoming cart item
 class CartItemCreate(BaseModel):
@@ -29,7 +32,7 @@ class CartItemResponse(BaseModel):
     quantity: int
     custom_name: Optional[str]
     custom_number: Optional[str]
-    patches: Optional[List[str]]
+    patches: Optional[List[str]] = []
     final_price: float
     
     class Config:
@@ -37,122 +40,73 @@ class CartItemResponse(BaseModel):
 
 @router.get("/", response_model=List[CartItemResponse])
 def get_cart(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    # Parse patches JSON and ensure jersey is attached
-    response_items = []
-    for item in items:
-        # We need to manually handle the JSON field if we aren't using a custom serializer
-        # But we also want to return the full Jersey object.
-        # Constructing the dict explicitly is safest given the mixed field types.
-        patches_list = []
-        if item.patches:
-            try:
-                patches_list = json.loads(item.patches)
-            except:
-                patches_list = []
-        
-        response_items.append({
-            "id": item.id,
-            "jersey_id": item.jersey_id,
-            "jersey": item.jersey, # SQLAlchemy relationship
-            "size": item.size,
-            "quantity": item.quantity,
-            "custom_name": item.custom_name,
-            "custom_number": item.custom_number,
-            "patches": patches_list,
-            "final_price": item.final_price
-        })
-    return response_items
+    # patches is a native JSON column, so rows validate directly against CartItemResponse.
+    # The nested JerseyResponse reads team, type and images: loaded up front, not per item
+    return (
+        db.query(CartItem)
+        .options(joinedload(CartItem.jersey).options(joinedload(Jersey.team), joinedload(Jersey.jersey_type), selectinload(Jersey.images)))
+        .filter(CartItem.user_id == current_user.id)
+        .all()
+    )
 
 @router.post("/", response_model=CartItemResponse)
 def add_to_cart(item: CartItemCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Check if item exists (matching all criteria)
-    patches_json = json.dumps(item.patches.sort() if item.patches else [])
-    
-    # We need to sort incoming patches to match strictly? 
-    # Let's simplify: Serialize incoming and compare.
-    # Ideally we'd search flexibly, but for exact cart grouping:
-    
-    # Logic: Search for existing item with same jersey, size, custom fields.
-    # Then compare patches.
-    # This is complex to do efficiently in SQL with JSON strings.
-    # For now, let's just add the item. The user said "store items", granular merging is an optimization.
-    # Actually, if we don't merge, we'll have duplicate rows. 
-    # Let's try to find it in python.
-    
-    existing_items = db.query(CartItem).filter(
+    # Patches are stored sorted, so an identical selection compares equal in the database
+    incoming_patches = sorted(item.patches) if item.patches else []
+    values = {
+        "user_id": current_user.id,
+        "jersey_id": item.jersey_id,
+        "size": item.size,
+        "quantity": item.quantity,
+        "custom_name": item.custom_name,
+        "custom_number": item.custom_number,
+        "patches": incoming_patches,
+        "final_price": item.final_price
+    }
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # One statement against the cart line's unique index: concurrent adds of the same
+        # line add up instead of each inserting a row, and a line claimed by a checkout
+        # in the meantime is simply inserted again
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(CartItem).values(**values)
+        stmt = stmt.on_conflict_do_update(index_elements=list(CART_LINE), set_={"quantity": CartItem.quantity + stmt.excluded.quantity})
+        line_id = db.execute(stmt.returning(CartItem.id)).scalar_one()
+        db.commit()
+        return db.get(CartItem, line_id)
+
+    # Generic fallback: increment the matching line in SQL, or insert a new one
+    patches_match = CartItem.patches == incoming_patches
+    if not incoming_patches:
+        patches_match = patches_match | CartItem.patches.is_(None) # Rows saved without patches
+    same_line = (
         CartItem.user_id == current_user.id,
         CartItem.jersey_id == item.jersey_id,
         CartItem.size == item.size,
         CartItem.custom_name == item.custom_name,
-        CartItem.custom_number == item.custom_number
-    ).all()
-
-    target_item = None
-    incoming_patches = sorted(item.patches) if item.patches else []
-    
-    for db_item in existing_items:
-        db_patches = []
-        if db_item.patches:
-            try:
-                db_patches = sorted(json.loads(db_item.patches))
-            except:
-                pass
-        
-        if db_patches == incoming_patches:
-            target_item = db_item
-            break
-    
-    if target_item:
-        target_item.quantity += item.quantity
-        db.commit()
-        db.refresh(target_item)
-        target_patches = []
-        if target_item.patches:
-            try:
-                target_patches = json.loads(target_item.patches)
-            except:
-                pass
-                
-        return {
-            "id": target_item.id,
-            "jersey_id": target_item.jersey_id,
-            "jersey": target_item.jersey,
-            "size": target_item.size,
-            "quantity": target_item.quantity,
-            "custom_name": target_item.custom_name,
-            "custom_number": target_item.custom_number,
-            "patches": target_patches,
-            "final_price": target_item.final_price
-        }
-    
-    # Create new
-    new_item = CartItem(
-        user_id=current_user.id,
-        jersey_id=item.jersey_id,
-        size=item.size,
-        quantity=item.quantity,
-        custom_name=item.custom_name,
-        custom_number=item.custom_number,
-        patches=json.dumps(incoming_patches),
-        final_price=item.final_price
+        CartItem.custom_number == item.custom_number,
+        patches_match
     )
+    target_item = db.query(CartItem).filter(*same_line).first()
+    if target_item:
+        merged = db.execute(
+            update(CartItem)
+            .where(CartItem.id == target_item.id, *same_line)
+            .values(quantity=CartItem.quantity + item.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if merged.rowcount:
+            db.commit()
+            db.refresh(target_item)
+            return target_item
+        db.expunge(target_item) # Claimed by a checkout since it was read
+
+    new_item = CartItem(**values)
     db.add(new_item)
     db.commit()
     db.refresh(new_item)
-    
-    # Return formatted response
-    return {
-        "id": new_item.id,
-        "jersey_id": new_item.jersey_id,
-        "jersey": new_item.jersey,
-        "size": new_item.size,
-        "quantity": new_item.quantity,
-        "custom_name": new_item.custom_name,
-        "custom_number": new_item.custom_number,
-        "patches": incoming_patches,
-        "final_price": new_item.final_price
-    }
+    return new_item
 
 @router.delete("/{item_id}")
 def remove_from_cart(item_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
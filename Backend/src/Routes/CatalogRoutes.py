@@ -1,30 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 from src.Models.User import User
-from src.Dependencies import get_current_user
+from src.Dependencies import get_current_admin
 from src.Schemas.CatalogSchema import (
     LeagueCreate, LeagueResponse, 
     TeamCreate, TeamResponse,
     JerseyCreate, JerseyResponse,
     JerseyTypeCreate, JerseyTypeResponse,
-    PaginatedJerseyResponse
+    PaginatedJerseyResponse, CatalogBootstrapResponse, SuggestionResponse,
+    StockEntry, StockResponse
 )
 from src.Controllers.CatalogController import (
-    create_league, get_leagues, delete_league,
-    create_team, get_teams, delete_team,
-    create_jersey, get_jerseys, delete_jersey, get_jersey_by_id, update_jersey,
+    create_league, get_leagues, delete_league, set_league_image,
+    create_team, get_teams, delete_team, set_team_image,
+    create_jersey, get_jerseys, delete_jersey, update_jersey, add_jersey_images,
     create_jersey_type, get_jersey_types, update_jersey_type, delete_jersey_type
 )
-
-router = APIRouter()
-
-# Dependency to check for Admin role
-def get_current_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Acesso negado. Apenas administradores.")
-    return current_user
+from src.Controllers.InventoryController import get_stock, set_stock
+from src.Controllers.ColorController import DEFAULT_COLOR_TOLERANCE
+from src.Controllers.SimilarityController import get_similar_jerseys, SIMILAR_JERSEYS_K
+from src.Controllers.BootstrapController import get_catalog_bootstrap
+from src.Controllers.SuggestController import suggest, MAX_SUGGESTIONS
+from src.Controllers.DocumentController import get_jersey_document
+from src.Utils.Uploads import UploadRoute
+from src.Utils.Serialization import ModelSerializer, ORJSONResponse, project
+import orjson
+
+router = APIRouter(route_class=UploadRoute) # Caps multipart bodies as they arrive
+
+# High-volume jersey routes serialize ORM rows with a prebuilt serializer and orjson;
+# the response models stay for documentation. `fields` selects a sparse fieldset,
+# e.g. ?fields=id,team_name,season,jersey_type.current_price,images.variants
+jersey_serializer = ModelSerializer(JerseyResponse)
+FIELDS_DESCRIPTION = "Campos a devolver, separados por vírgulas (ex.: id,team_name,jersey_type.current_price)"
+
+# --- Bootstrap ---
+@router.get("/bootstrap", response_model=CatalogBootstrapResponse)
+def read_bootstrap(request: Request, db: Session = Depends(get_db)):
+    # Leagues (with their teams) and types in one pre-serialized, pre-compressed response
+    return get_catalog_bootstrap(db).response(request)
 
 # --- Jersey Types (Pricing) ---
 @router.post("/types", response_model=JerseyTypeResponse)
@@ -56,6 +72,10 @@ def list_leagues(db: Session = Depends(get_db)):
 def remove_league(league_id: int, db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
     return delete_league(db, league_id)
 
+@router.put("/leagues/{league_id}/image", response_model=LeagueResponse)
+def upload_league_image(league_id: int, file: UploadFile = File(...), db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
+    return set_league_image(db, league_id, file)
+
 # --- Teams ---
 @router.post("/teams", response_model=TeamResponse)
 def add_team(team: TeamCreate, db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
@@ -69,6 +89,10 @@ def list_teams(league_id: int = None, db: Session = Depends(get_db)):
 def remove_team(team_id: int, db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
     return delete_team(db, team_id)
 
+@router.put("/teams/{team_id}/image", response_model=TeamResponse)
+def upload_team_image(team_id: int, file: UploadFile = File(...), db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
+    return set_team_image(db, team_id, file)
+
 # --- Jerseys ---
 @router.post("/jerseys", response_model=JerseyResponse)
 def add_jersey(jersey: JerseyCreate, db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
@@ -84,13 +108,40 @@ def list_jerseys(
     limit: int = 20, 
     sort_by: str = None, 
     search: str = None, 
+    color: str = None, # Hex code or colour name, matched visually against extracted dominant colours
+    tolerance: float = Query(DEFAULT_COLOR_TOLERANCE, gt=0, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
-    return get_jerseys(db, team_id, league_id, jersey_type_id, main_color, page, limit, sort_by, search)
+    include = jersey_serializer.parse_fields(fields)
+    result = get_jerseys(db, team_id, league_id, jersey_type_id, main_color, page, limit, sort_by, search, color, tolerance, include)
+    return ORJSONResponse({**result, "data": jersey_serializer.dump_many(result["data"], include)})
+
+@router.get("/suggest", response_model=List[SuggestionResponse])
+def read_suggestions(q: str = Query(..., max_length=100), limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS), db: Session = Depends(get_db)):
+    # Typeahead for the search box, answered from an in-memory prefix index
+    return suggest(db, q, limit)
 
 @router.get("/jerseys/{jersey_id}", response_model=JerseyResponse)
-def read_jersey(jersey_id: int, db: Session = Depends(get_db)):
-    return get_jersey_by_id(db, jersey_id)
+def read_jersey(request: Request, jersey_id: int, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), db: Session = Depends(get_db)):
+    # Pre-rendered document (see DocumentController), served without re-validation and pre-compressed
+    include = jersey_serializer.parse_fields(fields)
+    document = get_jersey_document(db, jersey_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Camisola não encontrada")
+    if include is not None:
+        return ORJSONResponse(project(orjson.loads(document.body), include))
+    return document.response(request)
+
+@router.get("/jerseys/{jersey_id}/similar", response_model=List[JerseyResponse])
+def read_similar_jerseys(
+    jersey_id: int,
+    limit: int = Query(8, ge=1, le=SIMILAR_JERSEYS_K),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db)
+):
+    include = jersey_serializer.parse_fields(fields)
+    return ORJSONResponse(jersey_serializer.dump_many(get_similar_jerseys(db, jersey_id, limit), include))
 
 @router.put("/jerseys/{jersey_id}", response_model=JerseyResponse)
 def modify_jersey(jersey_id: int, jersey: JerseyCreate, db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
@@ -99,3 +150,23 @@ def modify_jersey(jersey_id: int, jersey: JerseyCreate, db: Session = Depends(ge
 @router.delete("/jerseys/{jersey_id}")
 def remove_jersey(jersey_id: int, db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
     return delete_jersey(db, jersey_id)
+
+@router.post("/jerseys/{jersey_id}/images", response_model=JerseyResponse)
+def upload_jersey_images(
+    jersey_id: int,
+    files: List[UploadFile] = File(...),
+    main_index: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    # Sync route: files are copied in chunks from Starlette's spooled temp files in the threadpool
+    return add_jersey_images(db, jersey_id, files, main_index)
+
+# --- Stock ---
+@router.get("/jerseys/{jersey_id}/stock", response_model=List[StockResponse])
+def read_stock(jersey_id: int, db: Session = Depends(get_db)):
+    return get_stock(db, jersey_id)
+
+@router.put("/jerseys/{jersey_id}/stock", response_model=List[StockResponse])
+def modify_stock(jersey_id: int, entries: List[StockEntry], db: Session = Depends(get_db), admin: User = Depends(get_current_admin)):
+    return set_stock(db, jersey_id, entries)
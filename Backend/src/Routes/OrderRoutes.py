@@ -1,36 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, delete, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload, joinedload
 from database import get_db
-from src.Models.Order import Order, OrderItem, OrderStatus
+from src.Models.Order import Order, OrderItem, OrderStatus, ArchivedOrder
 from src.Models.Cart import CartItem
+from src.Models.Catalog import Jersey
 from src.Models.User import User
-from src.Dependencies import get_current_user
-from pydantic import BaseModel
-from typing import List, Optional
-import json
-
-router = APIRouter()
-
-class OrderCreate(BaseModel):
-    shipping_name: str
-    shipping_address: str
-    shipping_city: str
-    shipping_postal_code: str
-    shipping_country: str
-    shipping_phone: str
-    nif: Optional[str] = None
-    payment_method: str
-    payment_details: Optional[str] = None # JSON string or specific fields
+from src.Dependencies import get_current_user, get_current_admin
+from src.Controllers.InventoryController import reserve_stock, stock_lines, payment_deadline
+from src.Controllers.AnalyticsController import apply_orders
+from src.Utils.Idempotency import hash_request, get_stored_response, store_response
+from src.Utils.OrderExport import stream_csv, stream_ndjson
+from src.Utils.OrderArchive import get_archived_entries, get_archived_order, read_archived_order
+from src.Schemas.OrderSchema import OrderCreate, PaginatedOrderResponse, OrderDetailResponse
+from src.Utils.QueryStats import InstrumentedRoute
+from typing import Optional
+from datetime import datetime, date, time, timedelta
+import base64
+
+router = APIRouter(route_class=InstrumentedRoute)
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_order(order_data: OrderCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # 1. Get Cart Items
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    if not cart_items:
-        raise HTTPException(status_code=400, detail="Cart is empty")
+def create_order(
+    order_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # 0. Replay retried requests without touching the cart or orders tables
+    request_hash = hash_request(order_data.model_dump())
+    if idempotency_key:
+        stored = get_stored_response(db, current_user.id, idempotency_key, request_hash)
+        if stored:
+            return stored
+
+    # 1. Claim the cart: one DELETE ... RETURNING removes the lines and hands them back.
+    # It locks the rows (Postgres) or takes the write lock (SQLite) before anything is read,
+    # so an overlapping checkout claims nothing and a line merged meanwhile is either in
+    # this order or left in the cart. Everything below works from these rows only.
+    has_items = db.query(CartItem.id).filter(CartItem.user_id == current_user.id).first()
+    claimed = [] if not has_items else db.execute(
+        delete(CartItem)
+        .where(CartItem.user_id == current_user.id)
+        .returning(
+            CartItem.id,
+            CartItem.jersey_id,
+            CartItem.size,
+            CartItem.quantity,
+            CartItem.custom_name,
+            CartItem.custom_number,
+            CartItem.patches,
+            CartItem.final_price
+        )
+    ).all()
+    if not claimed:
+        # Whoever emptied the cart has committed by now: a concurrent retry replays its result
+        stored = get_stored_response(db, current_user.id, idempotency_key, request_hash) if idempotency_key else None
+        if stored:
+            return stored
+        if not has_items:
+            raise HTTPException(status_code=400, detail="Cart is empty")
+        raise HTTPException(status_code=409, detail="Cart was checked out by another request")
+    claimed.sort(key=lambda line: line.id)
 
-    # 2. Calculate Total
-    total_amount = sum(item.final_price * item.quantity for item in cart_items)
+    # 2. Reserve stock per (jersey, size); raises 409 and rolls back (restoring the cart) if anything is short.
+    # Sizes without a stock row are untracked; only the lines that took stock are released later
+    reserved = reserve_stock(db, stock_lines(claimed))
 
     # 3. Create Order
     new_order = Order(
@@ -42,46 +79,133 @@ def create_order(order_data: OrderCreate, current_user: User = Depends(get_curre
         shipping_country=order_data.shipping_country,
         shipping_phone=order_data.shipping_phone,
         nif=order_data.nif,
-        total_amount=total_amount,
+        total_amount=sum(line.final_price * line.quantity for line in claimed),
         status=OrderStatus.PENDING,
         payment_method=order_data.payment_method,
-        payment_details=order_data.payment_details
+        payment_details=order_data.payment_details,
+        stock_reserved=bool(reserved),
+        payment_due_at=payment_deadline(order_data.payment_method)
     )
     db.add(new_order)
     db.flush() # Flush to get order ID
 
-    # 4. Create Order Items
-    for item in cart_items:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            jersey_id=item.jersey_id,
-            size=item.size,
-            quantity=item.quantity,
-            custom_name=item.custom_name,
-            custom_number=item.custom_number,
-            patches=item.patches,
-            price=item.final_price
-        )
-        db.add(order_item)
+    # 4. Insert the claimed lines as order items with a single multi-row INSERT
+    db.execute(insert(OrderItem), [
+        {
+            "order_id": new_order.id,
+            "jersey_id": line.jersey_id,
+            "size": line.size,
+            "quantity": line.quantity,
+            "custom_name": line.custom_name,
+            "custom_number": line.custom_number,
+            "patches": line.patches,
+            "price": line.final_price,
+            "stock_reserved": (line.jersey_id, line.size) in reserved
+        }
+        for line in claimed
+    ])
+    apply_orders(db, [new_order.id])
 
-    # 5. Clear Cart
-    db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
+    # 5. Store the response for retries and commit everything together
+    response = {"message": "Order placed successfully", "order_id": new_order.id}
+    if idempotency_key:
+        store_response(db, current_user.id, idempotency_key, request_hash, status.HTTP_201_CREATED, response)
 
-    # 6. Commit
-    db.commit()
-    db.refresh(new_order)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key committed first: discard our work and replay its result
+        db.rollback()
+        stored = get_stored_response(db, current_user.id, idempotency_key, request_hash) if idempotency_key else None
+        if not stored:
+            raise
+        return stored
 
-    return {"message": "Order placed successfully", "order_id": new_order.id}
+    return response
 
-@router.get("/", response_model=List[dict]) # Simple response for now
-def get_user_orders(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
-    return [
-        {
-            "id": o.id,
-            "date": o.created_at,
-            "status": o.status,
-            "total": o.total_amount,
-            "payment_method": o.payment_method
-        } for o in orders
-    ]
+def encode_cursor(order) -> str:
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(order_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def order_items_loader():
+    # Items, their jerseys and the jersey's team/type load in two extra queries regardless of page size
+    return selectinload(Order.items).selectinload(OrderItem.jersey).options(
+        joinedload(Jersey.team),
+        joinedload(Jersey.jersey_type)
+    )
+
+@router.get("/", response_model=PaginatedOrderResponse)
+def get_user_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    query = db.query(Order).options(order_items_loader()).filter(Order.user_id == current_user.id)
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        cursor_created_at, cursor_id = position
+        query = query.filter(or_(
+            Order.created_at < cursor_created_at,
+            and_(Order.created_at == cursor_created_at, Order.id < cursor_id)
+        ))
+
+    # Fetch one extra row to know whether there is a next page
+    orders = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+
+    # Older orders may have moved to the archive: merge both sources by (created_at, id)
+    archived = get_archived_entries(db, current_user.id, position, limit + 1)
+    if archived:
+        orders = sorted(orders + archived, key=lambda o: (o.created_at, o.id), reverse=True)
+
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    next_cursor = encode_cursor(orders[-1]) if has_more else None
+
+    return {
+        "data": [read_archived_order(o) if isinstance(o, ArchivedOrder) else o for o in orders],
+        "next_cursor": next_cursor
+    }
+
+# Declared before /{order_id} so "export" is not parsed as an id
+@router.get("/export")
+def export_orders(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    admin: User = Depends(get_current_admin)
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="Intervalo de datas inválido")
+
+    # Whole days, "to" inclusive
+    start = datetime.combine(date_from, time.min)
+    end = datetime.combine(date_to + timedelta(days=1), time.min)
+    filename = f"orders_{date_from.isoformat()}_{date_to.isoformat()}.{format}"
+
+    if format == "ndjson":
+        body, media_type = stream_ndjson(start, end), "application/x-ndjson"
+    else:
+        body, media_type = stream_csv(start, end), "text/csv; charset=utf-8"
+
+    return StreamingResponse(body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@router.get("/{order_id}", response_model=OrderDetailResponse)
+def get_user_order(order_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    order = db.query(Order).options(order_items_loader()).filter(
+        Order.id == order_id,
+        Order.user_id == current_user.id
+    ).first()
+    if not order:
+        order = get_archived_order(db, current_user.id, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Encomenda não encontrada")
+    return order
@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, Response, UploadFile, File, status
 from sqlalchemy.orm import Session
 from database import get_db
 from src.Dependencies import get_current_user
 from src.Models.User import User
-from src.Models.User import User
-from src.Schemas.ProfileSchema import ProfileResponse, AddressCreate, AddressResponse, UserUpdateInfo, UserImageCreate, UserImageResponse, PasswordChange
-from src.Controllers.ProfileController import get_user_profile, update_user_info, add_address, update_address, delete_address, upload_image, change_password
+from src.Schemas.ProfileSchema import ProfileResponse, AddressCreate, AddressResponse, UserUpdateInfo, UserImageCreate, AvatarResponse, PasswordChange
+from src.Utils.Uploads import UploadRoute
+from src.Controllers.ProfileController import get_user_profile, update_user_info, add_address, update_address, delete_address, upload_image, upload_avatar_file, get_avatar, change_password
 
-router = APIRouter()
+router = APIRouter(route_class=UploadRoute) # Caps multipart bodies as they arrive
 
 @router.get("/me", response_model=ProfileResponse)
 def read_users_me(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -21,10 +21,14 @@ def update_info(info: UserUpdateInfo, current_user: User = Depends(get_current_u
 def update_password(password_data: PasswordChange, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     return change_password(db, current_user.id, password_data)
 
-@router.post("/me/image", response_model=UserImageResponse)
+@router.post("/me/image", response_model=AvatarResponse)
 def upload_user_image(image: UserImageCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     return upload_image(db, current_user.id, image.image_data)
 
+@router.post("/me/avatar", response_model=AvatarResponse)
+def upload_user_avatar(file: UploadFile = File(...), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return upload_avatar_file(db, current_user.id, file)
+
 @router.post("/me/address", response_model=AddressResponse)
 def create_address(address: AddressCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     return add_address(db, current_user.id, address)
@@ -36,3 +40,13 @@ def edit_address(address_id: int, address: AddressCreate, current_user: User = D
 @router.delete("/me/address/{address_id}")
 def remove_address(address_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     return delete_address(db, current_user.id, address_id)
+
+# Public so it can be used directly in <img src>; the URL carries ?v=<version>, so variants can be cached for long
+@router.get("/avatar/{user_id}/{size}")
+def read_avatar(user_id: int, size: str, request: Request, db: Session = Depends(get_db)):
+    avatar, data = get_avatar(db, user_id, size)
+    etag = f'"{user_id}-{avatar.version}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=avatar.content_type, headers=headers)
@@ -3,9 +3,10 @@ from sqlalchemy.orm import Session
 from database import get_db
 from src.Schemas.UserSchema import UserResponse
 from src.Controllers.UserController import get_all_users
+from src.Utils.QueryStats import InstrumentedRoute
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 @router.get("/", response_model=List[UserResponse])
 def read_users(db: Session = Depends(get_db)):
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+class DailySales(BaseModel):
+    day: date
+    orders: int
+    units: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+class SalesBreakdown(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    units: int
+    revenue: float
+
+class PatchPopularity(BaseModel):
+    patch: str
+    units: int
+
+class AnalyticsResponse(BaseModel):
+    date_from: date
+    date_to: date
+    orders: int
+    units: int
+    revenue: float
+    daily: List[DailySales] = []
+    by_team: List[SalesBreakdown] = []
+    by_league: List[SalesBreakdown] = []
+    by_jersey_type: List[SalesBreakdown] = []
+    by_size: List[SalesBreakdown] = []
+    top_patches: List[PatchPopularity] = []
@@ -1,7 +1,10 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
 from datetime import datetime
 
+# Derivative URLs of an uploaded image: size (card/detail/zoom) -> format (avif/webp) -> URL
+ImageVariants = Dict[str, Dict[str, str]]
+
 # --- League Schemas ---
 class LeagueBase(BaseModel):
     name: str
@@ -12,6 +15,8 @@ class LeagueCreate(LeagueBase):
 class LeagueResponse(LeagueBase):
     id: int
     image_base64: Optional[str] = None
+    image_url: Optional[str] = None
+    variants: Optional[ImageVariants] = None
 
     class Config:
         from_attributes = True
@@ -27,6 +32,8 @@ class TeamCreate(TeamBase):
 class TeamResponse(TeamBase):
     id: int
     image_base64: Optional[str] = None
+    image_url: Optional[str] = None
+    variants: Optional[ImageVariants] = None
     league_name: Optional[str] = None # Optional convenience field
 
     class Config:
@@ -50,12 +57,21 @@ class JerseyTypeResponse(JerseyTypeBase):
 
 # --- Jersey Schemas ---
 class JerseyImageBase(BaseModel):
-    image_base64: str
+    # Either inline base64 data or the image_url of an already uploaded file
+    image_base64: Optional[str] = None
+    image_url: Optional[str] = None
     is_main: bool = False
 
+    @model_validator(mode='after')
+    def check_source(self):
+        if not self.image_base64 and not self.image_url:
+            raise ValueError('A imagem precisa de image_base64 ou image_url')
+        return self
+
 class JerseyImageResponse(JerseyImageBase):
     id: int
     jersey_id: int
+    variants: Optional[ImageVariants] = None
     
     class Config:
         from_attributes = True
@@ -70,10 +86,18 @@ class JerseyBase(BaseModel):
 class JerseyCreate(JerseyBase):
     images: List[JerseyImageBase] = []
 
+class DuplicateImageWarning(BaseModel):
+    image_id: int
+    position: int
+    duplicate_of: int # Existing image that looks the same
+    jersey_id: int # Jersey that image belongs to
+    distance: int # Differing pHash bits (0 = visually identical)
+
 class JerseyResponse(JerseyBase):
     id: int
     created_at: datetime
     images: List[JerseyImageResponse] = []
+    duplicate_warnings: List[DuplicateImageWarning] = [] # Only filled in by create/update
     team_name: Optional[str] = None 
     jersey_type: Optional[JerseyTypeResponse] = None
     
@@ -86,3 +110,30 @@ class PaginatedJerseyResponse(BaseModel):
     page: int
     total_pages: int
 
+class SuggestionResponse(BaseModel):
+    kind: str # team, league, type or season
+    id: Optional[int] = None # Filter value for team/league/type; seasons are searched by label
+    label: str
+    count: int # Jerseys matching the suggestion
+
+# --- Bootstrap Schemas ---
+class LeagueWithTeamsResponse(LeagueResponse):
+    teams: List[TeamResponse] = []
+
+class CatalogBootstrapResponse(BaseModel):
+    # All reference data the storefront needs on load, teams nested under their league
+    leagues: List[LeagueWithTeamsResponse]
+    types: List[JerseyTypeResponse]
+
+
+# --- Stock Schemas ---
+class StockEntry(BaseModel):
+    size: str
+    quantity: int = Field(ge=0)
+
+class StockResponse(StockEntry):
+    id: int
+    jersey_id: int
+
+    class Config:
+        from_attributes = True
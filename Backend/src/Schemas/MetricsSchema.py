@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class CompressionRouteStats(BaseModel):
+    route: str
+    coding: str
+    source: str # dynamic, precompressed or identity
+    responses: int
+    bytes_in: int
+    bytes_out: int
+    bytes_saved: int
+    cpu_seconds: float
+
+class MemorySite(BaseModel):
+    site: str # file:line (<- caller file:line with MEMORY_PROFILE_FRAMES > 1)
+    size_mb: float
+    count: int
+    size_diff_mb: Optional[float] = None # Heap snapshots: growth since the previous one
+
+class MemoryRouteStats(BaseModel):
+    route: str
+    samples: int
+    peak_max_mb: float
+    peak_mean_mb: float
+    top_sites: List[MemorySite] # Of the request with the largest peak
+
+class MemoryReport(BaseModel):
+    pid: int
+    rate: float
+    tracing: bool
+    rss_mb: Optional[float] = None
+    traced_mb: Optional[float] = None
+    routes: List[MemoryRouteStats]
+
+class HeapSnapshotResponse(BaseModel):
+    path: str
+    previous_path: Optional[str] = None
+    traced_mb: float
+    rss_mb: Optional[float] = None
+    top_sites: List[MemorySite]
+    growth: List[MemorySite]
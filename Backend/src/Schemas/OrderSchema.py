@@ -0,0 +1,98 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Literal
+from datetime import datetime
+from src.Models.Order import OrderStatus
+import json
+
+class OrderCreate(BaseModel):
+    shipping_name: str
+    shipping_address: str
+    shipping_city: str
+    shipping_postal_code: str
+    shipping_country: str
+    shipping_phone: str
+    nif: Optional[str] = None
+    payment_method: str
+    payment_details: Optional[str] = None # JSON string or specific fields
+
+# Lightweight jersey view for order history (no images)
+class OrderJerseySummary(BaseModel):
+    id: int
+    team_name: Optional[str] = None
+    season: str
+    main_color: Optional[str] = None
+    jersey_type_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class OrderItemResponse(BaseModel):
+    id: int
+    jersey_id: int
+    jersey: Optional[OrderJerseySummary] = None
+    size: str
+    quantity: int
+    custom_name: Optional[str] = None
+    custom_number: Optional[str] = None
+    patches: List[str] = []
+    price: float
+
+    @field_validator('patches', mode='before')
+    def parse_patches(cls, v):
+        # Stored as a JSON string on the model
+        if v is None:
+            return []
+        if isinstance(v, str):
+            try:
+                return json.loads(v)
+            except ValueError:
+                return []
+        return v
+
+    class Config:
+        from_attributes = True
+
+class OrderResponse(BaseModel):
+    id: int
+    date: datetime = Field(validation_alias="created_at")
+    status: str
+    total: float = Field(validation_alias="total_amount")
+    payment_method: str
+    version: int = 1
+    items: List[OrderItemResponse] = []
+
+    class Config:
+        from_attributes = True
+
+class OrderDetailResponse(OrderResponse):
+    shipping_name: str
+    shipping_address: str
+    shipping_city: str
+    shipping_postal_code: str
+    shipping_country: str
+    shipping_phone: str
+    nif: Optional[str] = None
+
+class PaginatedOrderResponse(BaseModel):
+    data: List[OrderResponse]
+    next_cursor: Optional[str] = None
+
+# --- Bulk status transitions (admin) ---
+class OrderVersionRef(BaseModel):
+    id: int
+    version: Optional[int] = None # Expected version; omitted = only the status is checked
+
+class OrderStatusTransition(BaseModel):
+    orders: List[OrderVersionRef] = Field(min_length=1, max_length=1000)
+    from_status: OrderStatus
+    to_status: OrderStatus
+
+class OrderTransitionOutcome(BaseModel):
+    id: int
+    outcome: Literal["updated", "not_found", "status_mismatch", "version_conflict"]
+    status: Optional[str] = None
+    version: Optional[int] = None
+
+class OrderTransitionResponse(BaseModel):
+    updated: int
+    results: List[OrderTransitionOutcome]
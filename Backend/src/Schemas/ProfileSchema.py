@@ -27,9 +27,8 @@ class AddressResponse(AddressBase):
 class UserImageCreate(BaseModel):
     image_data: str # Base64 string
 
-class UserImageResponse(UserImageCreate):
-    id: int
-    user_id: int
+class AvatarResponse(BaseModel):
+    avatar_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -55,7 +54,7 @@ class ProfileResponse(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
     addresses: List[AddressResponse] = []
-    user_images: List[UserImageResponse] = [] 
+    avatar_url: Optional[str] = None # Served by /profile/avatar/{user_id}/{size}
 
     class Config:
         from_attributes = True
@@ -0,0 +1,146 @@
+from PIL import Image
+from typing import List, Optional, Tuple
+import numpy as np
+import unicodedata
+
+# Canonical main_color buckets (the values offered by the admin and catalog filters),
+# each with one or more reference shades used to classify extracted colours.
+COLOR_BUCKETS = {
+    "Azul": ["#1f3a93", "#0b1f4b", "#4a90d9", "#87ceeb"],
+    "Vermelho": ["#c8102e", "#e10600", "#7b1e2b"],
+    "Verde": ["#00843d", "#0b5d1e", "#6cc24a"],
+    "Branco": ["#ffffff", "#f2f2f2"],
+    "Preto": ["#000000", "#1c1c1c"],
+    "Rosa": ["#ff69b4", "#f4a6c1"],
+    "Roxo": ["#5b2c83", "#8e44ad"],
+    "Amarelo": ["#ffd700", "#fff200"],
+    "Laranja": ["#ff7f00", "#f39c12"],
+    "Cinzento": ["#808080", "#b0b0b0", "#4d4d4d"],
+    "Dourado": ["#b8860b", "#d4af37"],
+    "Bege": ["#e8d8b0", "#f5f0dc"]
+}
+
+# Hand-typed spellings seen in main_color, accent-folded and lower-cased
+COLOR_SYNONYMS = {
+    "azul": "Azul", "blue": "Azul", "navy": "Azul", "marinho": "Azul", "azul marinho": "Azul", "celeste": "Azul", "azul claro": "Azul", "azul escuro": "Azul",
+    "vermelho": "Vermelho", "red": "Vermelho", "encarnado": "Vermelho", "grena": "Vermelho", "bordeaux": "Vermelho", "bordo": "Vermelho", "maroon": "Vermelho",
+    "verde": "Verde", "green": "Verde",
+    "branco": "Branco", "white": "Branco",
+    "preto": "Preto", "black": "Preto", "negro": "Preto",
+    "rosa": "Rosa", "pink": "Rosa",
+    "roxo": "Roxo", "purple": "Roxo", "violeta": "Roxo", "lilas": "Roxo",
+    "amarelo": "Amarelo", "yellow": "Amarelo",
+    "laranja": "Laranja", "orange": "Laranja",
+    "cinzento": "Cinzento", "cinza": "Cinzento", "grey": "Cinzento", "gray": "Cinzento", "prata": "Cinzento", "silver": "Cinzento",
+    "dourado": "Dourado", "gold": "Dourado", "ouro": "Dourado",
+    "bege": "Bege", "beige": "Bege", "creme": "Bege", "cream": "Bege"
+}
+
+def fold(value: str) -> str:
+    """Lower-cased, accent-free, single-spaced text (used for matching hand-typed values)."""
+    value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    return " ".join(value.replace("-", " ").lower().split())
+
+def parse_hex(value: str) -> Optional[Tuple[int, int, int]]:
+    value = value.strip().lstrip("#")
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    if len(value) != 6:
+        return None
+    try:
+        return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+def to_hex(rgb) -> str:
+    return "#" + "".join(f"{int(round(c)):02x}" for c in rgb)
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB (..., 3) in 0-255 to CIELAB (D65), where Euclidean distance approximates perceived difference."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = linear @ np.array([
+        [0.4124, 0.2126, 0.0193],
+        [0.3576, 0.7152, 0.1192],
+        [0.1805, 0.0722, 0.9505]
+    ]) / np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16 / 116)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+_BUCKET_NAMES = [name for name, shades in COLOR_BUCKETS.items() for _ in shades]
+_BUCKET_LAB = rgb_to_lab(np.array([parse_hex(shade) for shades in COLOR_BUCKETS.values() for shade in shades]))
+
+def nearest_bucket(lab) -> str:
+    return _BUCKET_NAMES[int(np.argmin(np.linalg.norm(_BUCKET_LAB - np.asarray(lab), axis=1)))]
+
+def canonical_color(value: str) -> Optional[str]:
+    """Canonical bucket for a colour name or hex code, or None if it is not recognised."""
+    if not value:
+        return None
+    folded = fold(value)
+    for name in COLOR_BUCKETS:
+        if folded == fold(name):
+            return name
+    if folded in COLOR_SYNONYMS:
+        return COLOR_SYNONYMS[folded]
+    rgb = parse_hex(value) if value.strip().startswith("#") else None
+    return nearest_bucket(rgb_to_lab(np.array(rgb))) if rgb else None
+
+def _kmeans(points: np.ndarray, k: int, iterations: int = 20, seed: int = 0):
+    """Plain vectorised k-means with k-means++ seeding; returns (centroids, labels)."""
+    rng = np.random.default_rng(seed)
+    centroids = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        nearest = np.min(((points[:, None, :] - np.array(centroids)[None]) ** 2).sum(-1), axis=1)
+        if nearest.sum() == 0:
+            break
+        centroids.append(points[rng.choice(len(points), p=nearest / nearest.sum())])
+    centroids = np.array(centroids)
+
+    for _ in range(iterations):
+        labels = np.argmin(((points[:, None, :] - centroids[None]) ** 2).sum(-1), axis=1)
+        counts = np.bincount(labels, minlength=len(centroids))
+        sums = np.stack([np.bincount(labels, weights=points[:, axis], minlength=len(centroids)) for axis in range(3)], axis=1)
+        updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+        if np.allclose(updated, centroids, atol=0.5):
+            break
+        centroids = updated
+    return centroids, labels
+
+def dominant_colors(image: Image.Image, k: int = 4, sample_edge: int = 64, background_delta: float = 12.0) -> List[dict]:
+    """
+    Dominant colours of a product photo, most prominent first, as dicts with
+    hex, lab and weight (share of foreground pixels).
+
+    The image is downsampled, transparent pixels and pixels matching the border
+    colour (the photo background) are dropped, and the rest is clustered in CIELAB.
+    """
+    image = image.convert("RGBA")
+    image.thumbnail((sample_edge, sample_edge), Image.BILINEAR)
+    pixels = np.asarray(image, dtype=np.float64)
+    rgb, alpha = pixels[..., :3], pixels[..., 3]
+    lab = rgb_to_lab(rgb)
+
+    border = np.concatenate([lab[0], lab[-1], lab[:, 0], lab[:, -1]])
+    background = np.median(border, axis=0)
+    keep = (alpha >= 128) & (np.linalg.norm(lab - background, axis=-1) > background_delta)
+    if keep.sum() < 0.05 * keep.size:
+        keep = alpha >= 128
+    if not keep.any():
+        return []
+
+    points, colours = lab[keep], rgb[keep]
+    centroids, labels = _kmeans(points, min(k, len(points)))
+    counts = np.bincount(labels, minlength=len(centroids))
+
+    result = []
+    for cluster in np.argsort(-counts):
+        if counts[cluster] == 0:
+            continue
+        members = labels == cluster
+        result.append({
+            "hex": to_hex(colours[members].mean(axis=0)),
+            "lab": [float(v) for v in points[members].mean(axis=0)],
+            "weight": float(counts[cluster] / len(points))
+        })
+    return result
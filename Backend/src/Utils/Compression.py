@@ -0,0 +1,222 @@
+from starlette.datastructures import Headers, MutableHeaders
+from src.Utils.Metrics import MetricsRegistry, metrics_registry, route_template
+from typing import Optional, Sequence
+import os
+import time
+import zlib
+
+# brotli and zstd are used when their packages are installed; gzip is always there
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024)) # Bytes; smaller bodies gain nothing
+# Load average per CPU above which responses are compressed at the fast levels
+COMPRESSION_BUSY_LOAD = float(os.getenv("COMPRESSION_BUSY_LOAD", 0.75))
+LOAD_CHECK_SECONDS = 5
+
+# coding -> (idle, busy) levels for responses compressed on the fly
+DYNAMIC_LEVELS = {"zstd": (6, 1), "br": (4, 1), "gzip": (6, 1)}
+# Bodies from PROBE_MIN_SIZE are sampled first; if the sample barely compresses (base64
+# of JPEG/PNG/WebP data, mostly), matching is skipped and only entropy coding is done,
+# which keeps the same ratio on such bodies at a fraction of the CPU
+PROBE_MIN_SIZE = 64 * 1024
+PROBE_SLICES, PROBE_SLICE_SIZE = 4, 2048
+ENTROPY_RATIO = 0.6
+# Levels for bodies compressed once and served many times (see Precompressed.py)
+STATIC_LEVELS = {"zstd": 15, "br": 9, "gzip": 9}
+
+AVAILABLE = [coding for coding, module in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if module is not None]
+# Preference among codings the client accepts equally: on the fly the cheapest per byte
+# saved comes first, precompressed bodies pick the smallest output
+DYNAMIC_ORDER = [coding for coding in ("zstd", "br", "gzip") if coding in AVAILABLE]
+STATIC_ORDER = [coding for coding in ("br", "zstd", "gzip") if coding in AVAILABLE]
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+class _Compressor:
+    """Incremental compressor with one interface for every coding."""
+
+    def __init__(self, coding: str, level: int, entropy_only: bool = False):
+        if coding == "gzip":
+            strategy = zlib.Z_HUFFMAN_ONLY if entropy_only else zlib.Z_DEFAULT_STRATEGY
+            z = zlib.compressobj(level, zlib.DEFLATED, 31, 8, strategy) # 31: gzip container, mtime 0
+            self._compress, self._finish = z.compress, z.flush
+        elif coding == "br":
+            z = brotli.Compressor(quality=level)
+            self._compress, self._finish = z.process, z.finish
+        elif coding == "zstd":
+            z = zstandard.ZstdCompressor(level=level).compressobj()
+            self._compress, self._finish = z.compress, z.flush
+        else:
+            raise ValueError(f"Unsupported coding: {coding}")
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+def compress(data: bytes, coding: str, level: int) -> bytes:
+    compressor = _Compressor(coding, level)
+    return compressor.compress(data) + compressor.finish()
+
+def negotiate(accept_encoding: str, order: Sequence[str]) -> Optional[str]:
+    """Best coding in `order` allowed by an Accept-Encoding header (highest q, then `order`); None for identity."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name, q = name.strip().lower(), 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    pass
+        if name:
+            weights[name] = q
+    best, best_q = None, 0.0
+    for coding in order:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+_load_checked_at = 0.0
+_busy = False
+
+def is_busy() -> bool:
+    """Whether the host's load is high enough to trade ratio for CPU (checked every few seconds)."""
+    global _load_checked_at, _busy
+    now = time.monotonic()
+    if now - _load_checked_at >= LOAD_CHECK_SECONDS:
+        try:
+            _busy = os.getloadavg()[0] / (os.cpu_count() or 1) > COMPRESSION_BUSY_LOAD
+        except (AttributeError, OSError): # No load average on this platform
+            _busy = False
+        _load_checked_at = now
+    return _busy
+
+def mostly_entropy(body: bytes) -> bool:
+    """Whether evenly spaced samples of the body compress no better than ENTROPY_RATIO."""
+    step = len(body) // PROBE_SLICES
+    sample = b"".join(body[i * step:i * step + PROBE_SLICE_SIZE] for i in range(PROBE_SLICES))
+    return len(zlib.compress(sample, 1)) > len(sample) * ENTROPY_RATIO
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";")[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.endswith("+json")
+
+class CompressionMiddleware:
+    """
+    Compresses compressible responses (JSON, text) for clients that accept it.
+
+    - gzip always; brotli and zstd too when their packages are installed.
+    - Bodies under `minimum_size`, non-2xx responses, images and other already
+      compressed types are sent as they are.
+    - Responses that already carry a Content-Encoding (pre-compressed bodies, see
+      Precompressed.py) pass through untouched and are only counted.
+    - The level drops to the fast setting while the host is busy (is_busy). Large
+      bodies that are mostly base64 image data get entropy coding only, or none
+      while busy.
+    - Bytes in and out and the compression CPU time are recorded per route template
+      in the metrics registry (served at /metrics and /admin/compression).
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, registry: MetricsRegistry = metrics_registry):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""), DYNAMIC_ORDER)
+        responder = _Responder(self, scope, send, coding)
+        await self.app(scope, receive, responder.send)
+
+class _Responder:
+    # One response: holds the start message until the first body chunk shows whether to compress
+
+    def __init__(self, middleware: CompressionMiddleware, scope, send, coding: Optional[str]):
+        self.middleware = middleware
+        self.scope = scope
+        self._send = send
+        self.coding = coding
+        self.start = None
+        self.compressor = None
+        self.source, self.source_coding = "identity", "identity"
+        self.bytes_in = self.bytes_out = 0
+        self.cpu = 0.0
+
+    def _timed(self, operation, *args) -> bytes:
+        started = time.thread_time()
+        result = operation(*args)
+        self.cpu += time.thread_time() - started
+        return result
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.start is not None:
+            await self._first(body, more_body)
+        else:
+            self.bytes_in += len(body)
+            if self.compressor is not None:
+                body = (self._timed(self.compressor.compress, body) if body else b"") + (b"" if more_body else self._timed(self.compressor.finish))
+            self.bytes_out += len(body)
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+        if not more_body:
+            self.middleware.registry.record_compression(route_template(self.scope), self.source_coding, self.source, self.bytes_in, self.bytes_out, self.cpu)
+
+    async def _first(self, body: bytes, more_body: bool):
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=start["headers"])
+        self.bytes_in = self.bytes_out = len(body)
+
+        if "content-encoding" in headers:
+            # Pre-compressed: the route reports the original size through request.state
+            self.source, self.source_coding = "precompressed", headers["content-encoding"]
+            self.bytes_in = self.scope.get("state", {}).get("uncompressed_size", len(body))
+        elif (
+            self.coding is not None and 200 <= start["status"] < 300 and start["status"] != 204
+            and is_compressible(headers.get("content-type", ""))
+            and "content-range" not in headers
+            and "no-transform" not in headers.get("cache-control", "")
+            and (more_body or len(body) >= self.middleware.minimum_size)
+        ):
+            busy = is_busy()
+            entropy_only = not more_body and len(body) >= PROBE_MIN_SIZE and self._timed(mostly_entropy, body)
+            level = DYNAMIC_LEVELS[self.coding][1 if busy or entropy_only else 0]
+            compressor = _Compressor(self.coding, level, entropy_only)
+            # A busy host sends mostly-entropy bodies as they are: little to save for the CPU
+            compressed = b"" if entropy_only and busy else self._timed(compressor.compress, body)
+            if not more_body and compressed:
+                compressed += self._timed(compressor.finish)
+            if more_body or 0 < len(compressed) < len(body): # Otherwise not worth it after all
+                self.source, self.source_coding, self.compressor = "dynamic", self.coding, compressor
+                headers["Content-Encoding"] = self.coding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    headers["ETag"] = "W/" + headers["etag"] # Same content, different bytes
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    headers["Content-Length"] = str(len(compressed))
+                body = compressed
+                self.bytes_out = len(body)
+
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+import os
+import sqlite3
+import threading
+import time
+
+class DocumentStore:
+    """
+    Pre-rendered response bodies by key: an in-memory LRU in front of a SQLite file.
+
+    The file is shared by every worker process on the host. Each write stamps the row
+    with the next sequence number (deletes leave an empty row), so a process
+    catches up on other processes' writes by evicting the keys written since the last
+    sequence it saw. It checks at most every `sync_seconds`, so a hit is normally a
+    single dictionary lookup.
+
+    `load` turns a stored body into the value kept in memory and returned by get()
+    (the raw bytes by default), so per-process derived forms are built once per change.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, sync_seconds: float = 1.0, load: Callable[[bytes], Any] = None):
+        self.path = path
+        self.load = load or (lambda body: body)
+        self.max_entries = max_entries
+        self.sync_seconds = sync_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._seen_seq = 0
+        self._synced_at = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per process (opened lazily, so forked workers get their own)
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS documents (key TEXT PRIMARY KEY, body BLOB, seq INTEGER NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_documents_seq ON documents (seq)")
+            self._connection, self._pid = connection, os.getpid()
+            self._memory.clear()
+            self._seen_seq = connection.execute("SELECT COALESCE(MAX(seq), 0) FROM documents").fetchone()[0]
+            self._synced_at = time.monotonic()
+        return self._connection
+
+    def _sync(self):
+        db = self._db()
+        if time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        for key, seq in db.execute("SELECT key, seq FROM documents WHERE seq > ?", (self._seen_seq,)):
+            self._memory.pop(key, None)
+            self._seen_seq = max(self._seen_seq, seq)
+        self._synced_at = time.monotonic()
+
+    def _remember(self, key: str, body: bytes):
+        value = self.load(body)
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+        return value
+
+    def get(self, key: str):
+        with self._lock:
+            self._sync()
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+            row = self._db().execute("SELECT body FROM documents WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0] is None:
+                return None
+            return self._remember(key, row[0])
+
+    def current_seq(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COALESCE(MAX(seq), 0) FROM documents").fetchone()[0]
+
+    def _write(self, rows, unless_written_after: Optional[int] = None) -> bool:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if unless_written_after is not None:
+                # A render started before a newer write must not overwrite it
+                newer = db.execute(
+                    "SELECT 1 FROM documents WHERE key IN (%s) AND seq > ?" % ",".join("?" * len(rows)),
+                    [key for key, _ in rows] + [unless_written_after]
+                ).fetchone()
+                if newer:
+                    db.execute("ROLLBACK")
+                    return False
+            seq = db.execute("SELECT COALESCE(MAX(seq), 0) FROM documents").fetchone()[0]
+            for offset, (key, body) in enumerate(rows, start=1):
+                db.execute(
+                    "INSERT INTO documents (key, body, seq) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET body = excluded.body, seq = excluded.seq",
+                    (key, body, seq + offset)
+                )
+            db.execute("COMMIT")
+            return True
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def put(self, key: str, body: bytes, unless_written_after: Optional[int] = None) -> bool:
+        """
+        Stores a document. With `unless_written_after` (a current_seq() taken before the
+        data was read), the write is skipped if the key was written since.
+        """
+        with self._lock:
+            if not self._write([(key, body)], unless_written_after):
+                return False
+            self._remember(key, body)
+            return True
+
+    def delete(self, keys: Iterable[str]):
+        keys = list(keys)
+        if not keys:
+            return
+        with self._lock:
+            self._write([(key, None) for key in keys])
+            for key in keys:
+                self._memory.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            db = self._db()
+            keys = [row[0] for row in db.execute("SELECT key FROM documents WHERE body IS NOT NULL")]
+        self.delete(keys)
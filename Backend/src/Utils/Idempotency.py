@@ -0,0 +1,49 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from src.Models.Idempotency import IdempotencyKey
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+
+# Retries come within minutes; older keys only take space (removed by purge_idempotency_keys)
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+
+def hash_request(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def get_stored_response(db: Session, user_id: int, key: str, request_hash: str):
+    """Returns the stored response for a retried request, or None if the key is new."""
+    record = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).first()
+    if not record:
+        return None
+
+    if record.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key já utilizada com um pedido diferente")
+
+    return JSONResponse(
+        status_code=record.status_code,
+        content=json.loads(record.response_body),
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+def store_response(db: Session, user_id: int, key: str, request_hash: str, status_code: int, body: dict):
+    # Added to the caller's transaction: the response is only stored if the work itself commits
+    db.add(IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        status_code=status_code,
+        response_body=json.dumps(body, default=str)
+    ))
+
+def purge_idempotency_keys(db: Session) -> int:
+    """Deletes stored responses older than IDEMPOTENCY_KEY_TTL_HOURS; a retry after that runs again."""
+    cutoff = datetime.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+    purged = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return purged
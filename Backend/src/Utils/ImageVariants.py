@@ -0,0 +1,106 @@
+from PIL import Image, features
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+from src.Utils.Uploads import MEDIA_DIR, media_url, ALLOWED_IMAGE_FORMATS
+import anyio
+import os
+import uuid
+
+# Derivatives of uploaded catalog images: name -> longest edge in pixels (never upscaled)
+VARIANT_SIZES = {"card": 400, "detail": 900, "zoom": 1600}
+
+# Preferred first; AVIF only when this Pillow build can encode it
+VARIANT_FORMATS = (["avif"] if features.check("avif") else []) + ["webp"]
+VARIANT_CONTENT_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+_PIL_FORMATS = {"avif": "AVIF", "webp": "WEBP"}
+
+VARIANTS_DIR = "variants"
+
+def variant_path(source_path: str, size: str, fmt: str) -> str:
+    """variants/<size>/<source path without extension>.<fmt>, relative to MEDIA_DIR."""
+    stem = os.path.splitext(source_path)[0]
+    return f"{VARIANTS_DIR}/{size}/{stem}.{fmt}"
+
+def variant_urls(source_path: str):
+    """
+    URLs of every derivative of an uploaded image, e.g. {"card": {"avif": ..., "webp": ...}}.
+    URLs are deterministic, so they can be returned before the files exist; missing
+    ones are generated on first request (see MediaFiles).
+    """
+    if not source_path:
+        return None
+    return {
+        size: {fmt: media_url(variant_path(source_path, size, fmt)) for fmt in VARIANT_FORMATS}
+        for size in VARIANT_SIZES
+    }
+
+def source_for_variant(path: str):
+    """Inverse of variant_path: (source_path, size, fmt), or None if `path` is not a known variant."""
+    parts = path.split("/", 2)
+    if len(parts) != 3 or parts[0] != VARIANTS_DIR or parts[1] not in VARIANT_SIZES:
+        return None
+    stem, fmt = os.path.splitext(parts[2])
+    fmt = fmt.lstrip(".")
+    if fmt not in VARIANT_FORMATS:
+        return None
+
+    media_root = os.path.abspath(MEDIA_DIR)
+    for extension in set(ALLOWED_IMAGE_FORMATS.values()):
+        source_path = f"{stem}.{extension}"
+        full = os.path.abspath(os.path.join(media_root, source_path))
+        if full.startswith(media_root + os.sep) and os.path.isfile(full):
+            return source_path, parts[1], fmt
+    return None
+
+def _render(image: Image.Image, edge: int, fmt: str, target: str):
+    derivative = image.copy()
+    derivative.thumbnail((edge, edge), Image.LANCZOS)
+    if derivative.mode not in ("RGB", "RGBA"):
+        derivative = derivative.convert("RGBA")
+
+    # Write next to the target and rename, so readers never see a partial file
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        derivative.save(tmp, format=_PIL_FORMATS[fmt], quality=80)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def generate_variants(source_path: str, only: tuple = None) -> int:
+    """
+    Renders missing derivatives of `source_path` (all of them, or just `only=(size, fmt)`).
+    Runs in the image worker processes or, for lazy regeneration, a request thread.
+    Returns the number of files written.
+    """
+    wanted = [only] if only else [(size, fmt) for size in VARIANT_SIZES for fmt in VARIANT_FORMATS]
+    pending = [(size, fmt) for size, fmt in wanted if not os.path.isfile(os.path.join(MEDIA_DIR, variant_path(source_path, size, fmt)))]
+    if not pending:
+        return 0
+
+    with Image.open(os.path.join(MEDIA_DIR, source_path)) as image:
+        image.load()
+        for size, fmt in pending:
+            _render(image, VARIANT_SIZES[size], fmt, os.path.join(MEDIA_DIR, variant_path(source_path, size, fmt)))
+    return len(pending)
+
+def render_missing_variant(path: str) -> bool:
+    """Lazily renders a single derivative requested by URL; False if `path` is not a variant of an existing upload."""
+    variant = source_for_variant(path)
+    if variant is None:
+        return False
+    source_path, size, fmt = variant
+    generate_variants(source_path, only=(size, fmt))
+    return True
+
+class MediaFiles(StaticFiles):
+    """StaticFiles over MEDIA_DIR that renders a missing derivative on its first request."""
+
+    async def get_response(self, path: str, scope):
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as exc:
+            if exc.status_code != 404 or not await anyio.to_thread.run_sync(render_missing_variant, path):
+                raise
+        return await super().get_response(path, scope)
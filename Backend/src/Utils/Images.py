@@ -0,0 +1,72 @@
+from fastapi import HTTPException
+from PIL import Image, UnidentifiedImageError
+from src.Utils.Uploads import MEDIA_DIR, save_image_bytes
+import base64
+import binascii
+import hashlib
+import io
+import os
+
+# Avatar variants: name -> square edge in pixels
+AVATAR_SIZES = {"small": 64, "medium": 128, "large": 256}
+AVATAR_FORMAT = "WEBP"
+AVATAR_CONTENT_TYPE = "image/webp"
+
+def decode_base64_image(data: str) -> bytes:
+    """Accepts a raw base64 string or a data URL (data:image/png;base64,...)."""
+    if data.startswith("data:"):
+        data = data.split(",", 1)[-1]
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Imagem inválida")
+
+def store_base64_image(data: str, subdir: str) -> str:
+    """Writes an inline (base64) image to MEDIA_DIR like a multipart upload; returns its path."""
+    return save_image_bytes(decode_base64_image(data), subdir)
+
+def open_image(raw: bytes) -> Image.Image:
+    try:
+        image = Image.open(io.BytesIO(raw))
+        image.load()
+    except (UnidentifiedImageError, OSError):
+        raise HTTPException(status_code=400, detail="Formato de imagem não suportado")
+    return image
+
+def square_thumbnail(image: Image.Image, edge: int, image_format: str = AVATAR_FORMAT) -> bytes:
+    """Center-crops to a square and resizes to edge x edge."""
+    width, height = image.size
+    side = min(width, height)
+    left, top = (width - side) // 2, (height - side) // 2
+    thumb = image.crop((left, top, left + side, top + side)).resize((edge, edge), Image.LANCZOS)
+    if thumb.mode not in ("RGB", "RGBA"):
+        thumb = thumb.convert("RGBA")
+
+    output = io.BytesIO()
+    thumb.save(output, format=image_format, quality=85)
+    return output.getvalue()
+
+def make_avatar_variants(raw: bytes) -> dict:
+    image = open_image(raw)
+    return {name: square_thumbnail(image, edge) for name, edge in AVATAR_SIZES.items()}
+
+def load_catalog_image(image_base64: str = None, image_path: str = None):
+    """Opens a catalog image stored inline or under MEDIA_DIR; None if it cannot be decoded."""
+    try:
+        if image_path:
+            with open(os.path.join(MEDIA_DIR, image_path), "rb") as handle:
+                raw = handle.read()
+        else:
+            raw = decode_base64_image(image_base64 or "")
+        return open_image(raw)
+    except (HTTPException, OSError):
+        return None
+
+def image_content_hash(image_base64: str = None, image_path: str = None) -> str:
+    """
+    Identity of a jersey image's content. Uploaded files are already content-addressed,
+    so their path is hashed; inline images hash their base64 text.
+    """
+    if image_path:
+        return hashlib.sha256(f"path:{image_path}".encode()).hexdigest()
+    return hashlib.sha256((image_base64 or "").encode()).hexdigest()
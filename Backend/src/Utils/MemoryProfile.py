@@ -0,0 +1,231 @@
+from contextlib import contextmanager
+from datetime import datetime
+from src.Utils.Metrics import route_template
+from typing import Dict, List, Optional
+import linecache
+import os
+import random
+import sysconfig
+import threading
+import time
+import tracemalloc
+
+# Opt-in per-request memory profiling with tracemalloc. A sampled request is traced from
+# start to end: its peak (Python allocations above what was allocated when it started) and,
+# when its response starts, the lines holding the most memory (ORM rows, models and the
+# encoded body are all alive at that point). Tracing slows every allocation, so only one
+# request per process is profiled at a time and only MEMORY_PROFILE_RATE of them; the
+# peak also includes whatever concurrent requests allocate meanwhile.
+MEMORY_PROFILE_RATE = float(os.getenv("MEMORY_PROFILE_RATE", 0)) # Share of requests profiled; 0 = off
+MEMORY_PROFILE_FRAMES = int(os.getenv("MEMORY_PROFILE_FRAMES", 1)) # Traceback depth kept per allocation
+MEMORY_PROFILE_TOP = int(os.getenv("MEMORY_PROFILE_TOP", 5)) # Allocation sites kept per profile
+MEMORY_PEAK_LOG_MB = float(os.getenv("MEMORY_PEAK_LOG_MB", 100)) # Profiles above this are printed
+MEMORY_SNAPSHOT_DIR = os.getenv("MEMORY_SNAPSHOT_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "cache", "heap")))
+
+MB = 1024 * 1024
+
+# Allocations of the profiler itself and of imports are noise in the sites
+_IGNORED = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"), tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>")]
+
+def top_sites(snapshot: tracemalloc.Snapshot, top: int, key_type: str = "lineno") -> List[dict]:
+    """The `top` allocation sites of a snapshot, largest first."""
+    return [site_dict(stat.traceback, stat.size, stat.count) for stat in snapshot.filter_traces(_IGNORED).statistics(key_type)[:top]]
+
+def site_dict(traceback: tracemalloc.Traceback, size: int, count: int, size_diff: int = None) -> dict:
+    site = {"site": " <- ".join(f"{_short(frame.filename)}:{frame.lineno}" for frame in traceback),
+            "size_mb": round(size / MB, 3), "count": count}
+    if size_diff is not None:
+        site["size_diff_mb"] = round(size_diff / MB, 3)
+    return site
+
+# Longest first, so site-packages wins over the stdlib directory that contains it
+_ROOTS = sorted({os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))} |
+                {sysconfig.get_paths()[name] for name in ("purelib", "platlib", "stdlib")}, key=len, reverse=True)
+
+def _short(filename: str) -> str:
+    # Relative to the app, site-packages or stdlib, like src/Routes/CatalogRoutes.py or sqlalchemy/orm/loading.py
+    for root in _ROOTS:
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+def rss_mb() -> Optional[float]:
+    """Resident set size of this process (Linux), None elsewhere."""
+    try:
+        with open("/proc/self/statm") as handle:
+            return round(int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / MB, 1)
+    except (OSError, ValueError, IndexError):
+        return None
+
+class MemoryProfile:
+    """One profiled request (or block): peak in bytes and the sites holding memory at its capture point."""
+
+    __slots__ = ("label", "baseline", "peak", "sites", "started_tracing")
+
+    def __init__(self, label: Optional[str], baseline: int, started_tracing: bool):
+        self.label = label
+        self.baseline = baseline
+        self.started_tracing = started_tracing
+        self.peak = 0
+        self.sites: List[dict] = []
+
+class RouteMemory:
+    """Profiles of one route: count, peaks and the sites of the largest one."""
+
+    __slots__ = ("samples", "peak_max", "peak_sum", "sites")
+
+    def __init__(self):
+        self.samples = 0
+        self.peak_max = 0
+        self.peak_sum = 0
+        self.sites: List[dict] = []
+
+class MemoryProfiler:
+    """Starts and stops tracemalloc for sampled requests, or keeps it on for heap snapshots."""
+
+    def __init__(self, rate: float = MEMORY_PROFILE_RATE, frames: int = MEMORY_PROFILE_FRAMES, top: int = MEMORY_PROFILE_TOP,
+                 log_mb: float = MEMORY_PEAK_LOG_MB, snapshot_dir: str = MEMORY_SNAPSHOT_DIR):
+        self.rate = rate
+        self.frames = frames
+        self.top = top
+        self.log_mb = log_mb
+        self.snapshot_dir = snapshot_dir
+        self.routes: Dict[str, RouteMemory] = {}
+        self.tracing = False # Tracing left on (see start_tracing) for heap snapshots
+        self.last_snapshot_path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._busy = False
+
+    def should_sample(self) -> bool:
+        return self.rate > 0 and not self._busy and random.random() < self.rate
+
+    # --- Per request ---
+
+    def begin(self, label: str = None) -> Optional[MemoryProfile]:
+        """Starts a profile; None if another one is running."""
+        with self._lock:
+            if self._busy:
+                return None
+            self._busy = True
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(self.frames)
+            profile = MemoryProfile(label, tracemalloc.get_traced_memory()[0], started)
+            tracemalloc.reset_peak()
+            return profile
+
+    def capture_sites(self, profile: MemoryProfile):
+        # With tracing left on, the snapshot would hold the whole heap, not this request's memory
+        if profile.started_tracing and not profile.sites:
+            profile.sites = top_sites(tracemalloc.take_snapshot(), self.top)
+
+    def end(self, profile: MemoryProfile):
+        with self._lock:
+            profile.peak = max(0, tracemalloc.get_traced_memory()[1] - profile.baseline)
+            if not self.tracing:
+                tracemalloc.stop()
+            self._busy = False
+
+    @contextmanager
+    def measure(self, label: str = None, sites: bool = True):
+        """Profiles a block (e.g. in-process requests in a benchmark); the MemoryProfile is complete after the block."""
+        profile = self.begin(label)
+        if profile is None:
+            raise RuntimeError("Another memory profile is running")
+        try:
+            yield profile
+            if sites:
+                self.capture_sites(profile)
+        finally:
+            self.end(profile)
+
+    def record(self, route: str, profile: MemoryProfile):
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = RouteMemory()
+            stats.samples += 1
+            stats.peak_sum += profile.peak
+            if profile.peak >= stats.peak_max:
+                stats.peak_max = profile.peak
+                stats.sites = profile.sites
+        if profile.peak >= self.log_mb * MB:
+            sites = "; ".join(f"{site['site']} {site['size_mb']:.1f} MB" for site in profile.sites[:3])
+            print(f"Memory peak {profile.peak / MB:.1f} MB in {route}{': ' + sites if sites else ''}")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = [
+                {"route": route, "samples": stats.samples, "peak_max_mb": round(stats.peak_max / MB, 3),
+                 "peak_mean_mb": round(stats.peak_sum / stats.samples / MB, 3), "top_sites": stats.sites}
+                for route, stats in sorted(self.routes.items(), key=lambda item: -item[1].peak_max)
+            ]
+        traced = tracemalloc.get_traced_memory()[0] if self.tracing else None
+        return {"pid": os.getpid(), "rate": self.rate, "tracing": self.tracing, "rss_mb": rss_mb(),
+                "traced_mb": round(traced / MB, 1) if traced is not None else None, "routes": routes}
+
+    # --- Heap snapshots ---
+
+    def start_tracing(self, frames: int = None):
+        """Keeps tracemalloc on, so heap snapshots see everything allocated from now on."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames or self.frames)
+            self.tracing = True
+
+    def stop_tracing(self):
+        with self._lock:
+            self.tracing = False
+            if not self._busy and tracemalloc.is_tracing():
+                tracemalloc.stop() # A running profile stops it when it ends
+
+    def dump_heap(self, top: int = 20, key_type: str = "lineno") -> dict:
+        """Writes a heap snapshot to snapshot_dir; returns its top sites and the growth since the previous dump."""
+        if not self.tracing:
+            raise RuntimeError("Tracing is off")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"heap-{os.getpid()}-{datetime.utcnow():%Y%m%d-%H%M%S}-{time.time_ns() % 1000000:06d}.tracemalloc")
+        snapshot.dump(path)
+        growth = []
+        previous = self.last_snapshot_path
+        if previous and os.path.exists(previous):
+            growth = [site_dict(stat.traceback, stat.size, stat.count, stat.size_diff)
+                      for stat in snapshot.compare_to(tracemalloc.Snapshot.load(previous), key_type)[:top]]
+        self.last_snapshot_path = path
+        return {"path": path, "previous_path": previous, "traced_mb": round(tracemalloc.get_traced_memory()[0] / MB, 1),
+                "rss_mb": rss_mb(), "top_sites": top_sites(snapshot, top, key_type), "growth": growth}
+
+memory_profiler = MemoryProfiler()
+
+class MemoryProfileMiddleware:
+    """
+    Profiles a sample of HTTP requests (see MEMORY_PROFILE_RATE) and records them per route
+    template; read them at /admin/memory. Free when the rate is 0.
+    """
+
+    def __init__(self, app, profiler: MemoryProfiler = memory_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_sample():
+            await self.app(scope, receive, send)
+            return
+        profile = self.profiler.begin()
+        if profile is None: # Another request started one first
+            await self.app(scope, receive, send)
+            return
+
+        async def send_profiled(message):
+            if message["type"] == "http.response.start":
+                self.profiler.capture_sites(profile)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            self.profiler.end(profile)
+            self.profiler.record(f"{scope['method']} {route_template(scope)}", profile)
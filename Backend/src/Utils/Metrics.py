@@ -0,0 +1,267 @@
+from bisect import bisect_left
+from typing import Dict, Optional
+import json
+import os
+import threading
+import time
+
+# Request metrics in the Prometheus text format (served at /metrics by main.py).
+# With METRICS_MULTIPROC_DIR set, every worker process writes its totals to a file in
+# that directory every METRICS_FLUSH_SECONDS and /metrics adds up all the files, so any
+# worker answers for the whole host. The directory should be emptied when the service
+# (not a single worker) starts, as counters of exited workers are kept.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 1))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # Seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304) # Bytes
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def route_template(scope) -> str:
+    """Template of the matched route, e.g. /catalog/jerseys/{jersey_id}; "unmatched" if none matched."""
+    route_path = getattr(scope.get("route"), "path", None)
+    if route_path is None:
+        # Mounted apps (e.g. /media) only move root_path
+        app_root, root = scope.get("app_root_path", ""), scope.get("root_path", "")
+        if root and root != app_root:
+            return root[len(app_root or ""):] + "/{path}"
+        return "unmatched"
+    # Routes of an included router may only know their own path; the prefix is the
+    # part of the request path in front of the segments the route matched
+    segments = scope["path"].rstrip("/").split("/")
+    depth = route_path.rstrip("/").count("/")
+    return "/".join(segments[:len(segments) - depth]) + route_path
+
+class RouteMetrics:
+    """Totals for one (method, route template); buckets are per bucket, made cumulative on render."""
+
+    __slots__ = ("statuses", "latency", "latency_sum", "sizes", "size_sum")
+
+    def __init__(self):
+        self.statuses: Dict[str, int] = {}
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.sizes = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+
+    def merge(self, other: list):
+        # `other` is a snapshot row (see MetricsRegistry.snapshot)
+        statuses, latency, latency_sum, sizes, size_sum = other
+        for status, count in statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.latency = [a + b for a, b in zip(self.latency, latency)]
+        self.latency_sum += latency_sum
+        self.sizes = [a + b for a, b in zip(self.sizes, sizes)]
+        self.size_sum += size_sum
+
+class MetricsRegistry:
+    """
+    This process's request metrics. observe() is the hot path: a few dict and list updates.
+    record_compression() keeps the response compression counters (see CompressionMiddleware),
+    keyed by (route, coding, source), as [responses, bytes_in, bytes_out, cpu_seconds].
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = METRICS_MULTIPROC_DIR, flush_seconds: float = METRICS_FLUSH_SECONDS):
+        self.routes: Dict[tuple, RouteMetrics] = {}
+        self.compression: Dict[tuple, list] = {}
+        self.in_flight = 0
+        self.multiproc_dir = multiproc_dir
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self._dirty = False
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int):
+        with self._lock:
+            metrics = self.routes.get((method, route))
+            if metrics is None:
+                metrics = self.routes[(method, route)] = RouteMetrics()
+            status = str(status)
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.latency[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.latency_sum += seconds
+            metrics.sizes[bisect_left(SIZE_BUCKETS, size)] += 1
+            metrics.size_sum += size
+            self._dirty = True
+        if self.multiproc_dir and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def record_compression(self, route: str, coding: str, source: str, bytes_in: int, bytes_out: int, cpu_seconds: float = 0.0):
+        with self._lock:
+            counters = self.compression.get((route, coding, source))
+            if counters is None:
+                counters = self.compression[(route, coding, source)] = [0, 0, 0, 0.0]
+            counters[0] += 1
+            counters[1] += bytes_in
+            counters[2] += bytes_out
+            counters[3] += cpu_seconds
+            self._dirty = True
+        if self.multiproc_dir and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "in_flight": self.in_flight,
+                "routes": [
+                    [method, route, dict(m.statuses), list(m.latency), m.latency_sum, list(m.sizes), m.size_sum]
+                    for (method, route), m in self.routes.items()
+                ],
+                "compression": [[route, coding, source, *counters] for (route, coding, source), counters in self.compression.items()]
+            }
+
+    # --- Multi-process mode ---
+
+    def _start_flusher(self):
+        # One daemon thread per process, started on first use (so forked workers start their own)
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            if self._dirty:
+                self.flush()
+
+    def flush(self):
+        """Writes this process's totals to its file (atomically, via rename)."""
+        self._dirty = False
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = os.path.join(self.multiproc_dir, f"metrics-{os.getpid()}.json")
+        with open(path + ".tmp", "w") as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(path + ".tmp", path)
+
+    def collect(self) -> list:
+        """Snapshots to report: this process's, plus every other process's file in multi-process mode."""
+        if not self.multiproc_dir:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.multiproc_dir):
+            if not (name.startswith("metrics-") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, name)) as handle:
+                    snapshot = json.load(handle)
+            except (OSError, ValueError): # Removed or replaced while listing
+                continue
+            if not _alive(snapshot["pid"]):
+                snapshot["in_flight"] = 0 # Counters of exited workers still count; their gauges do not
+            snapshots.append(snapshot)
+        return snapshots
+
+    def compression_totals(self, snapshots: Optional[list] = None) -> Dict[tuple, list]:
+        """Compression counters added up over `snapshots` (default: collect())."""
+        totals: Dict[tuple, list] = {}
+        for snapshot in self.collect() if snapshots is None else snapshots:
+            for route, coding, source, *counters in snapshot.get("compression", []):
+                total = totals.setdefault((route, coding, source), [0, 0, 0, 0.0])
+                for i, value in enumerate(counters):
+                    total[i] += value
+        return totals
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        routes: Dict[tuple, RouteMetrics] = {}
+        in_flight = 0
+        snapshots = self.collect()
+        for snapshot in snapshots:
+            in_flight += snapshot["in_flight"]
+            for method, route, *rest in snapshot["routes"]:
+                routes.setdefault((method, route), RouteMetrics()).merge(rest)
+
+        lines = [
+            "# HELP http_requests_in_flight Requests being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+            "# HELP http_requests_total Requests by method, route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), m in sorted(routes.items()):
+            for status, count in sorted(m.statuses.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+        lines += _histogram("http_request_duration_seconds", "Request latency by method and route template.",
+                            routes, LATENCY_BUCKETS, lambda m: (m.latency, m.latency_sum))
+        lines += _histogram("http_response_size_bytes", "Response body size (as sent) by method and route template.",
+                            routes, SIZE_BUCKETS, lambda m: (m.sizes, m.size_sum))
+
+        compression = sorted(self.compression_totals(snapshots).items())
+        for i, (name, help_text) in enumerate((
+            ("http_compression_responses_total", "Responses by route template, content coding and source (dynamic, precompressed or identity)."),
+            ("http_compression_bytes_in_total", "Response body bytes before compression."),
+            ("http_compression_bytes_out_total", "Response body bytes as sent."),
+            ("http_compression_cpu_seconds_total", "CPU time spent compressing responses."),
+        )):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (route, coding, source), counters in compression:
+                lines.append(f'{name}{{route="{_escape(route)}",encoding="{coding}",source="{source}"}} {counters[i]}')
+        return "\n".join(lines) + "\n"
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError: # Exists, but owned by someone else
+        return True
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_bound(bound) -> str:
+    return repr(float(bound))
+
+def _histogram(name: str, help_text: str, routes: Dict[tuple, RouteMetrics], bounds, values) -> list:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), m in sorted(routes.items()):
+        counts, total = values(m)
+        labels = f'method="{method}",route="{_escape(route)}"'
+        cumulative = 0
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {total}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+    return lines
+
+metrics_registry = MetricsRegistry()
+
+class MetricsMiddleware:
+    """
+    Records each HTTP request's latency, status and response size against its route
+    template (e.g. /catalog/jerseys/{jersey_id}; "unmatched" for 404s, so scanners
+    cannot blow up the label set), and keeps the in-flight gauge. Should be the
+    outermost middleware, so latency and size include the other middlewares.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics_registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status, size = 500, 0
+
+        async def send_measured(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            self.registry.in_flight -= 1
+            self.registry.observe(scope["method"], route_template(scope), status, time.perf_counter() - started, size)
@@ -0,0 +1,176 @@
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy import select, delete, or_, and_
+from src.Models.Order import Order, OrderItem, OrderStatus, ArchivedOrder
+from src.Models.Catalog import Jersey
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+import gzip
+import json
+import os
+
+# Delivered/cancelled orders older than this many whole months leave the hot tables
+ARCHIVE_DIR = os.getenv("ORDER_ARCHIVE_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "archive", "orders")))
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ORDER_ARCHIVE_AFTER_MONTHS", 12))
+
+ARCHIVABLE_STATUSES = [OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value]
+
+def archive_cutoff(months: int, now: datetime = None) -> datetime:
+    """Start of the month `months` months before now; everything before it is archivable."""
+    now = now or datetime.utcnow()
+    month_index = now.year * 12 + (now.month - 1) - months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+def _order_document(order: Order) -> dict:
+    # Same shape as OrderDetailResponse, with the jersey summary frozen at archive time
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "created_at": order.created_at.isoformat(),
+        "status": order.status,
+        "total_amount": order.total_amount,
+        "payment_method": order.payment_method,
+        "payment_details": order.payment_details,
+        "version": order.version,
+        "shipping_name": order.shipping_name,
+        "shipping_address": order.shipping_address,
+        "shipping_city": order.shipping_city,
+        "shipping_postal_code": order.shipping_postal_code,
+        "shipping_country": order.shipping_country,
+        "shipping_phone": order.shipping_phone,
+        "nif": order.nif,
+        "items": [
+            {
+                "id": item.id,
+                "jersey_id": item.jersey_id,
+                "jersey": {
+                    "id": item.jersey.id,
+                    "team_name": item.jersey.team_name,
+                    "season": item.jersey.season,
+                    "main_color": item.jersey.main_color,
+                    "jersey_type_name": item.jersey.jersey_type_name
+                } if item.jersey else None,
+                "size": item.size,
+                "quantity": item.quantity,
+                "custom_name": item.custom_name,
+                "custom_number": item.custom_number,
+                "patches": item.patches,
+                "price": item.price
+            }
+            for item in order.items
+        ]
+    }
+
+def archive_orders(db: Session, months: int = ARCHIVE_AFTER_MONTHS, batch_size: int = 500):
+    """
+    Moves delivered/cancelled orders older than `months` into monthly archive files
+    (ARCHIVE_DIR/YYYY-MM.ndjson.gz) and deletes them from the hot tables.
+
+    Each order is appended as its own gzip member, so the file stays a valid
+    .ndjson.gz stream while single orders can be read back by offset. Files are
+    fsynced before the batch's delete commits; if the commit fails the appended
+    bytes are simply unreferenced.
+    """
+    cutoff = archive_cutoff(months)
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+    archived = 0
+    while True:
+        orders = db.query(Order).options(
+            selectinload(Order.items).selectinload(OrderItem.jersey).options(
+                joinedload(Jersey.team),
+                joinedload(Jersey.jersey_type)
+            )
+        ).filter(
+            Order.created_at < cutoff,
+            Order.status.in_(ARCHIVABLE_STATUSES)
+        ).order_by(Order.created_at, Order.id).limit(batch_size).all()
+        if not orders:
+            break
+
+        handles = {}
+        index_rows = []
+        try:
+            for order in orders:
+                archive_file = f"{order.created_at:%Y-%m}.ndjson.gz"
+                if archive_file not in handles:
+                    handles[archive_file] = open(os.path.join(ARCHIVE_DIR, archive_file), "ab")
+                handle = handles[archive_file]
+
+                member = gzip.compress((json.dumps(_order_document(order), ensure_ascii=False) + "\n").encode())
+                offset = handle.tell()
+                handle.write(member)
+                index_rows.append({
+                    "id": order.id,
+                    "user_id": order.user_id,
+                    "created_at": order.created_at,
+                    "status": order.status,
+                    "archive_file": archive_file,
+                    "offset": offset,
+                    "length": len(member)
+                })
+            for handle in handles.values():
+                handle.flush()
+                os.fsync(handle.fileno())
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+        order_ids = [order.id for order in orders]
+        db.bulk_insert_mappings(ArchivedOrder, index_rows)
+        db.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+        db.execute(delete(Order).where(Order.id.in_(order_ids)))
+        db.commit()
+        db.expunge_all()
+        archived += len(order_ids)
+
+    return archived
+
+def read_archived_orders(entries: Iterable[ArchivedOrder]) -> Iterator[dict]:
+    """
+    Documents of the given index rows, in their order. Consecutive entries of the same
+    month (e.g. a date range ordered by created_at) share one open file.
+    """
+    handle, current = None, None
+    try:
+        for entry in entries:
+            if entry.archive_file != current:
+                if handle:
+                    handle.close()
+                handle = open(os.path.join(ARCHIVE_DIR, entry.archive_file), "rb")
+                current = entry.archive_file
+            handle.seek(entry.offset)
+            document = json.loads(gzip.decompress(handle.read(entry.length)))
+            document["created_at"] = datetime.fromisoformat(document["created_at"])
+            yield document
+    finally:
+        if handle:
+            handle.close()
+
+def read_archived_order(entry: ArchivedOrder) -> dict:
+    return next(read_archived_orders([entry]))
+
+def archived_entries_between(db: Session, date_from: datetime, date_to: datetime, statuses: List[str] = None):
+    """Index rows of archived orders created in [date_from, date_to), oldest first, streamed."""
+    query = select(ArchivedOrder).where(ArchivedOrder.created_at >= date_from, ArchivedOrder.created_at < date_to)
+    if statuses is not None:
+        query = query.where(ArchivedOrder.status.in_(statuses))
+    query = query.order_by(ArchivedOrder.created_at, ArchivedOrder.id).execution_options(stream_results=True, yield_per=1000)
+    return db.execute(query).scalars()
+
+def get_archived_order(db: Session, user_id: int, order_id: int) -> Optional[dict]:
+    entry = db.query(ArchivedOrder).filter(
+        ArchivedOrder.id == order_id,
+        ArchivedOrder.user_id == user_id
+    ).first()
+    return read_archived_order(entry) if entry else None
+
+def get_archived_entries(db: Session, user_id: int, before: Optional[Tuple[datetime, int]], limit: int):
+    """Index rows of a user's archived orders, newest first, strictly before the (created_at, id) cursor."""
+    query = db.query(ArchivedOrder).filter(ArchivedOrder.user_id == user_id)
+    if before:
+        created_at, order_id = before
+        query = query.filter(or_(
+            ArchivedOrder.created_at < created_at,
+            and_(ArchivedOrder.created_at == created_at, ArchivedOrder.id < order_id)
+        ))
+    return query.order_by(ArchivedOrder.created_at.desc(), ArchivedOrder.id.desc()).limit(limit).all()
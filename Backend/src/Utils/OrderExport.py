@@ -0,0 +1,113 @@
+from sqlalchemy import select
+from database import SessionLocal
+from src.Models.Order import Order, OrderItem
+from src.Utils.OrderArchive import archived_entries_between, read_archived_orders
+from datetime import datetime
+import csv
+import heapq
+import io
+import json
+
+ORDER_COLUMNS = [
+    "id", "created_at", "status", "user_id", "nif",
+    "shipping_name", "shipping_address", "shipping_city", "shipping_postal_code",
+    "shipping_country", "shipping_phone", "payment_method", "total_amount"
+]
+ITEM_COLUMNS = ["id", "jersey_id", "size", "quantity", "custom_name", "custom_number", "patches", "price"]
+
+CSV_HEADER = [f"order_{c}" if c == "id" else c for c in ORDER_COLUMNS] + [f"item_{c}" for c in ITEM_COLUMNS]
+
+# Rows fetched per round trip from the server-side cursor, and rows per yielded chunk
+FETCH_SIZE = 1000
+CHUNK_ROWS = 500
+
+def _export_rows(date_from: datetime, date_to: datetime):
+    """
+    Yields (order values, item values) for every order item in the range, ordered by order.
+    Orders already moved to the archive (see OrderArchive) are read from their files and
+    merged in by (created_at, id).
+
+    Uses its own sessions: the generator runs while the response streams, after the
+    request's dependencies may already have been cleaned up. The archive index is read
+    from a second one so both result sets can stream at once.
+    """
+    db = SessionLocal()
+    archive_db = SessionLocal()
+    try:
+        stmt = (
+            select(*[Order.__table__.c[c] for c in ORDER_COLUMNS], *[OrderItem.__table__.c[c] for c in ITEM_COLUMNS])
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .where(Order.created_at >= date_from, Order.created_at < date_to)
+            .order_by(Order.created_at, Order.id, OrderItem.id)
+            .execution_options(stream_results=True, yield_per=FETCH_SIZE)
+        )
+        split = len(ORDER_COLUMNS)
+        hot = ((row[:split], row[split:]) for row in db.execute(stmt))
+        archived = _archived_rows(read_archived_orders(archived_entries_between(archive_db, date_from, date_to)))
+        # An order lives in exactly one of the two, so its rows stay together
+        yield from heapq.merge(hot, archived, key=lambda row: (row[0][1], row[0][0]))
+    finally:
+        archive_db.close()
+        db.close()
+
+def _archived_rows(documents):
+    # Same shape as the hot rows, including the outer join's empty item for orders without items
+    for document in documents:
+        order = tuple(document[c] for c in ORDER_COLUMNS)
+        items = sorted(document["items"], key=lambda item: item["id"])
+        if not items:
+            yield order, (None,) * len(ITEM_COLUMNS)
+        for item in items:
+            yield order, tuple(item[c] for c in ITEM_COLUMNS)
+
+def stream_csv(date_from: datetime, date_to: datetime):
+    """One line per order item, with the order's fields repeated."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+
+    pending = 0
+    for order, item in _export_rows(date_from, date_to):
+        writer.writerow([_csv_value(v) for v in (*order, *item)])
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue().encode()
+
+def stream_ndjson(date_from: datetime, date_to: datetime):
+    """One JSON document per order, with its items nested."""
+    chunk = []
+    current = None
+    for order, item in _export_rows(date_from, date_to):
+        if current is None or current["id"] != order[0]:
+            if current is not None:
+                chunk.append(json.dumps(current, default=_json_value, ensure_ascii=False))
+                if len(chunk) >= CHUNK_ROWS:
+                    yield ("\n".join(chunk) + "\n").encode()
+                    chunk = []
+            current = dict(zip(ORDER_COLUMNS, order))
+            current["items"] = []
+
+        if item[0] is not None:
+            item_doc = dict(zip(ITEM_COLUMNS, item))
+            item_doc["patches"] = item_doc["patches"] or []
+            current["items"].append(item_doc)
+
+    if current is not None:
+        chunk.append(json.dumps(current, default=_json_value, ensure_ascii=False))
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return json.dumps(value, ensure_ascii=False)
+    return "" if value is None else value
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
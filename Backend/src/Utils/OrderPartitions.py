@@ -0,0 +1,135 @@
+from sqlalchemy import text
+from datetime import datetime
+
+# Monthly range partitioning of `orders` on created_at (Postgres only).
+# Partitions are named orders_pYYYY_MM; rows outside every range land in orders_default.
+
+def _month_start(year: int, month: int) -> datetime:
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1)
+
+def _partition_name(start: datetime) -> str:
+    return f"orders_p{start:%Y_%m}"
+
+def is_postgres(connection) -> bool:
+    return connection.dialect.name == "postgresql"
+
+def is_partitioned(connection) -> bool:
+    if not is_postgres(connection):
+        return False
+    return connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'orders'"
+    )).first() is not None
+
+def create_month_partition(connection, start: datetime, table: str = "orders"):
+    end = _month_start(start.year, start.month + 1)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(start)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    ))
+
+# pg_advisory_xact_lock key: every worker runs the maintenance, one at a time
+PARTITION_LOCK_KEY = 7310421
+
+def _month_partitions(connection):
+    return [row[0] for row in connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'orders' AND c.relname LIKE 'orders_p%'"
+    ))]
+
+def _create_partition_from_default(connection, start: datetime):
+    # Postgres refuses a new partition while orders_default holds rows in its range (the
+    # maintenance lapsed and orders kept coming): detach the default, move them, reattach
+    bounds = {"start": start, "end": _month_start(start.year, start.month + 1)}
+    in_range = "WHERE created_at >= :start AND created_at < :end"
+    has_default = connection.execute(text("SELECT 1 FROM pg_class WHERE relname = 'orders_default'")).first() is not None
+    if not has_default or connection.execute(text(f"SELECT 1 FROM orders_default {in_range} LIMIT 1"), bounds).first() is None:
+        create_month_partition(connection, start)
+        return
+    connection.execute(text("ALTER TABLE orders DETACH PARTITION orders_default"))
+    create_month_partition(connection, start)
+    connection.execute(text(f"INSERT INTO {_partition_name(start)} SELECT * FROM orders_default {in_range}"), bounds)
+    connection.execute(text(f"DELETE FROM orders_default {in_range}"), bounds)
+    connection.execute(text("ALTER TABLE orders ATTACH PARTITION orders_default DEFAULT"))
+
+def ensure_order_partitions(connection, months_ahead: int = 3):
+    """
+    Creates the current month's partition and the next `months_ahead` ones, if missing;
+    returns the names created. Runs at app startup and in the periodic sweeper (see main.py)
+    as well as from the scripts, so it is cheap when nothing is missing and serialized with
+    an advisory lock otherwise. The caller commits.
+    """
+    if not is_partitioned(connection):
+        return []
+    now = datetime.utcnow()
+    wanted = [_month_start(now.year, now.month + offset) for offset in range(months_ahead + 1)]
+    existing = set(_month_partitions(connection))
+    if all(_partition_name(start) in existing for start in wanted):
+        return []
+
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+    existing = set(_month_partitions(connection)) # Another worker may have created them meanwhile
+    created = []
+    for start in wanted:
+        if _partition_name(start) not in existing:
+            _create_partition_from_default(connection, start)
+            created.append(_partition_name(start))
+    return created
+
+def drop_empty_partitions_before(connection, cutoff: datetime):
+    """Drops month partitions that end before `cutoff` and no longer hold rows (after archival)."""
+    if not is_partitioned(connection):
+        return []
+    names = _month_partitions(connection)
+
+    dropped = []
+    for name in sorted(names):
+        start = datetime.strptime(name, "orders_p%Y_%m")
+        if _month_start(start.year, start.month + 1) > cutoff:
+            continue
+        if connection.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is None:
+            connection.execute(text(f"ALTER TABLE orders DETACH PARTITION {name}"))
+            connection.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
+
+def partition_orders_table(connection, months_ahead: int = 3):
+    """
+    One-off migration: rebuilds `orders` as a table partitioned by month on created_at.
+
+    Postgres requires the partition key in the primary key, so the key becomes
+    (id, created_at) and order_items.order_id can no longer be a declared foreign key;
+    the application always writes and deletes orders together with their items.
+    """
+    connection.execute(text("ALTER TABLE order_items DROP CONSTRAINT IF EXISTS order_items_order_id_fkey"))
+    connection.execute(text("UPDATE orders SET created_at = now() WHERE created_at IS NULL"))
+
+    connection.execute(text(
+        "CREATE TABLE orders_partitioned (LIKE orders INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(text("ALTER TABLE orders_partitioned ALTER COLUMN created_at SET NOT NULL"))
+    connection.execute(text("ALTER TABLE orders_partitioned ADD PRIMARY KEY (id, created_at)"))
+
+    bounds = connection.execute(text("SELECT min(created_at), max(created_at) FROM orders")).first()
+    now = datetime.utcnow()
+    first = bounds[0] or now
+    last = max(bounds[1] or now, now)
+    month = _month_start(first.year, first.month)
+    end = _month_start(last.year, last.month + months_ahead)
+    while month <= end:
+        create_month_partition(connection, month, table="orders_partitioned")
+        month = _month_start(month.year, month.month + 1)
+    connection.execute(text("CREATE TABLE orders_default PARTITION OF orders_partitioned DEFAULT"))
+
+    connection.execute(text("INSERT INTO orders_partitioned SELECT * FROM orders"))
+
+    # Keep the id sequence when the old table goes away
+    connection.execute(text("ALTER SEQUENCE orders_id_seq OWNED BY NONE"))
+    connection.execute(text("DROP TABLE orders"))
+    connection.execute(text("ALTER TABLE orders_partitioned RENAME TO orders"))
+    connection.execute(text("ALTER SEQUENCE orders_id_seq OWNED BY orders.id"))
+
+    connection.execute(text("CREATE INDEX ix_orders_id ON orders (id)"))
+    connection.execute(text("CREATE INDEX ix_orders_user_created ON orders (user_id, created_at, id)"))
@@ -0,0 +1,118 @@
+from PIL import Image
+from itertools import combinations
+from typing import Dict, Iterable, List, Set, Tuple
+import numpy as np
+
+# 64-bit perceptual hashes. pHash (low frequencies of a 32x32 DCT) survives
+# recompression and resizing; dHash (horizontal gradients) is used to confirm matches.
+HASH_BITS = 64
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix, so the 2D DCT of X is D @ X @ D.T."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+_DCT32 = _dct_matrix(32)
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8)).tobytes(), "big")
+
+def phash(image: Image.Image) -> int:
+    pixels = np.asarray(image.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT32 @ pixels @ _DCT32.T)[:8, :8].flatten()
+    # The DC term only carries overall brightness, so it is left out of the median
+    return _bits_to_int(low > np.median(low[1:]))
+
+def dhash(image: Image.Image) -> int:
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int((pixels[:, 1:] > pixels[:, :-1]).flatten())
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+# Database columns are signed BIGINT
+def to_signed(value: int) -> int:
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+class MultiIndexHashTable:
+    """
+    Hamming-radius search over 64-bit hashes (multi-index hashing).
+
+    Hashes are split into `chunks` 16-bit substrings, each indexed in its own table.
+    If two hashes are within distance r, at least one substring is within r // chunks
+    (pigeonhole), so a query probes every substring value within that radius and
+    verifies the few candidates with a popcount. Identical hashes share one entry.
+    """
+
+    def __init__(self, chunks: int = 4):
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self.mask = (1 << self.chunk_bits) - 1
+        self.tables: List[Dict[int, Set[int]]] = [{} for _ in range(chunks)]
+        self.ids_by_hash: Dict[int, Set[int]] = {}
+        self._flips: Dict[int, List[int]] = {}
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.ids_by_hash.values())
+
+    def _substrings(self, value: int) -> Iterable[Tuple[int, int]]:
+        for index in range(self.chunks):
+            yield index, (value >> (index * self.chunk_bits)) & self.mask
+
+    def _neighbour_masks(self, radius: int) -> List[int]:
+        # XOR masks of every substring value within `radius` bits, cached per radius
+        if radius not in self._flips:
+            masks = [0]
+            for distance in range(1, radius + 1):
+                for bits in combinations(range(self.chunk_bits), distance):
+                    masks.append(sum(1 << bit for bit in bits))
+            self._flips[radius] = masks
+        return self._flips[radius]
+
+    def add(self, item_id: int, value: int):
+        ids = self.ids_by_hash.get(value)
+        if ids is None:
+            ids = self.ids_by_hash[value] = set()
+            for index, substring in self._substrings(value):
+                self.tables[index].setdefault(substring, set()).add(value)
+        ids.add(item_id)
+
+    def remove(self, item_id: int, value: int):
+        ids = self.ids_by_hash.get(value)
+        if not ids:
+            return
+        ids.discard(item_id)
+        if ids:
+            return
+        del self.ids_by_hash[value]
+        for index, substring in self._substrings(value):
+            bucket = self.tables[index].get(substring)
+            if bucket is not None:
+                bucket.discard(value)
+                if not bucket:
+                    del self.tables[index][substring]
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int]]:
+        """(item_id, distance) pairs for every stored hash within `radius` of `value`, closest first."""
+        masks = self._neighbour_masks(radius // self.chunks)
+        candidates = set()
+        for index, substring in self._substrings(value):
+            table = self.tables[index]
+            for mask in masks:
+                bucket = table.get(substring ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+
+        results = []
+        for candidate in candidates:
+            distance = (candidate ^ value).bit_count()
+            if distance <= radius:
+                results.extend((item_id, distance) for item_id in self.ids_by_hash[candidate])
+        results.sort(key=lambda pair: pair[1])
+        return results
@@ -0,0 +1,45 @@
+from fastapi import Request, Response
+from src.Utils.Compression import STATIC_LEVELS, STATIC_ORDER, compress, negotiate
+import hashlib
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+class PrecompressedBody:
+    """
+    A response body serialized once and compressed at most once per coding (on the
+    first request that asks for it), then served from memory as is.
+    The ETag is derived from the content, so unchanged rebuilds keep client caches valid.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self._variants = {}
+
+    def variant(self, coding: str) -> bytes:
+        """The body in `coding`; the plain body if compressing does not make it smaller."""
+        encoded = self._variants.get(coding)
+        if encoded is None:
+            # A concurrent first request may compress twice; both results are identical
+            encoded = compress(self.body, coding, STATIC_LEVELS[coding])
+            self._variants[coding] = encoded if len(encoded) < len(self.body) else self.body
+        return self._variants[coding]
+
+    def response(self, request: Request, cache_control: str = "no-cache") -> Response:
+        # no-cache: clients may keep it but revalidate, which costs a 304 with no body
+        headers = {"ETag": self.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request, self.etag):
+            return Response(status_code=304, headers=headers)
+        request.state.uncompressed_size = len(self.body) # Reported by CompressionMiddleware
+        coding = negotiate(request.headers.get("accept-encoding", ""), STATIC_ORDER)
+        if coding is not None:
+            encoded = self.variant(coding)
+            if encoded is not self.body:
+                headers["Content-Encoding"] = coding
+                return Response(content=encoded, media_type=self.media_type, headers=headers)
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
@@ -0,0 +1,74 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, List, NamedTuple, Sequence
+from src.Utils.Colors import fold
+import numpy as np
+
+class PrefixEntry(NamedTuple):
+    label: str
+    payload: Any
+    weight: int # Higher ranks first among equally good matches
+
+class PrefixIndex:
+    """
+    Accent-folded prefix search over short labels (team names, seasons, ...).
+
+    Every word suffix of a label is a key ("real madrid", "madrid"), and the keys are
+    kept in one sorted list, so a query is two binary searches for the range of keys
+    starting with it plus a vectorised ranking pass over that range. One- and two-character
+    prefixes match large ranges, so their best `cached` results are ranked at build
+    time. Immutable: rebuild to change.
+    """
+
+    def __init__(self, entries: Sequence[PrefixEntry], short_prefix: int = 2, cached: int = 20):
+        self.entries = list(entries)
+        self.folded = [fold(entry.label) for entry in self.entries]
+        keys = []
+        for n, folded in enumerate(self.folded):
+            words = folded.split()
+            keys += [(" ".join(words[i:]), i, n) for i in range(len(words))]
+        keys.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.word_starts = np.array([start for _, start, _ in keys], dtype=np.int64)
+        self.entry_ids = np.array([n for _, _, n in keys], dtype=np.int64)
+
+        # Order among equally good matches: heavier, then shorter, then alphabetical
+        by_rank = sorted(range(len(self.entries)), key=lambda n: (-self.entries[n].weight, len(self.entries[n].label), self.entries[n].label))
+        self.static_rank = np.empty(len(self.entries), dtype=np.int64)
+        self.static_rank[by_rank] = np.arange(len(self.entries))
+
+        self.cached = cached
+        self.short = {}
+        for length in range(1, short_prefix + 1):
+            for prefix in {key[:length] for key in self.keys}:
+                self.short[prefix] = self._search(prefix, cached)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query: str, limit: int = 10) -> List[PrefixEntry]:
+        """Entries with a word starting with `query`: exact matches, then label prefixes, then inner words; heavier first."""
+        q = fold(query)
+        if not q:
+            return []
+        if q in self.short and limit <= self.cached:
+            return self.short[q][:limit]
+        return self._search(q, limit)
+
+    def _search(self, q: str, limit: int) -> List[PrefixEntry]:
+        lo = bisect_left(self.keys, q)
+        hi = bisect_left(self.keys, q + "\uffff", lo)
+        if lo == hi:
+            return []
+
+        # Tier 0: the whole label is the query; 1: the label starts with it; 2: an inner word does
+        ids = self.entry_ids[lo:hi]
+        tier = np.where(self.word_starts[lo:hi] == 0, 1, 2)
+        exact = bisect_right(self.keys, q, lo, hi) - lo
+        tier[:exact] -= tier[:exact] == 1
+        score = tier * len(self.entries) + self.static_rank[ids]
+
+        # Best key per entry, then the `limit` best entries
+        order = np.argsort(score, kind="stable")
+        _, first = np.unique(ids[order], return_index=True)
+        best = order[np.sort(first)[:limit]]
+        return [self.entries[n] for n in ids[best].tolist()]
@@ -0,0 +1,181 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import Counter
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from src.Utils.Metrics import route_template
+from typing import Optional
+import functools
+import inspect
+import os
+import re
+import time
+
+# Every statement run through any engine is counted and timed against the request (or
+# assert_max_queries block) it runs in. Outside of one, only slow statements are reported.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5)) # Same statement shape this often in one request
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+class QueryStats:
+    """Statements issued by one request (or block). Counts also roll up into the enclosing stats."""
+
+    def __init__(self, label: str = None, parent: "QueryStats" = None, scope=None):
+        self.label = label
+        self.parent = parent
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        self.started = time.perf_counter()
+        self.endpoint_done = None
+
+    def record(self, shape: str, seconds: float):
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats.shapes[shape] += 1
+            if stats.shapes[shape] == N_PLUS_ONE_THRESHOLD and stats.describe():
+                print(f"Possible N+1 in {stats.describe()}: statement ran {N_PLUS_ONE_THRESHOLD}+ times: {shape[:300]}")
+            stats = stats.parent
+
+    def describe(self) -> Optional[str]:
+        # Requests are named after the matched route, which is known once routing ran
+        if self.label is None and self.scope is not None:
+            return f"{self.scope['method']} {route_template(self.scope)}"
+        return self.label
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        """Statement shapes run at least `threshold` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*\)")
+_SPACES = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    # Bound parameters already keep values out of the text; expanded IN lists are folded
+    return _IN_LIST.sub("(...)", _SPACES.sub(" ", statement).strip())
+
+def _redact_value(value):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+def redact_parameters(parameters):
+    """Parameters with every value replaced by its type (and length), for logs."""
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)): # executemany
+            return f"{len(parameters)} sets like {redact_parameters(parameters[0])}"
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement_shape(statement), seconds)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        where = f" in {stats.describe()}" if stats is not None and stats.describe() else ""
+        print(f"Slow query ({seconds * 1000:.0f} ms){where}: {statement_shape(statement)[:500]} params={redact_parameters(parameters)}")
+
+class QueryStatsMiddleware:
+    """
+    Tracks the statements of each request. With SERVER_TIMING enabled, responses carry
+    Server-Timing: db;dur=<ms>, db-count;desc=<statements>, serialize;dur=<ms>, total;dur=<ms>
+    (serialize: from the endpoint returning to the response starting, see InstrumentedRoute).
+    """
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats(parent=_current.get(), scope=scope)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append("Server-Timing", server_timing_header(stats))
+            await send(message)
+
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+def server_timing_header(stats: QueryStats) -> str:
+    now = time.perf_counter()
+    parts = [f"db;dur={stats.seconds * 1000:.2f}", f"db-count;desc={stats.count}"]
+    if stats.endpoint_done is not None:
+        parts.append(f"serialize;dur={(now - stats.endpoint_done) * 1000:.2f}")
+    parts.append(f"total;dur={(now - stats.started) * 1000:.2f}")
+    return ", ".join(parts)
+
+def _mark_endpoint_done(endpoint):
+    # Notes when the endpoint returned; what follows until the response starts is serialization
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                stats = _current.get()
+                if stats is not None:
+                    stats.endpoint_done = time.perf_counter()
+    else:
+        @functools.wraps(endpoint)
+        def timed_endpoint(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                stats = _current.get()
+                if stats is not None:
+                    stats.endpoint_done = time.perf_counter()
+    return timed_endpoint
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute whose endpoint reports when it returned (for the serialize timing)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = None):
+    """
+    Fails with AssertionError if the block issues more than `limit` statements. Works
+    around controller calls and in-process ASGI requests (httpx.ASGITransport); the
+    yielded QueryStats has the count and the repeated shapes.
+    """
+    stats = QueryStats(label, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    if stats.count > limit:
+        repeated = "; ".join(f"{count}x {shape[:120]}" for shape, count in stats.repeated(2)[:3])
+        raise AssertionError(f"{label or 'Block'} issued {stats.count} queries (max {limit}){': ' + repeated if repeated else ''}")
@@ -0,0 +1,100 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Type, Union, get_args, get_origin
+import orjson
+import types
+
+# Include spec for sparse fieldsets: {"id": True, "jersey_type": {"name": True}}
+Include = Dict[str, Union[bool, "Include"]]
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson (datetimes, dicts and lists of plain values)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def _nested_model(annotation):
+    # (model, is_list) for BaseModel, Optional[BaseModel] and List[BaseModel] fields
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin in (list, List) and args:
+        model, _ = _nested_model(args[0])
+        return model, True
+    if origin in (Union, types.UnionType):
+        for arg in args:
+            if arg is not type(None):
+                return _nested_model(arg)
+    return None, False
+
+class ModelSerializer:
+    """
+    Serializer for one response model over trusted ORM objects, built once at import.
+
+    The model's field plan (names, nested models, defaults) is resolved up front, so
+    dumping reads only the attributes that are asked for, without validating data that
+    came straight from the database. Relations left out of a sparse fieldset are never
+    touched, so they are never lazy-loaded either. The model itself stays the
+    documented response_model and the validator for untrusted input.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = {}
+        for name, info in model.model_fields.items():
+            nested, many = _nested_model(info.annotation)
+            default = None if info.is_required() else info.get_default(call_default_factory=True)
+            self.fields[name] = (ModelSerializer(nested) if nested else None, many, default)
+
+    def dump(self, obj, include: Optional[Include] = None) -> dict:
+        result = {}
+        for name, (nested, many, default) in self.fields.items():
+            if include is not None and name not in include:
+                continue
+            value = getattr(obj, name, default)
+            if nested is not None and value is not None:
+                sub = None if include is None or include[name] is True else include[name]
+                value = [nested.dump(item, sub) for item in value] if many else nested.dump(value, sub)
+            result[name] = value
+        return result
+
+    def dump_many(self, objs, include: Optional[Include] = None) -> List[dict]:
+        return [self.dump(obj, include) for obj in objs]
+
+    def parse_fields(self, fields: Optional[str]) -> Optional[Include]:
+        """`id,season,jersey_type.name` to an include spec; None means every field. 400 on unknown fields."""
+        if not fields or not fields.strip():
+            return None
+        include = {}
+        for path in fields.split(","):
+            path = path.strip()
+            if not path:
+                continue
+            serializer, node = self, include
+            parts = path.split(".")
+            for depth, part in enumerate(parts):
+                if serializer is None or part not in serializer.fields:
+                    raise HTTPException(status_code=400, detail=f"Campo desconhecido: {path}")
+                nested = serializer.fields[part][0]
+                if depth == len(parts) - 1:
+                    node[part] = True
+                else:
+                    if node.get(part) is True:
+                        break # The whole object was already requested
+                    node = node.setdefault(part, {})
+                    serializer = nested
+        return include or None
+
+def project(document, include: Optional[Include]):
+    """Applies an include spec to an already rendered document (dicts and lists)."""
+    if include is None:
+        return document
+    if isinstance(document, list):
+        return [project(item, include) for item in document]
+    if not isinstance(document, dict):
+        return document
+    return {
+        name: value if include[name] is True else project(value, include[name])
+        for name, value in document.items() if name in include
+    }
@@ -0,0 +1,149 @@
+from fastapi import HTTPException, UploadFile, params
+from PIL import Image, UnidentifiedImageError
+from src.Utils.QueryStats import InstrumentedRoute
+from typing import get_origin
+import hashlib
+import io
+import os
+import uuid
+
+# Uploaded files live on disk under MEDIA_DIR and are served at MEDIA_URL (see main.py)
+MEDIA_DIR = os.getenv("MEDIA_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "media")))
+MEDIA_URL = "/media"
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024)) # Per file
+MAX_FILES_PER_REQUEST = 20
+CHUNK_SIZE = 64 * 1024
+MULTIPART_OVERHEAD = 64 * 1024 # Boundaries, part headers and small form fields on top of the files
+
+ALLOWED_IMAGE_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "AVIF": "avif"}
+
+def media_url(path: str):
+    return f"{MEDIA_URL}/{path}" if path else None
+
+def media_path_from_url(url: str) -> str:
+    """Inverse of media_url for URLs sent back by clients; rejects anything outside MEDIA_DIR."""
+    prefix = MEDIA_URL + "/"
+    path = url.split("?", 1)[0]
+    if not path.startswith(prefix):
+        raise HTTPException(status_code=400, detail="URL de imagem inválido")
+    path = path[len(prefix):]
+    full = os.path.abspath(os.path.join(MEDIA_DIR, path))
+    if not full.startswith(os.path.abspath(MEDIA_DIR) + os.sep) or not os.path.isfile(full):
+        raise HTTPException(status_code=400, detail="URL de imagem inválido")
+    return path
+
+def limited_receive(receive, headers: dict, max_bytes: int):
+    """
+    Wraps an ASGI receive channel so a request body over max_bytes raises 413 while it is
+    still arriving: the declared Content-Length is checked before anything is read, and the
+    bytes actually received are counted in case it is missing or wrong.
+    """
+    length = headers.get(b"content-length")
+    if length is not None:
+        if not length.isdigit():
+            raise HTTPException(status_code=400, detail="Content-Length inválido")
+        if int(length) > max_bytes:
+            raise HTTPException(status_code=413, detail="Pedido demasiado grande")
+    received = 0
+
+    async def receive_limited():
+        nonlocal received
+        message = await receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                raise HTTPException(status_code=413, detail="Pedido demasiado grande")
+        return message
+    return receive_limited
+
+class UploadRoute(InstrumentedRoute):
+    """
+    Route class for routers with file uploads. FastAPI parses (and spools to disk) multipart
+    bodies before any dependency runs, get_current_admin included, so the body is capped on
+    the receive channel instead: MAX_UPLOAD_BYTES per file, MAX_FILES_PER_REQUEST files for
+    List[UploadFile] parameters, plus MULTIPART_OVERHEAD. Routes without File parameters are
+    left alone.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        files = [param for param in self.dependant.body_params if isinstance(param.field_info, params.File)]
+        self.max_body = None
+        if files:
+            per_param = lambda param: MAX_FILES_PER_REQUEST if get_origin(param.field_info.annotation) is list else 1
+            self.max_body = MAX_UPLOAD_BYTES * sum(per_param(param) for param in files) + MULTIPART_OVERHEAD
+
+    async def handle(self, scope, receive, send):
+        if self.max_body is not None:
+            receive = limited_receive(receive, dict(scope["headers"]), self.max_body)
+        await super().handle(scope, receive, send)
+
+def probe_image(path: str) -> str:
+    """Returns the image format, or raises 400 if the file is not an allowed image."""
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise HTTPException(status_code=400, detail="Formato de imagem não suportado")
+    if image_format not in ALLOWED_IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato de imagem não suportado")
+    return image_format
+
+def save_image_upload(upload: UploadFile, subdir: str) -> str:
+    """
+    Copies an uploaded image to MEDIA_DIR in fixed-size chunks, enforcing MAX_UPLOAD_BYTES,
+    and validates its format. Files are content-addressed (subdir/ab/<sha256>.<ext>), so
+    re-uploading the same image reuses the stored file. Returns the path relative to MEDIA_DIR.
+
+    Called from sync routes, so the copy and the Pillow validation run in the worker
+    threadpool rather than on the event loop.
+    """
+    tmp_dir = os.path.join(MEDIA_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(tmp_path, "wb") as output:
+            while True:
+                chunk = upload.file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Imagem demasiado grande (máximo {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)")
+                digest.update(chunk)
+                output.write(chunk)
+
+        if written == 0:
+            raise HTTPException(status_code=400, detail="Ficheiro vazio")
+
+        extension = ALLOWED_IMAGE_FORMATS[probe_image(tmp_path)]
+        name = digest.hexdigest()
+        relative = os.path.join(subdir, name[:2], f"{name}.{extension}")
+        final_path = os.path.join(MEDIA_DIR, relative)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return relative.replace(os.sep, "/")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def save_image_bytes(raw: bytes, subdir: str) -> str:
+    """save_image_upload for an image already in memory (e.g. base64 sent by JSON clients)."""
+    return save_image_upload(UploadFile(io.BytesIO(raw)), subdir)
+
+def read_upload(upload: UploadFile) -> bytes:
+    """Reads a small upload (e.g. an avatar) into memory, enforcing MAX_UPLOAD_BYTES."""
+    data = bytearray()
+    while True:
+        chunk = upload.file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        data.extend(chunk)
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Imagem demasiado grande (máximo {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)")
+    return bytes(data)
@@ -1,9 +1,11 @@
 import { useState, useEffect } from 'react';
 import { FaChevronLeft, FaChevronRight } from 'react-icons/fa';
+import ResponsiveImage from '../Shared/ResponsiveImage';
+import type { CatalogImage } from '../../services/catalog.service';
 import './Carousel.css';
 
 interface CarouselProps {
-    images: string[];
+    images: Array<string | CatalogImage>; // Bundled asset URLs or uploaded catalog images
     autoPlayInterval?: number;
 }
 
@@ -32,7 +34,11 @@ const Carousel: React.FC<CarouselProps> = ({ images, autoPlayInterval = 5000 })
     return (
         <div className="carousel-container">
             <div className="carousel-slide">
-                <img src={images[currentIndex]} alt={`Slide ${currentIndex + 1}`} className="carousel-image" />
+                {typeof images[currentIndex] === 'string' ? (
+                    <img src={images[currentIndex] as string} alt={`Slide ${currentIndex + 1}`} className="carousel-image" />
+                ) : (
+                    <ResponsiveImage image={images[currentIndex] as CatalogImage} size="zoom" alt={`Slide ${currentIndex + 1}`} className="carousel-image" />
+                )}
             </div>
 
             {images.length > 1 && (
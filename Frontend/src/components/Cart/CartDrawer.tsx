@@ -2,6 +2,7 @@ import { useRef, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
 import { useCart } from '../../contexts/CartContext';
+import ResponsiveImage from '../Shared/ResponsiveImage';
 import { FaTimes, FaTrash, FaShoppingBag } from 'react-icons/fa';
 import './CartDrawer.css';
 
@@ -71,7 +72,7 @@ const CartDrawer = () => {
                                 <div key={`${item.jersey.id}-${item.size}-${index}`} className="cart-item">
                                     <div className="cart-item-image">
                                         {mainImage && (
-                                            <img src={mainImage.image_base64} alt={item.jersey.team_name} />
+                                            <ResponsiveImage image={mainImage} size="card" alt={item.jersey.team_name} />
                                         )}
                                     </div>
                                     <div className="cart-item-info">
@@ -2,20 +2,34 @@ import { useState, useEffect, useRef } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
 import { useCart } from '../../contexts/CartContext';
-import { catalogService, type Jersey } from '../../services/catalog.service';
+import { catalogService, type Suggestion } from '../../services/catalog.service';
 import { FaShoppingCart } from 'react-icons/fa';
 import UserDropdown from './UserDropdown';
 import CartDrawer from '../Cart/CartDrawer';
 import LogoPreto from '../../assets/Logos/LogoPreto.png';
 import './Header.css';
 
+const suggestionKinds: Record<Suggestion['kind'], string> = {
+    team: 'Clube',
+    league: 'Liga',
+    type: 'Tipo',
+    season: 'Época'
+};
+
+// Leagues and types open the catalog filtered; teams and seasons are text searches
+const suggestionLink = (suggestion: Suggestion) => {
+    if (suggestion.kind === 'league') return `/catalog?league=${suggestion.id}`;
+    if (suggestion.kind === 'type') return `/catalog?type=${suggestion.id}`;
+    return `/catalog?search=${encodeURIComponent(suggestion.label)}`;
+};
+
 const Header = () => {
     const { isAuthenticated, user } = useAuth();
     const { toggleCart, totalItems } = useCart();
     const navigate = useNavigate();
 
     const [searchQuery, setSearchQuery] = useState('');
-    const [searchResults, setSearchResults] = useState<Jersey[]>([]);
+    const [searchResults, setSearchResults] = useState<Suggestion[]>([]);
     const [showResults, setShowResults] = useState(false);
     const searchRef = useRef<HTMLDivElement>(null);
 
@@ -30,13 +44,13 @@ const Header = () => {
         return () => document.removeEventListener('mousedown', handleClickOutside);
     }, []);
 
-    // Debounced search
+    // Debounced typeahead (served from the backend's in-memory suggestion index)
     useEffect(() => {
         const timer = setTimeout(async () => {
-            if (searchQuery.trim().length >= 2) {
+            if (searchQuery.trim().length >= 1) {
                 try {
-                    const response = await catalogService.getJerseys({ search: searchQuery }, { limit: 5 });
-                    setSearchResults(response.data);
+                    const suggestions = await catalogService.getSuggestions(searchQuery.trim());
+                    setSearchResults(suggestions);
                     setShowResults(true);
                 } catch (error) {
                     console.error("Error searching:", error);
@@ -45,7 +59,7 @@ const Header = () => {
                 setSearchResults([]);
                 setShowResults(false);
             }
-        }, 300);
+        }, 100);
 
         return () => clearTimeout(timer);
     }, [searchQuery]);
@@ -95,7 +109,7 @@ const Header = () => {
                                 className="search-input"
                                 value={searchQuery}
                                 onChange={(e) => setSearchQuery(e.target.value)}
-                                onFocus={() => searchQuery.length >= 2 && setShowResults(true)}
+                                onFocus={() => searchQuery.trim().length >= 1 && setShowResults(true)}
                                 autoComplete="off"
                             />
                             <button type="submit" className="search-submit">
@@ -109,27 +123,17 @@ const Header = () => {
                         {/* Live Results Dropdown */}
                         {showResults && searchResults.length > 0 && (
                             <div className="search-results-dropdown">
-                                {searchResults.map(jersey => (
+                                {searchResults.map(suggestion => (
                                     <Link
-                                        to={`/jerseys/${jersey.id}`}
-                                        key={jersey.id}
+                                        to={suggestionLink(suggestion)}
+                                        key={`${suggestion.kind}-${suggestion.id ?? suggestion.label}`}
                                         className="search-result-item"
                                         onClick={() => setShowResults(false)}
                                     >
-                                        <div className="result-image">
-                                            {jersey.images?.[0] ? (
-                                                <img src={jersey.images[0].image_base64} alt={jersey.team_name} />
-                                            ) : (
-                                                <div className="result-no-image">No Img</div>
-                                            )}
-                                        </div>
                                         <div className="result-info">
-                                            <span className="result-name">{jersey.team_name}</span>
-                                            <span className="result-meta">{jersey.season} - {jersey.jersey_type?.name}</span>
+                                            <span className="result-name">{suggestion.label}</span>
+                                            <span className="result-meta">{suggestionKinds[suggestion.kind]} · {suggestion.count} camisolas</span>
                                         </div>
-                                        <span className="result-price">
-                                            {jersey.jersey_type?.current_price} €
-                                        </span>
                                     </Link>
                                 ))}
                                 <Link to={`/catalog?search=${encodeURIComponent(searchQuery)}`} className="view-all-results" onClick={() => setShowResults(false)}>
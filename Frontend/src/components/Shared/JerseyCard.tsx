@@ -1,5 +1,6 @@
 import { Link } from 'react-router-dom';
 import type { Jersey } from '../../services/catalog.service';
+import ResponsiveImage from './ResponsiveImage';
 import './JerseyCard.css';
 
 interface JerseyCardProps {
@@ -14,7 +15,7 @@ const JerseyCard = ({ jersey }: JerseyCardProps) => {
         <Link to={`/jerseys/${jersey.id}`} className="jersey-card">
             <div className="jersey-image-container">
                 {mainImage ? (
-                    <img src={mainImage.image_base64} alt={`${jersey.team_name} jersey`} loading="lazy" />
+                    <ResponsiveImage image={mainImage} size="card" alt={`${jersey.team_name} jersey`} loading="lazy" />
                 ) : (
                     <div className="no-image">Sem Imagem</div>
                 )}
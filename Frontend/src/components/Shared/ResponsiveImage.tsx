@@ -0,0 +1,26 @@
+import type { ImgHTMLAttributes } from 'react';
+import { imageSrc, mediaUrl, type CatalogImage, type VariantSize } from '../../services/catalog.service';
+
+interface ResponsiveImageProps extends ImgHTMLAttributes<HTMLImageElement> {
+    image?: CatalogImage | null;
+    size: VariantSize;
+}
+
+// Serves the pre-rendered AVIF/WebP derivative for the display size, falling back to the original upload
+const ResponsiveImage = ({ image, size, ...imgProps }: ResponsiveImageProps) => {
+    const variant = image?.variants?.[size];
+
+    if (!variant) {
+        return <img src={imageSrc(image)} {...imgProps} />;
+    }
+
+    return (
+        <picture style={{ display: 'contents' }}>
+            {variant.avif && <source srcSet={mediaUrl(variant.avif)} type="image/avif" />}
+            {variant.webp && <source srcSet={mediaUrl(variant.webp)} type="image/webp" />}
+            <img src={imageSrc(image)} {...imgProps} />
+        </picture>
+    );
+};
+
+export default ResponsiveImage;
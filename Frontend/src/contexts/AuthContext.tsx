@@ -29,12 +29,12 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
     const fetchUserProfile = async () => {
         try {
             // Dynamic import to avoid circular dependency
-            const { profileService } = await import('../services/profile.service');
+            const { profileService, resolveAvatarUrl } = await import('../services/profile.service');
             const data = await profileService.getProfile();
 
             // Update profile image
-            if (data.user_images && data.user_images.length > 0) {
-                setProfileImage(data.user_images[data.user_images.length - 1].image_data);
+            if (data.avatar_url) {
+                setProfileImage(resolveAvatarUrl(data.avatar_url));
             }
 
             // Update user info (sync username if changed)
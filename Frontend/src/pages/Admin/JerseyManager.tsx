@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
-import { catalogService } from '../../services/catalog.service';
-import type { Team, JerseyImage, JerseyType } from '../../services/catalog.service';
+import { catalogService, imageSrc } from '../../services/catalog.service';
+import type { Jersey, Team, JerseyImage, JerseyType } from '../../services/catalog.service';
 import { FaTrash, FaPlus, FaArrowLeft, FaStar, FaRegStar } from 'react-icons/fa';
 import { useNavigate } from 'react-router-dom';
 import {
@@ -53,7 +53,7 @@ const SortableImageItem = ({ img, index, onRemove, onSetMain }: { img: SortableJ
 
     return (
         <div ref={setNodeRef} style={style} {...attributes} {...listeners}>
-            <img src={img.image_base64} style={{ width: '100%', height: '100%', objectFit: 'cover' }} draggable={false} />
+            <img src={imageSrc(img)} style={{ width: '100%', height: '100%', objectFit: 'cover' }} draggable={false} />
             {/* Buttons need to stop propagation to allow clicking them without dragging */}
             <button
                 type="button"
@@ -184,12 +184,20 @@ const JerseyManager = () => {
                 images: cleanImages
             };
 
-            if (editingId) {
-                await catalogService.updateJersey(editingId, data);
-                alert("Camisola atualizada com sucesso!");
+            const saved: Jersey = editingId
+                ? await catalogService.updateJersey(editingId, data)
+                : await catalogService.createJersey(data);
+            const message = editingId ? "Camisola atualizada com sucesso!" : "Camisola criada com sucesso!";
+
+            // Near-duplicate images are saved anyway; the admin is told where the copies are
+            const duplicates = saved.duplicate_warnings || [];
+            if (duplicates.length > 0) {
+                const details = duplicates
+                    .map(w => `Imagem ${w.position + 1} parece igual a uma imagem da camisola #${w.jersey_id}`)
+                    .join('\n');
+                alert(`${message}\n\nPossíveis imagens duplicadas:\n${details}`);
             } else {
-                await catalogService.createJersey(data);
-                alert("Camisola criada com sucesso!");
+                alert(message);
             }
 
             resetForm();
@@ -341,7 +349,7 @@ const JerseyManager = () => {
                                 <div key={j.id} className="admin-card" style={{ background: 'var(--color-bg-secondary)', borderRadius: '10px', padding: '15px' }}>
                                     <div style={{ height: '200px', overflow: 'hidden', borderRadius: '5px', marginBottom: '10px', background: '#fff', display: 'flex', alignItems: 'center', justifyContent: 'center' }}>
                                         {mainImg ? (
-                                            <img src={mainImg.image_base64} style={{ maxHeight: '100%', maxWidth: '100%' }} />
+                                            <img src={imageSrc(mainImg)} style={{ maxHeight: '100%', maxWidth: '100%' }} />
                                         ) : (
                                             <span style={{ color: '#000' }}>Sem Imagem</span>
                                         )}
@@ -398,7 +406,7 @@ const JerseyManager = () => {
                                 }}>
                                     {filteredTeams.map(t => (
                                         <div key={t.id} onClick={() => handleTeamSelect(t)} className="dropdown-item" style={{ padding: '10px', cursor: 'pointer', borderBottom: '1px solid #eee', display: 'flex', alignItems: 'center', gap: '10px', color: '#333' }}>
-                                            {t.image_base64 && <img src={t.image_base64} style={{ width: '20px', height: '20px', objectFit: 'contain' }} />}
+                                            {imageSrc(t) && <img src={imageSrc(t)} style={{ width: '20px', height: '20px', objectFit: 'contain' }} />}
                                             <span>{t.name}</span>
                                         </div>
                                     ))}
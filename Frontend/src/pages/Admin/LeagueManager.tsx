@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { catalogService } from '../../services/catalog.service';
+import { catalogService, imageSrc } from '../../services/catalog.service';
 import type { League } from '../../services/catalog.service';
 import { FaTrash, FaPlus, FaArrowLeft } from 'react-icons/fa';
 import { useNavigate } from 'react-router-dom';
@@ -94,7 +94,7 @@ const LeagueManager = () => {
             <div className="leagues-grid" style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(200px, 1fr))', gap: '20px' }}>
                 {leagues.map(league => (
                     <div key={league.id} className="league-card" style={{ background: 'var(--color-bg-secondary)', padding: '15px', borderRadius: '10px', textAlign: 'center', position: 'relative' }}>
-                        {league.image_base64 && <img src={league.image_base64} alt={league.name} style={{ height: '80px', marginBottom: '10px', objectFit: 'contain' }} />}
+                        {imageSrc(league) && <img src={imageSrc(league)} alt={league.name} style={{ height: '80px', marginBottom: '10px', objectFit: 'contain' }} />}
                         <h4>{league.name}</h4>
                         <button
                             onClick={() => handleDelete(league.id!)}
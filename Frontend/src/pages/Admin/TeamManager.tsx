@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { catalogService } from '../../services/catalog.service';
+import { catalogService, imageSrc } from '../../services/catalog.service';
 import type { League, Team } from '../../services/catalog.service';
 import { FaTrash, FaPlus, FaArrowLeft } from 'react-icons/fa';
 import { useNavigate } from 'react-router-dom';
@@ -131,7 +131,7 @@ const TeamManager = () => {
             <div className="leagues-grid" style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(200px, 1fr))', gap: '20px' }}>
                 {teams.map(team => (
                     <div key={team.id} className="league-card" style={{ background: 'var(--color-bg-secondary)', padding: '15px', borderRadius: '10px', textAlign: 'center', position: 'relative' }}>
-                        {team.image_base64 && <img src={team.image_base64} alt={team.name} style={{ height: '80px', marginBottom: '10px', objectFit: 'contain' }} />}
+                        {imageSrc(team) && <img src={imageSrc(team)} alt={team.name} style={{ height: '80px', marginBottom: '10px', objectFit: 'contain' }} />}
                         <h4>{team.name}</h4>
                         <p style={{ fontSize: '0.8rem', opacity: 0.7 }}>{getLeagueName(team.league_id)}</p>
                         <button
@@ -1,14 +1,22 @@
 import { useState, useEffect } from 'react';
-import { catalogService, type Jersey, type League, type Team, type JerseyType } from '../../services/catalog.service';
+import { useSearchParams } from 'react-router-dom';
+import { catalogService, imageSrc, type Jersey, type LeagueWithTeams, type Team, type JerseyType } from '../../services/catalog.service';
+import ResponsiveImage from '../../components/Shared/ResponsiveImage';
 import JerseyCard from '../../components/Shared/JerseyCard';
 import FilterDropdown from '../../components/Shared/FilterDropdown';
 import './Catalog.css';
 import { FaFilter, FaSearch, FaChevronLeft, FaChevronRight } from 'react-icons/fa';
 
+// Optional number from the query string (?league=3)
+const numberParam = (value: string | null) => (value ? Number(value) || undefined : undefined);
+
 const Catalog = () => {
+    // Filters can be preset from the URL (header search and suggestions link here)
+    const [searchParams] = useSearchParams();
+
     // Data State
     const [jerseys, setJerseys] = useState<Jersey[]>([]);
-    const [leagues, setLeagues] = useState<League[]>([]);
+    const [leagues, setLeagues] = useState<LeagueWithTeams[]>([]);
     const [teams, setTeams] = useState<Team[]>([]);
     const [types, setTypes] = useState<JerseyType[]>([]);
 
@@ -18,27 +26,32 @@ const Catalog = () => {
     const [activeDropdown, setActiveDropdown] = useState<string | null>(null);
 
     // Filter State
-    const [selectedLeague, setSelectedLeague] = useState<number | undefined>(undefined);
+    const [selectedLeague, setSelectedLeague] = useState<number | undefined>(numberParam(searchParams.get('league')));
     const [selectedTeam, setSelectedTeam] = useState<number | undefined>(undefined);
-    const [selectedType, setSelectedType] = useState<number | undefined>(undefined);
+    const [selectedType, setSelectedType] = useState<number | undefined>(numberParam(searchParams.get('type')));
     const [selectedColor, setSelectedColor] = useState<string>('');
-    const [search, setSearch] = useState('');
+    const [search, setSearch] = useState(searchParams.get('search') || '');
 
     // Pagination State
     const [page, setPage] = useState(1);
     const [totalPages, setTotalPages] = useState(1);
     const [limit, setLimit] = useState(12);
 
-    // Load Initial Metadata (Leagues, Types)
+    // Follow header navigation while already on the catalog
+    useEffect(() => {
+        setSearch(searchParams.get('search') || '');
+        setSelectedLeague(numberParam(searchParams.get('league')));
+        setSelectedType(numberParam(searchParams.get('type')));
+        setPage(1);
+    }, [searchParams]);
+
+    // Load Initial Metadata (Leagues with their teams, Types) in one request
     useEffect(() => {
         const loadMetadata = async () => {
             try {
-                const [leaguesData, typesData] = await Promise.all([
-                    catalogService.getLeagues(),
-                    catalogService.getTypes()
-                ]);
-                setLeagues(leaguesData);
-                setTypes(typesData);
+                const data = await catalogService.getBootstrap();
+                setLeagues(data.leagues);
+                setTypes(data.types);
             } catch (error) {
                 console.error("Error loading metadata", error);
             }
@@ -46,15 +59,15 @@ const Catalog = () => {
         loadMetadata();
     }, []);
 
-    // Load Teams when League changes
+    // Teams of the selected League (already loaded with the bootstrap data)
     useEffect(() => {
         if (selectedLeague) {
-            catalogService.getTeams(selectedLeague).then(setTeams);
+            setTeams(leagues.find(league => league.id === selectedLeague)?.teams || []);
         } else {
             setTeams([]);
             setSelectedTeam(undefined);
         }
-    }, [selectedLeague]);
+    }, [selectedLeague, leagues]);
 
     // Load Jerseys when any filter changes
     useEffect(() => {
@@ -152,7 +165,7 @@ const Catalog = () => {
                                     className={`filter-item ${selectedLeague === league.id ? 'active' : ''}`}
                                     onClick={() => { handleLeagueChange(league.id!); setActiveDropdown(null); }}
                                 >
-                                    {league.image_base64 && <img src={league.image_base64} alt="" />}
+                                    {imageSrc(league) && <ResponsiveImage image={league} size="card" alt="" />}
                                     <span>{league.name}</span>
                                 </div>
                             ))}
@@ -175,7 +188,7 @@ const Catalog = () => {
                                         className={`filter-item ${selectedTeam === team.id ? 'active' : ''}`}
                                         onClick={() => { setSelectedTeam(selectedTeam === team.id ? undefined : team.id); setPage(1); setActiveDropdown(null); }}
                                     >
-                                        {team.image_base64 && <img src={team.image_base64} alt="" />}
+                                        {imageSrc(team) && <ResponsiveImage image={team} size="card" alt="" />}
                                         <span>{team.name}</span>
                                     </div>
                                 ))}
@@ -1,8 +1,9 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useCart } from '../../contexts/CartContext';
 import { useAuth } from '../../contexts/AuthContext';
 import { profileService, type Address } from '../../services/profile.service';
+import ResponsiveImage from '../../components/Shared/ResponsiveImage';
 import api from '../../services/api';
 import './Checkout.css';
 import { FaCreditCard, FaMoneyBillWave, FaMobileAlt, FaPlus, FaMapMarkerAlt } from 'react-icons/fa';
@@ -35,6 +36,8 @@ const Checkout = () => {
     const [policyAccepted, setPolicyAccepted] = useState(false);
     const [isSubmitting, setIsSubmitting] = useState(false);
     const [error, setError] = useState('');
+    // Reused when the same order is resubmitted (e.g. retry after a timeout) so the backend doesn't duplicate it
+    const idempotencyRef = useRef<{ key: string; body: string } | null>(null);
 
     useEffect(() => {
         const loadData = async () => {
@@ -146,7 +149,14 @@ const Checkout = () => {
                 payment_details: JSON.stringify({ phone: paymentDetails }) // Store diverse details as JSON
             };
 
-            await api.post('/orders/', payload);
+            const body = JSON.stringify(payload);
+            if (!idempotencyRef.current || idempotencyRef.current.body !== body) {
+                idempotencyRef.current = { key: crypto.randomUUID(), body };
+            }
+
+            await api.post('/orders/', payload, {
+                headers: { 'Idempotency-Key': idempotencyRef.current.key }
+            });
 
             // Success
             clearCart();
@@ -388,7 +398,7 @@ const Checkout = () => {
                                 return (
                                     <div key={idx} className="summary-item">
                                         {mainImage && (
-                                            <img src={mainImage.image_base64} alt={item.jersey.team_name} className="summary-item-img" />
+                                            <ResponsiveImage image={mainImage} size="card" alt={item.jersey.team_name} className="summary-item-img" />
                                         )}
                                         <div className="summary-item-details">
                                             <h4>{item.jersey.team_name}</h4>
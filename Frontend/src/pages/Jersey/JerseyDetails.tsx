@@ -1,5 +1,7 @@
 import { useEffect, useState } from 'react';
 import { useParams, Link } from 'react-router-dom';
+import ResponsiveImage from '../../components/Shared/ResponsiveImage';
+import JerseyCard from '../../components/Shared/JerseyCard';
 import { catalogService, type Jersey, type JerseyImage } from '../../services/catalog.service';
 import { useCart } from '../../contexts/CartContext';
 import './JerseyDetails.css';
@@ -8,6 +10,7 @@ const JerseyDetails = () => {
     const { id } = useParams<{ id: string }>();
     const { addToCart } = useCart();
     const [jersey, setJersey] = useState<Jersey | null>(null);
+    const [similar, setSimilar] = useState<Jersey[]>([]);
     const [selectedImage, setSelectedImage] = useState<JerseyImage | null>(null);
     const [selectedSize, setSelectedSize] = useState("M");
     const [customName, setCustomName] = useState("");
@@ -53,6 +56,14 @@ const JerseyDetails = () => {
         fetchJersey();
     }, [id]);
 
+    useEffect(() => {
+        // Precomputed on the server; the page works without them
+        if (!id) return;
+        catalogService.getSimilarJerseys(Number(id))
+            .then(setSimilar)
+            .catch(() => setSimilar([]));
+    }, [id]);
+
     if (loading) return <div className="loading-container">A carregar...</div>;
     if (!jersey) return <div className="error-container">Camisola não encontrada.</div>;
 
@@ -74,7 +85,7 @@ const JerseyDetails = () => {
                             className={`thumbnail ${selectedImage?.id === img.id ? 'active' : ''}`}
                             onClick={() => setSelectedImage(img)}
                         >
-                            <img src={img.image_base64} alt="Thumbnail" />
+                            <ResponsiveImage image={img} size="card" alt="Thumbnail" />
                         </div>
                     ))}
                 </div>
@@ -91,8 +102,9 @@ const JerseyDetails = () => {
                             <div className="image-wrapper" style={{
                                 transformOrigin: isZoomEnabled ? `${zoomPosition.x}% ${zoomPosition.y}%` : 'center center'
                             }}>
-                                <img
-                                    src={selectedImage.image_base64}
+                                <ResponsiveImage
+                                    image={selectedImage}
+                                    size={isZoomEnabled ? 'zoom' : 'detail'}
                                     alt={`${jersey.team_name} Main`}
                                     className="main-image"
                                 />
@@ -189,6 +201,17 @@ const JerseyDetails = () => {
                     </div>
                 </div>
             </div>
+
+            {similar.length > 0 && (
+                <section className="similar-section">
+                    <h2>Também Pode Gostar</h2>
+                    <div className="similar-scroll-container">
+                        {similar.map(item => (
+                            <JerseyCard key={item.id} jersey={item} />
+                        ))}
+                    </div>
+                </section>
+            )}
         </div>
     );
 };
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useAuth } from '../../contexts/AuthContext';
-import { profileService } from '../../services/profile.service';
+import { profileService, resolveAvatarUrl } from '../../services/profile.service';
 import type { Address, UserInfo } from '../../services/profile.service';
 import AddressForm from '../../components/Profile/AddressForm';
 import PasswordInput from '../../components/Shared/PasswordInput';
@@ -40,9 +40,8 @@ const Profile = () => {
                 username: data.username
             });
             setAddresses(data.addresses);
-            if (data.user_images && data.user_images.length > 0) {
-                // Assuming the last uploaded is the current one
-                setProfileImage(data.user_images[data.user_images.length - 1].image_data);
+            if (data.avatar_url) {
+                setProfileImage(resolveAvatarUrl(data.avatar_url));
             }
         } catch (error) {
             console.error("Error loading profile:", error);
@@ -88,18 +87,14 @@ const Profile = () => {
     const handleImageUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
         const file = e.target.files?.[0];
         if (file) {
-            const reader = new FileReader();
-            reader.onloadend = async () => {
-                const base64String = reader.result as string;
-                try {
-                    await profileService.uploadImage(base64String);
-                    setProfileImage(base64String);
-                    updateProfileImage(base64String); // Sync with header
-                } catch (error) {
-                    console.error("Error uploading image:", error);
-                }
-            };
-            reader.readAsDataURL(file);
+            try {
+                const { avatar_url } = await profileService.uploadAvatar(file);
+                const imageUrl = resolveAvatarUrl(avatar_url);
+                setProfileImage(imageUrl);
+                updateProfileImage(imageUrl); // Sync with header
+            } catch (error) {
+                console.error("Error uploading image:", error);
+            }
         }
     };
 
@@ -1,10 +1,23 @@
 import api from './api';
 
 // Types
+export type VariantSize = 'card' | 'detail' | 'zoom';
+
+// Derivatives of an uploaded image, rendered by the backend image workers
+export type ImageVariants = Partial<Record<VariantSize, { avif?: string; webp?: string }>>;
+
+export interface CatalogImage {
+    image_base64?: string;
+    image_url?: string;
+    variants?: ImageVariants;
+}
+
 export interface League {
     id?: number;
     name: string;
     image_base64?: string;
+    image_url?: string;
+    variants?: ImageVariants;
 }
 
 export interface Team {
@@ -13,11 +26,15 @@ export interface Team {
     league_id: number;
     league_name?: string;
     image_base64?: string;
+    image_url?: string;
+    variants?: ImageVariants;
 }
 
 export interface JerseyImage {
     id?: number;
-    image_base64: string;
+    image_base64?: string;
+    image_url?: string; // Multipart uploads are served from /media
+    variants?: ImageVariants;
     is_main: boolean;
 }
 
@@ -29,6 +46,14 @@ export interface JerseyType {
     description?: string;
 }
 
+export interface DuplicateImageWarning {
+    image_id: number;
+    position: number;
+    duplicate_of: number;
+    jersey_id: number;
+    distance: number;
+}
+
 export interface Jersey {
     id?: number;
     team_id: number;
@@ -41,6 +66,25 @@ export interface Jersey {
     // price: number; // Removed
     description?: string;
     images: JerseyImage[];
+    duplicate_warnings?: DuplicateImageWarning[]; // Only returned by create/update
+}
+
+export interface LeagueWithTeams extends League {
+    teams: Team[];
+}
+
+// Reference data for the storefront in one cached response
+export interface CatalogBootstrap {
+    leagues: LeagueWithTeams[];
+    types: JerseyType[];
+}
+
+// Typeahead suggestion; `id` is the filter value for teams, leagues and types
+export interface Suggestion {
+    kind: 'team' | 'league' | 'type' | 'season';
+    id?: number;
+    label: string;
+    count: number;
 }
 
 export interface PaginatedResponse<T> {
@@ -50,9 +94,21 @@ export interface PaginatedResponse<T> {
     total_pages: number;
 }
 
+export const mediaUrl = (path: string) => `${api.defaults.baseURL}${path}`;
+
+// Display source for anything with an uploaded file or legacy inline base64 data
+export const imageSrc = (item?: CatalogImage | null) =>
+    item?.image_url ? mediaUrl(item.image_url) : item?.image_base64;
+
 export const catalogService = {
     // ... (Leagues, Teams, Types remain same)
 
+    // Leagues with nested teams, and types (served with an ETag, so reloads revalidate cheaply)
+    async getBootstrap(): Promise<CatalogBootstrap> {
+        const response = await api.get('/catalog/bootstrap');
+        return response.data;
+    },
+
     // Leagues
     async getLeagues() {
         const response = await api.get('/catalog/leagues');
@@ -130,10 +186,18 @@ export const catalogService = {
         const response = await api.get(url);
         return response.data;
     },
+    async getSuggestions(q: string, limit = 8): Promise<Suggestion[]> {
+        const response = await api.get('/catalog/suggest', { params: { q, limit } });
+        return response.data;
+    },
     async getJersey(id: number) {
         const response = await api.get(`/catalog/jerseys/${id}`);
         return response.data;
     },
+    async getSimilarJerseys(id: number, limit = 8) {
+        const response = await api.get(`/catalog/jerseys/${id}/similar`, { params: { limit } });
+        return response.data;
+    },
     async createJersey(data: Jersey) {
         const response = await api.post('/catalog/jerseys', data);
         return response.data;
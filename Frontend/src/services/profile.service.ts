@@ -20,6 +20,10 @@ export interface UserInfo {
     username: string;
 }
 
+// Avatar URLs from the API are relative (e.g. /profile/avatar/1/medium?v=3)
+export const resolveAvatarUrl = (avatarUrl?: string | null) =>
+    avatarUrl ? `${api.defaults.baseURL}${avatarUrl}` : null;
+
 export const profileService = {
     async getProfile() {
         const response = await api.get('/profile/me');
@@ -36,8 +40,11 @@ export const profileService = {
         return response.data;
     },
 
-    async uploadImage(base64Image: string) {
-        const response = await api.post('/profile/me/image', { image_data: base64Image });
+    // Multipart: the file is sent as-is, without base64 inflation (axios sets the boundary)
+    async uploadAvatar(file: File) {
+        const form = new FormData();
+        form.append('file', file);
+        const response = await api.post('/profile/me/avatar', form);
         return response.data;
     },
 